@@ -1,12 +1,54 @@
-import anthropic
 import os
 from dotenv import load_dotenv
+from quotas import estimate_tokens, record_usage
+from telemetry import record_span, record_llm_tokens
+import threading
+import time
 
 load_dotenv()
 
-client = anthropic.Anthropic(
-    api_key=os.environ.get("ANTHROPIC_API_KEY")
-)
+# Clients are created on first use - importing anthropic is the bulk of a cold start
+_client = None
+_async_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    """Return the sync Anthropic client (created on first use)"""
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                import anthropic
+                _client = anthropic.Anthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+    return _client
+
+
+def get_async_client():
+    """Return the async Anthropic client for the API routes (created on first use)"""
+    global _async_client
+    if _async_client is None:
+        with _client_lock:
+            if _async_client is None:
+                import anthropic
+                _async_client = anthropic.AsyncAnthropic(api_key=os.environ.get("ANTHROPIC_API_KEY"))
+    return _async_client
+
+# Output cap for Jamie and Morgan - quotas reserve this much up front
+MAX_OUTPUT_TOKENS = 2000
+
+async def _create_message_async(prompt):
+    """One Jamie/Morgan call - charged to the quota and timed for the request"""
+    start = time.perf_counter()
+    message = await get_async_client().messages.create(
+        model="claude-sonnet-4-5-20250929",
+        max_tokens=MAX_OUTPUT_TOKENS,
+        messages=[{"role": "user", "content": prompt}]
+    )
+    record_span("llm", time.perf_counter() - start)
+    record_llm_tokens(message.usage.input_tokens, message.usage.output_tokens)
+    record_usage(message.usage)
+    return message
 
 class JamieAgent:
     """
@@ -29,7 +71,27 @@ class JamieAgent:
             A formatted job description
         """
         
-        prompt = f"""You are Jamie, the Intake Specialist for ThinkLoop.
+        message = get_client().messages.create(
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=MAX_OUTPUT_TOKENS,
+            messages=[{"role": "user", "content": self._job_description_prompt(user_input)}]
+        )
+        
+        return message.content[0].text
+    
+    async def create_job_description_async(self, user_input):
+        """Async version of create_job_description"""
+        
+        message = await _create_message_async(self._job_description_prompt(user_input))
+        
+        return message.content[0].text
+    
+    def estimate_tokens(self, user_input):
+        """Worst-case billable tokens for create_job_description"""
+        return estimate_tokens(self._job_description_prompt(user_input), MAX_OUTPUT_TOKENS)
+    
+    def _job_description_prompt(self, user_input):
+        return f"""You are Jamie, the Intake Specialist for ThinkLoop.
 
 The recruiter just said: "{user_input}"
 
@@ -47,14 +109,6 @@ Format the JD with these sections:
 Make it professional but engaging. Fill in reasonable defaults if information is missing.
 
 Output ONLY the job description, no meta-commentary."""
-
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        return message.content[0].text
     
     def refine_job_description(self, original_jd, feedback):
         """
@@ -72,9 +126,9 @@ Update the job description based on their feedback. Keep the same format.
 
 Output ONLY the updated job description."""
 
-        message = client.messages.create(
+        message = get_client().messages.create(
             model="claude-sonnet-4-5-20250929",
-            max_tokens=2000,
+            max_tokens=MAX_OUTPUT_TOKENS,
             messages=[{"role": "user", "content": prompt}]
         )
         
@@ -137,7 +191,27 @@ class MorganAgent:
             Dictionary with score, analysis, and recommendation
         """
         
-        prompt = f"""You are Morgan, the Resume Hunter for ThinkLoop.
+        message = get_client().messages.create(
+            model="claude-sonnet-4-5-20250929",
+            max_tokens=MAX_OUTPUT_TOKENS,
+            messages=[{"role": "user", "content": self._score_prompt(resume_text, job_description)}]
+        )
+        
+        return self._parse_score(message.content[0].text, resume_text)
+    
+    async def score_resume_async(self, resume_text, job_description):
+        """Async version of score_resume"""
+        
+        message = await _create_message_async(self._score_prompt(resume_text, job_description))
+        
+        return self._parse_score(message.content[0].text, resume_text)
+    
+    def estimate_tokens(self, resume_text, job_description):
+        """Worst-case billable tokens for score_resume"""
+        return estimate_tokens(self._score_prompt(resume_text, job_description), MAX_OUTPUT_TOKENS)
+    
+    def _score_prompt(self, resume_text, job_description):
+        return f"""You are Morgan, the Resume Hunter for ThinkLoop.
 
 Your task: Analyze this resume against the job requirements and provide a detailed scoring.
 
@@ -173,15 +247,8 @@ RECRUITER NOTE:
 [1-2 sentences summarizing your take]
 
 Be honest and specific. Score rigorously - only exceptional candidates should score 90+."""
-
-        message = client.messages.create(
-            model="claude-sonnet-4-5-20250929",
-            max_tokens=2000,
-            messages=[{"role": "user", "content": prompt}]
-        )
-        
-        analysis = message.content[0].text
-        
+    
+    def _parse_score(self, analysis, resume_text):
         # Extract score from response
         score_line = [line for line in analysis.split('\n') if line.startswith('SCORE:')]
         score = int(score_line[0].replace('SCORE:', '').strip()) if score_line else 0
@@ -387,7 +454,7 @@ POSTING STRATEGY:
 
 Be specific and strategic."""
 
-        message = client.messages.create(
+        message = get_client().messages.create(
             model="claude-sonnet-4-5-20250929",
             max_tokens=1500,
             messages=[{"role": "user", "content": prompt}]
@@ -485,7 +552,7 @@ Provide a brief, energetic performance summary with:
 
 Keep it short and upbeat - you're excited about the results!"""
 
-        message = client.messages.create(
+        message = get_client().messages.create(
             model="claude-sonnet-4-5-20250929",
             max_tokens=500,
             messages=[{"role": "user", "content": prompt}]
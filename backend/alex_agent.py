@@ -14,6 +14,18 @@ client = anthropic.Anthropic(
     api_key=os.environ.get("ANTHROPIC_API_KEY")
 )
 
+def extract_json_block(response_text):
+    """JSON from a reply - Claude might wrap it in a markdown fence, so extract it"""
+    if "```json" in response_text:
+        json_start = response_text.find("```json") + 7
+        json_end = response_text.find("```", json_start)
+        return response_text[json_start:json_end].strip()
+    elif "```" in response_text:
+        json_start = response_text.find("```") + 3
+        json_end = response_text.find("```", json_start)
+        return response_text[json_start:json_end].strip()
+    return response_text.strip()
+
 class AlexAgent:
     """
     Alex - Interview Coordinator
@@ -77,65 +89,11 @@ Make questions specific to the role, not generic."""
             # Extract JSON from response
             response_text = message.content[0].text
             
-            # Try to parse JSON
-            # Claude might wrap it in markdown, so extract it
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                json_str = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                json_str = response_text[json_start:json_end].strip()
-            else:
-                json_str = response_text.strip()
-            
-            questions = json.loads(json_str)
+            questions = json.loads(extract_json_block(response_text))
             return questions
             
         except Exception as e:
-            print(f"Evaluating Q{i}...")
-        
-        eval_result = alex.evaluate_answer(question, answer)
-        evaluations.append({
-            "question": question['question'],
-            "answer": answer,
-            "score": eval_result['score'],
-            "assessment": eval_result['assessment']
-        })
-        
-        print(f"Score: {eval_result['score']}/10")
-        print(f"Assessment: {eval_result['assessment']}")
-        print()
-    
-    print("\n" + "="*60)
-    print("📊 Step 4: Alex generates overall summary...")
-    print("="*60)
-    
-    # Calculate overall score
-    avg_score = sum(e['score'] for e in evaluations) / len(evaluations)
-    overall_score = round(avg_score * 10)
-    
-    interview_data = {
-        "overall_score": overall_score,
-        "evaluations": evaluations,
-        "recommendation": alex._get_recommendation(avg_score)
-    }
-    
-    summary = alex.generate_interview_summary(interview_data)
-    
-    print(f"\nOVERALL SCORE: {overall_score}/100")
-    print("="*60)
-    print(summary)
-    print("="*60)
-    
-    print("\n✅ ALEX TEST COMPLETE!")
-    print("\nAlex can now:")
-    print("- Generate custom interview questions for any role")
-    print("- Evaluate candidate answers in real-time")
-    print("- Provide detailed feedback and recommendations")
-    print("- Conduct complete screening interviews")
-Error generating questions: {e}")
+            print(f"Error generating questions: {e}")
             # Fallback questions
             return [
                 {
@@ -198,19 +156,7 @@ Be fair but rigorous. A score of 7-8 is good, 9-10 is exceptional."""
             
             response_text = message.content[0].text
             
-            # Extract JSON
-            if "```json" in response_text:
-                json_start = response_text.find("```json") + 7
-                json_end = response_text.find("```", json_start)
-                json_str = response_text[json_start:json_end].strip()
-            elif "```" in response_text:
-                json_start = response_text.find("```") + 3
-                json_end = response_text.find("```", json_start)
-                json_str = response_text[json_start:json_end].strip()
-            else:
-                json_str = response_text.strip()
-            
-            evaluation = json.loads(json_str)
+            evaluation = json.loads(extract_json_block(response_text))
             return evaluation
             
         except Exception as e:
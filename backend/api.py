@@ -1,25 +1,103 @@
-from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Form, Header, Request
+from fastapi import FastAPI, Depends, HTTPException, File, UploadFile, Form, Header, Request, Query, Response
 from fastapi.middleware.cors import CORSMiddleware
-from sqlalchemy.orm import Session
+from fastapi.responses import StreamingResponse, JSONResponse, PlainTextResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from starlette.concurrency import run_in_threadpool
 from pydantic import BaseModel
-from database import get_db
-from user_service import create_user, authenticate_user, get_user_by_email
-from job_service import create_job_from_requirements, get_user_jobs
-from candidate_service import add_and_score_candidate, get_job_candidates
-from auth import create_access_token, verify_token
+from database import get_async_db, read_session, get_pool_stats, get_async_pool_stats, replica_router
+from user_service import create_user_async, authenticate_user_async, get_user_by_email_async, get_user_by_id_async
+from principals import Principal, principal_cache
+from password_hasher import password_hasher, PasswordPoolBusy
+from job_service import (
+    create_job_from_requirements_async, get_user_jobs_page_async, get_user_job_async, estimate_job_tokens,
+    get_user_jobs_version_async, get_user_job_version_async, mark_job_posted_async
+)
+from candidate_service import (
+    add_and_score_candidate_async, get_job_candidates_page_async, get_candidate_for_user_async, estimate_candidate_tokens,
+    get_candidate_version_async, get_suggested_candidates_async, add_candidate_unscored_async,
+    get_scoring_queue_async, claim_candidates_async, release_claim_async, score_pending_candidates_async,
+    attach_resume_file_async, UNSCORED_STATUSES
+)
+from pagination import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from auth import create_user_token, verify_token, is_legacy_subject
 from resume_parser import parse_resume_file
-from riley_service import post_job_with_riley, get_job_posting_stats
-from rate_limiter import signup_limiter, login_limiter, job_limiter, candidate_limiter
+from blob_store import get_blob_store, blob_url, blob_key, content_type_for, parse_range_header
+from dashboard_service import get_dashboard_async
+from search_service import search_candidates_async
+from audit_log import audit_log, get_user_audit_page_async
+from riley_service import post_job_with_riley_async, get_job_posting_stats_async
+from rate_limiter import signup_limiter, login_limiter
+from quotas import quota_manager, quota_headers, QuotaExceeded, QuotaTooLarge
+from response_cache import response_cache, job_tag
+from telemetry import metrics, start_request, end_request
+from profiler import ProfilingMiddleware, sampler, is_profile_token
 from typing import Optional
+import asyncio
+import hashlib
+import io
+import os
+import time
 
 app = FastAPI(title="ThinkLoop API")
 
-# Create tables on startup
-@app.on_event("startup") 
+# Schema migrations run in the release phase (see Procfile), not on startup, so a
+# worker boots even while the database is briefly unreachable. MIGRATE_ON_STARTUP
+# brings the old behaviour back for local development.
+MIGRATE_ON_STARTUP = os.getenv("MIGRATE_ON_STARTUP", "false").lower() == "true"
+
+@app.on_event("startup")
 def startup_event():
-    from database import engine
-    from models import Base
-    Base.metadata.create_all(bind=engine)
+    if MIGRATE_ON_STARTUP:
+        from database import run_migrations
+        run_migrations()
+
+# Keep read replica health up to date
+replica_health_task = None
+
+@app.on_event("startup")
+async def start_replica_health_checks():
+    global replica_health_task
+    if replica_router.replicas:
+        replica_health_task = asyncio.create_task(replica_router.run_health_checks())
+
+@app.on_event("shutdown")
+async def stop_replica_health_checks():
+    if replica_health_task:
+        replica_health_task.cancel()
+
+@app.on_event("shutdown")
+def stop_password_pool():
+    password_hasher.shutdown()
+
+@app.on_event("shutdown")
+def flush_audit_log():
+    audit_log.shutdown()
+
+# Read-your-writes: once a user sends a write, their reads stay on the primary
+# for READ_STICKINESS_SECONDS so replica lag can't hide what they just did
+READ_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+# Sampled profiling - added first so it stays the innermost middleware and
+# shares the endpoint's task (BaseHTTPMiddleware runs the app in a new task)
+app.add_middleware(ProfilingMiddleware)
+
+# Per-request spans (db, llm, parse, bcrypt) go out as Server-Timing and into /metrics
+@app.middleware("http")
+async def instrument_requests(request: Request, call_next):
+    timings, token = start_request()
+    metrics.request_started()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        response.headers["Server-Timing"] = timings.server_timing()
+        return response
+    finally:
+        # Label by route template, not raw path, to keep the series count bounded
+        route = request.scope.get("route")
+        metrics.request_finished(request.method, getattr(route, "path", "unmatched"), status,
+                                 time.perf_counter() - timings.started)
+        end_request(token)
 
 # CORS - allow frontend to connect
 app.add_middleware(
@@ -55,9 +133,41 @@ class AddCandidateRequest(BaseModel):
     candidate_name: str
     candidate_email: str
     candidate_phone: Optional[str] = None
+    # Store now with a provisional skill-match score, let POST /jobs/{id}/score-pending score it
+    defer_scoring: bool = False
+
+# Conditional GET - ETags are derived from Job.version counters, so a repeat
+# request costs one small query and a 304 with no body to build
+def make_etag(request: Request, user_id: str, *version):
+    raw = "|".join([user_id, request.url.path, str(request.query_params), *map(str, version)])
+    return '"' + hashlib.sha1(raw.encode()).hexdigest()[:20] + '"'
+
+def etag_headers(etag: str):
+    # Per-user data: private caches only, and always revalidate (cheap when it's a 304)
+    return {"ETag": etag, "Cache-Control": "private, no-cache", "Vary": "Authorization"}
+
+def not_modified(request: Request, etag: str):
+    """A 304 response if the client already has this version, else None"""
+    if_none_match = request.headers.get("if-none-match")
+    if not if_none_match:
+        return None
+    tags = [tag.strip().removeprefix("W/") for tag in if_none_match.split(",")]
+    if etag in tags or "*" in tags:
+        return Response(status_code=304, headers=etag_headers(etag))
+    return None
+
+def cached_response(request: Request, etag: str, body: bytes):
+    """Serve a response cache hit - as a 304 if the client has it too"""
+    return not_modified(request, etag) or Response(content=body, media_type="application/json", headers=etag_headers(etag))
+
+async def cache_response(cache_key, etag: str, payload: dict):
+    """Render payload once, keep the bytes in the response cache and send them"""
+    response = JSONResponse(payload, headers=etag_headers(etag))
+    await response_cache.set(cache_key, etag, response.body)
+    return response
 
 # Auth dependency - Fixed to use headers
-def get_current_user(authorization: str = Header(None), db: Session = Depends(get_db)):
+async def get_current_user(request: Request, authorization: str = Header(None), db: AsyncSession = Depends(get_async_db)):
     if not authorization:
         raise HTTPException(status_code=401, detail="Missing authorization header")
     
@@ -65,13 +175,33 @@ def get_current_user(authorization: str = Header(None), db: Session = Depends(ge
     token = authorization.replace('Bearer ', '') if authorization.startswith('Bearer ') else authorization
     
     payload = verify_token(token)
-    if not payload:
+    if not payload or not payload.get("sub"):
         raise HTTPException(status_code=401, detail="Invalid or expired token")
     
-    user = get_user_by_email(db, payload.get("sub"))
-    if not user:
-        raise HTTPException(status_code=401, detail="User not found")
-    return user
+    # Signature check above, then a cache hit - no DB query for warm principals
+    subject = payload["sub"]
+    principal = principal_cache.get(subject)
+    if principal is None:
+        if is_legacy_subject(subject):
+            user = await get_user_by_email_async(db, subject)
+        else:
+            user = await get_user_by_id_async(db, subject)
+        if not user:
+            raise HTTPException(status_code=401, detail="User not found")
+        principal = Principal.from_user(user)
+        principal_cache.put(subject, principal)
+    
+    if not principal.is_active:
+        raise HTTPException(status_code=401, detail="Account is deactivated")
+    if request.method not in READ_METHODS:
+        # Before the handler runs - the write is recorded before any response can go out
+        await replica_router.mark_write(principal.id)
+    return principal
+
+async def get_read_db(user = Depends(get_current_user)):
+    """Session for read-only routes - see database.read_session"""
+    async with read_session(await replica_router.is_sticky(user.id)) as db:
+        yield db
 
 # Routes
 @app.get("/")
@@ -86,20 +216,66 @@ def root():
 def health_check():
     return {"status": "ok"}
 
+# Operational endpoints expose pool internals and error strings - they need the
+# X-Profile-Token header (PROFILE_TOKEN), and are disabled while it's unset
+def require_admin_token(x_profile_token: str = Header(None)):
+    if not is_profile_token(x_profile_token):
+        raise HTTPException(status_code=403, detail="Admin endpoints are not enabled for this token")
+
+@app.get("/health/db", dependencies=[Depends(require_admin_token)])
+def db_pool_health():
+    """Connection pool usage - used to size the pool across workers"""
+    return {"sync": get_pool_stats(), "async": get_async_pool_stats(), "replicas": replica_router.stats()}
+
+@app.get("/metrics", dependencies=[Depends(require_admin_token)])
+def prometheus_metrics():
+    """Route latency histograms, in-flight requests and error/span counters for Prometheus"""
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+@app.get("/admin/profiles", dependencies=[Depends(require_admin_token)])
+def list_profiles(route: Optional[str] = None):
+    """Recent request profiles, newest first - route filters by template, e.g. /jobs/{job_id}"""
+    return {"profiles": sampler.recent(route)}
+
+@app.get("/admin/profiles/{profile_id}", dependencies=[Depends(require_admin_token)])
+def download_profile(profile_id: int):
+    """Collapsed stacks of one profile - feed to flamegraph.pl or speedscope"""
+    profile = sampler.get(profile_id)
+    if profile is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return PlainTextResponse(profile.collapsed(), headers={
+        "Content-Disposition": f'attachment; filename="profile-{profile.id}.folded"'
+    })
+
+@app.get("/health/cache", dependencies=[Depends(require_admin_token)])
+def response_cache_health():
+    """Response cache size and hit ratio"""
+    return response_cache.stats()
+
+@app.get("/health/passwords", dependencies=[Depends(require_admin_token)])
+def password_pool_health():
+    """Password hashing pool load - hash latency and queue wait"""
+    return password_hasher.stats()
+
+@app.get("/health/audit", dependencies=[Depends(require_admin_token)])
+def audit_log_health():
+    """Audit log buffer - queue depth, batches written and entries dropped"""
+    return audit_log.stats()
+
 @app.post("/signup")
-def signup(
+async def signup(
     request_data: SignupRequest, 
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: None = Depends(signup_limiter)
 ):
     try:
-        user, error = create_user(db, request_data.email, request_data.password, 
+        user, error = await create_user_async(db, request_data.email, request_data.password, 
                                   request_data.full_name, request_data.company_name)
         if error:
             raise HTTPException(status_code=400, detail=error)
         
-        token = create_access_token({"sub": user.email})
+        token = create_user_token(user)
         return {
             "user": {
                 "email": user.email, 
@@ -111,23 +287,25 @@ def signup(
         }
     except HTTPException:
         raise
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
     except Exception as e:
         print(f"Signup error: {e}")
         raise HTTPException(status_code=500, detail=f"Signup failed: {str(e)}")
 
 @app.post("/login")
-def login(
+async def login(
     request_data: LoginRequest, 
     request: Request,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     _: None = Depends(login_limiter)
 ):
     try:
-        user = authenticate_user(db, request_data.email, request_data.password)
+        user = await authenticate_user_async(db, request_data.email, request_data.password)
         if not user:
             raise HTTPException(status_code=401, detail="Invalid credentials")
         
-        token = create_access_token({"sub": user.email})
+        token = create_user_token(user)
         return {
             "user": {
                 "email": user.email, 
@@ -139,20 +317,46 @@ def login(
         }
     except HTTPException:
         raise
+    except PasswordPoolBusy:
+        raise HTTPException(status_code=503, detail="Server busy, please retry", headers={"Retry-After": "1"})
     except Exception as e:
         print(f"Login error: {e}")
         raise HTTPException(status_code=500, detail=f"Login failed: {str(e)}")
 
+@app.get("/dashboard")
+async def get_dashboard(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Everything the dashboard shows in one request - replaces a /jobs/{id}/candidates call per job"""
+    try:
+        # One query - the validator comes from the same rows as the body
+        version, dashboard = await get_dashboard_async(db, user.id)
+        etag = make_etag(request, user.id, *version)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        
+        response.headers.update(etag_headers(etag))
+        return dashboard
+    except Exception as e:
+        print(f"Dashboard error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load dashboard: {str(e)}")
+
 @app.post("/jobs")
-def create_job(
+async def create_job(
     request_data: CreateJobRequest,
     request: Request,
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user),
-    _: None = Depends(job_limiter)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user = Depends(get_current_user)
 ):
     try:
-        job = create_job_from_requirements(db, user.id, request_data.requirements)
+        async with quota_manager.metered(user, estimate_job_tokens(request_data.requirements)) as reservation:
+            job = await create_job_from_requirements_async(db, user.id, request_data.requirements)
+        response.headers.update(quota_headers(reservation.remaining))
         return {
             "job": {
                 "id": job.id, 
@@ -162,17 +366,68 @@ def create_job(
                 "created_at": str(job.created_at)
             }
         }
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=quota_headers(e.remaining, e.retry_after))
+    except QuotaTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print(f"Job creation error: {e}")
         raise HTTPException(status_code=500, detail=f"Job creation failed: {str(e)}")
 
+@app.get("/audit-logs")
+async def list_audit_logs(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    action: Optional[str] = None,
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """The user's own audit trail, newest first - entries appear after the next flush"""
+    try:
+        try:
+            entries, next_cursor = await get_user_audit_page_async(db, user.id, limit, cursor, action=action)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return {
+            "entries": [
+                {
+                    "id": e.id,
+                    "action": e.action,
+                    "entity_type": e.entity_type,
+                    "entity_id": e.entity_id,
+                    "created_at": str(e.created_at)
+                }
+                for e in entries
+            ],
+            "next_cursor": next_cursor
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"List audit logs error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load audit logs: {str(e)}")
+
 @app.get("/jobs")
-def list_jobs(
-    db: Session = Depends(get_db),
+async def list_jobs(
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    status: Optional[str] = None,
+    request: Request = None,
+    response: Response = None,
+    db: AsyncSession = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     try:
-        jobs = get_user_jobs(db, user.id)
+        etag = make_etag(request, user.id, *await get_user_jobs_version_async(db, user.id))
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        
+        try:
+            jobs, next_cursor = await get_user_jobs_page_async(db, user.id, limit, cursor, status=status)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        response.headers.update(etag_headers(etag))
         return {
             "jobs": [
                 {
@@ -182,24 +437,42 @@ def list_jobs(
                     "created_at": str(j.created_at)
                 } 
                 for j in jobs
-            ]
+            ],
+            "next_cursor": next_cursor
         }
+    except HTTPException:
+        raise
     except Exception as e:
         print(f"List jobs error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to load jobs: {str(e)}")
 
 @app.get("/jobs/{job_id}")
-def get_job_details(
+async def get_job_details(
     job_id: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
-    from models import Job
-    job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
+    version = await get_user_job_version_async(db, job_id, user.id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    
+    etag = make_etag(request, user.id, version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    # The version is part of the key - a write seen by another worker is a miss here
+    cache_key = await response_cache.key(user.id, request, [job_tag(job_id)], version)
+    hit = await response_cache.get(cache_key)
+    if hit:
+        return cached_response(request, *hit)
+    
+    job = await get_user_job_async(db, job_id, user.id)
     if not job:
         raise HTTPException(status_code=404, detail="Job not found")
     
-    return {
+    return await cache_response(cache_key, etag, {
         "job": {
             "id": job.id,
             "title": job.title,
@@ -208,27 +481,35 @@ def get_job_details(
             "status": job.status,
             "created_at": str(job.created_at)
         }
-    }
+    })
 
 @app.post("/candidates")
-def add_candidate(
+async def add_candidate(
     request_data: AddCandidateRequest,
     request: Request,
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user),
-    _: None = Depends(candidate_limiter)
+    response: Response,
+    db: AsyncSession = Depends(get_async_db),
+    user = Depends(get_current_user)
 ):
     try:
         # Verify job belongs to user
-        from models import Job
-        job = db.query(Job).filter(Job.id == request_data.job_id, Job.user_id == user.id).first()
+        job = await get_user_job_async(db, request_data.job_id, user.id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        candidate, error = add_and_score_candidate(
-            db, request_data.job_id, request_data.resume_text, 
-            request_data.candidate_name, request_data.candidate_email, request_data.candidate_phone
-        )
+        if request_data.defer_scoring:
+            candidate, error = await add_candidate_unscored_async(
+                db, request_data.job_id, request_data.resume_text,
+                request_data.candidate_name, request_data.candidate_email, request_data.candidate_phone
+            )
+        else:
+            estimate = estimate_candidate_tokens(request_data.resume_text, job.job_description)
+            async with quota_manager.metered(user, estimate) as reservation:
+                candidate, error = await add_and_score_candidate_async(
+                    db, request_data.job_id, request_data.resume_text, 
+                    request_data.candidate_name, request_data.candidate_email, request_data.candidate_phone
+                )
+            response.headers.update(quota_headers(reservation.remaining))
         if error:
             raise HTTPException(status_code=400, detail=error)
         
@@ -240,30 +521,57 @@ def add_candidate(
                 "score": candidate.score,
                 "recommendation": candidate.recommendation,
                 "analysis": candidate.analysis,  # ← ADD THIS
-                "status": candidate.status
+                "status": candidate.status,
+                "provisional": candidate.status in UNSCORED_STATUSES
             }
         }
     except HTTPException:
         raise
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=quota_headers(e.remaining, e.retry_after))
+    except QuotaTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print(f"Add candidate error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to add candidate: {str(e)}")
 
 @app.get("/jobs/{job_id}/candidates")
-def list_candidates(
+async def list_candidates(
     job_id: str,
-    db: Session = Depends(get_db),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    min_score: int = Query(0, ge=0, le=100),
+    recommendation: Optional[str] = None,
+    status: Optional[str] = None,
+    request: Request = None,
+    db: AsyncSession = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     try:
-        # Verify job belongs to user
-        from models import Job
-        job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
-        if not job:
+        # Verify job belongs to user - its version covers every candidate
+        version = await get_user_job_version_async(db, job_id, user.id)
+        if version is None:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        candidates = get_job_candidates(db, job_id)
-        return {
+        etag = make_etag(request, user.id, version)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        
+        # The version is part of the key - a write seen by another worker is a miss here
+        cache_key = await response_cache.key(user.id, request, [job_tag(job_id)], version)
+        hit = await response_cache.get(cache_key)
+        if hit:
+            return cached_response(request, *hit)
+        
+        try:
+            candidates, next_cursor = await get_job_candidates_page_async(
+                db, job_id, limit, cursor,
+                min_score=min_score, recommendation=recommendation, status=status
+            )
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        return await cache_response(cache_key, etag, {
             "candidates": [
                 {
                     "id": c.id, 
@@ -271,35 +579,145 @@ def list_candidates(
                     "email": c.email,
                     "score": c.score,
                     "recommendation": c.recommendation,
-                    "analysis": c.analysis,  # ADD THIS
                     "status": c.status,
+                    "provisional": c.status in UNSCORED_STATUSES,
                     "applied_at": str(c.applied_at)
                 } 
                 for c in candidates
-            ]
-        }
+            ],
+            "next_cursor": next_cursor
+        })
     except HTTPException:
         raise
     except Exception as e:
         print(f"List candidates error: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to load candidates: {str(e)}")
 
+@app.post("/jobs/{job_id}/score-pending")
+async def score_pending_candidates(
+    job_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db),
+    user = Depends(get_current_user)
+):
+    """Score the job's deferred candidates with Morgan, best skill pre-rank first"""
+    try:
+        job = await get_user_job_async(db, job_id, user.id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        queue = await get_scoring_queue_async(db, job)
+        scored = []
+        if queue:
+            # Only take as many as the quota has room for right now - at least one, so
+            # a user with no budget left gets a 429 with Retry-After
+            budget = min((await run_in_threadpool(quota_manager.remaining, user)).values())
+            wanted, total = [], 0
+            for candidate, _ in queue[:limit]:
+                total += estimate_candidate_tokens(candidate.resume_text, job.job_description)
+                if wanted and total > budget:
+                    break
+                wanted.append(candidate)
+            
+            # Overlapping requests each get their own candidates
+            claim, batch = await claim_candidates_async(db, job, wanted)
+            if batch:
+                try:
+                    # One reservation for the whole batch - all of it fits the quota or none is scored
+                    estimate = sum(estimate_candidate_tokens(c.resume_text, job.job_description) for c in batch)
+                    async with quota_manager.metered(user, estimate) as reservation:
+                        scored = await score_pending_candidates_async(db, job, claim, batch)
+                except BaseException:
+                    await release_claim_async(db, job, claim)
+                    raise
+                response.headers.update(quota_headers(reservation.remaining))
+        
+        return {
+            "scored": [
+                {
+                    "id": c.id,
+                    "name": c.full_name,
+                    "email": c.email,
+                    "score": c.score,
+                    "recommendation": c.recommendation,
+                    "status": c.status
+                }
+                for c in scored
+            ],
+            "pending": len(queue) - len(scored)
+        }
+    except HTTPException:
+        raise
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=quota_headers(e.remaining, e.retry_after))
+    except QuotaTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
+    except Exception as e:
+        print(f"Score pending error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to score candidates: {str(e)}")
+
+@app.get("/jobs/{job_id}/suggested-candidates")
+async def suggested_candidates(
+    job_id: str,
+    limit: int = Query(10, ge=1, le=50),
+    request: Request = None,
+    response: Response = None,
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Past candidates from the user's other jobs who look like a fit for this one"""
+    try:
+        # Suggestions draw on every job the user has, so any write to them changes the ETag
+        etag = make_etag(request, user.id, *await get_user_jobs_version_async(db, user.id))
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        
+        job = await get_user_job_async(db, job_id, user.id)
+        if not job:
+            raise HTTPException(status_code=404, detail="Job not found")
+        
+        suggestions = await get_suggested_candidates_async(db, job, limit)
+        response.headers.update(etag_headers(etag))
+        return {
+            "candidates": [
+                {
+                    "id": c.id,
+                    "job_id": c.job_id,
+                    "name": c.full_name,
+                    "email": c.email,
+                    "score": c.score,
+                    "recommendation": c.recommendation,
+                    "status": c.status,
+                    "applied_at": str(c.applied_at),
+                    "similarity": round(similarity, 4)
+                }
+                for c, similarity in suggestions
+            ]
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Suggested candidates error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to load suggested candidates: {str(e)}")
+
 @app.post("/candidates/upload")
 async def upload_candidate_resume(
     job_id: str = Form(...),
     candidate_name: str = Form(...),
     candidate_email: str = Form(...),
     candidate_phone: Optional[str] = Form(None),
+    defer_scoring: bool = Form(False),
     resume_file: UploadFile = File(...),
     request: Request = None,
-    db: Session = Depends(get_db),
-    user = Depends(get_current_user),
-    _: None = Depends(candidate_limiter)
+    response: Response = None,
+    db: AsyncSession = Depends(get_async_db),
+    user = Depends(get_current_user)
 ):
     try:
         # Verify job belongs to user
-        from models import Job
-        job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
+        job = await get_user_job_async(db, job_id, user.id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
@@ -308,21 +726,41 @@ async def upload_candidate_resume(
         if len(file_bytes) > 10 * 1024 * 1024:
             raise HTTPException(status_code=400, detail="File too large (max 10MB)")
         
-        # Parse resume
-        resume_text = parse_resume_file(resume_file.filename, file_bytes)
+        # Parse resume (CPU-bound, keep it off the event loop)
+        resume_text = await run_in_threadpool(parse_resume_file, resume_file.filename, file_bytes)
         
         if not resume_text:
             raise HTTPException(status_code=400, detail="Could not parse resume file. Please ensure it's a valid PDF or DOCX.")
         
-        # Score with Morgan
-        candidate, error = add_and_score_candidate(
-            db, job_id, resume_text, 
-            candidate_name, candidate_email, candidate_phone
-        )
+        if defer_scoring:
+            candidate, error = await add_candidate_unscored_async(
+                db, job_id, resume_text,
+                candidate_name, candidate_email, candidate_phone
+            )
+        else:
+            estimate = estimate_candidate_tokens(resume_text, job.job_description)
+            async with quota_manager.metered(user, estimate) as reservation:
+                # Score with Morgan
+                candidate, error = await add_and_score_candidate_async(
+                    db, job_id, resume_text, 
+                    candidate_name, candidate_email, candidate_phone
+                )
+            response.headers.update(quota_headers(reservation.remaining))
         
         if error:
             raise HTTPException(status_code=400, detail=error)
         
+        # Keep the original file so it can be re-parsed later. Stored only once the
+        # candidate is committed, so a failed upload or scoring leaves no orphaned blob.
+        # Blobs are shared by content, so deleting one on failure isn't safe.
+        try:
+            ext = os.path.splitext(resume_file.filename)[1]
+            key = await run_in_threadpool(get_blob_store().put, io.BytesIO(file_bytes), ext)
+            await attach_resume_file_async(db, candidate, blob_url(key))
+        except Exception as e:
+            # The candidate is saved and scored - don't fail the upload over the original file
+            print(f"Resume file storage error for candidate {candidate.id}: {e}")
+        
         return {
             "candidate": {
                 "id": candidate.id,
@@ -331,34 +769,173 @@ async def upload_candidate_resume(
                 "score": candidate.score,
                 "recommendation": candidate.recommendation,
                 "analysis": candidate.analysis,  # ADD THIS LINE
+                "provisional": candidate.status in UNSCORED_STATUSES,
                 "resume_preview": resume_text[:200] + "..." if len(resume_text) > 200 else resume_text
             }
         }
     except HTTPException:
         raise
+    except QuotaExceeded as e:
+        raise HTTPException(status_code=429, detail=str(e), headers=quota_headers(e.remaining, e.retry_after))
+    except QuotaTooLarge as e:
+        raise HTTPException(status_code=413, detail=str(e))
     except Exception as e:
         print(f"Upload error: {e}")
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
+# Declared before /candidates/{candidate_id} so "search" isn't taken for an id
+@app.get("/candidates/search")
+async def search_candidates(
+    q: str = Query(..., min_length=1, max_length=200),
+    limit: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    request: Request = None,
+    response: Response = None,
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    """Full-text search over the user's candidates across all jobs, best match first"""
+    try:
+        etag = make_etag(request, user.id, *await get_user_jobs_version_async(db, user.id))
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        
+        try:
+            rows, next_cursor = await search_candidates_async(db, user.id, q, limit, cursor)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        except NotImplementedError as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        response.headers.update(etag_headers(etag))
+        return {
+            "candidates": [
+                {
+                    "id": c.id,
+                    "job_id": c.job_id,
+                    "job_title": c.job_title,
+                    "name": c.full_name,
+                    "email": c.email,
+                    "score": c.score,
+                    "recommendation": c.recommendation,
+                    "status": c.status,
+                    "applied_at": str(c.applied_at),
+                    "relevance": c.relevance,
+                    "snippet": c.snippet
+                }
+                for c in rows
+            ],
+            "next_cursor": next_cursor
+        }
+    except HTTPException:
+        raise
+    except Exception as e:
+        print(f"Search candidates error: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to search candidates: {str(e)}")
+
+@app.get("/candidates/{candidate_id}")
+async def get_candidate_details(
+    candidate_id: str,
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    version = await get_candidate_version_async(db, candidate_id, user.id)
+    if version is None:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    
+    etag = make_etag(request, user.id, version)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    
+    candidate = await get_candidate_for_user_async(db, candidate_id, user.id)
+    if not candidate:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    
+    response.headers.update(etag_headers(etag))
+    return {
+        "candidate": {
+            "id": candidate.id,
+            "job_id": candidate.job_id,
+            "name": candidate.full_name,
+            "email": candidate.email,
+            "phone": candidate.phone,
+            "score": candidate.score,
+            "recommendation": candidate.recommendation,
+            "analysis": candidate.analysis,
+            "resume_text": candidate.resume_text,
+            "has_resume_file": candidate.resume_file_url is not None,
+            "status": candidate.status,
+            "applied_at": str(candidate.applied_at),
+            "screened_at": str(candidate.screened_at) if candidate.screened_at else None
+        }
+    }
+
+@app.get("/candidates/{candidate_id}/resume")
+async def download_candidate_resume(
+    candidate_id: str,
+    range_header: Optional[str] = Header(None, alias="Range"),
+    db: AsyncSession = Depends(get_read_db),
+    user = Depends(get_current_user)
+):
+    candidate = await get_candidate_for_user_async(db, candidate_id, user.id)
+    if not candidate:
+        raise HTTPException(status_code=404, detail="Candidate not found")
+    
+    key = blob_key(candidate.resume_file_url)
+    store = get_blob_store()
+    if not key or not store.exists(key):
+        raise HTTPException(status_code=404, detail="No resume file stored for this candidate")
+    
+    size = store.size(key)
+    headers = {
+        "Accept-Ranges": "bytes",
+        "Content-Disposition": f'inline; filename="resume{os.path.splitext(key)[1]}"'
+    }
+    
+    try:
+        byte_range = parse_range_header(range_header, size)
+    except ValueError:
+        raise HTTPException(
+            status_code=416,
+            detail="Requested range not satisfiable",
+            headers={"Content-Range": f"bytes */{size}"}
+        )
+    
+    # Stream from the store instead of loading the file into memory
+    if byte_range is None:
+        headers["Content-Length"] = str(size)
+        return StreamingResponse(store.iter_range(key), media_type=content_type_for(key), headers=headers)
+    
+    start, end = byte_range
+    headers["Content-Length"] = str(end - start + 1)
+    headers["Content-Range"] = f"bytes {start}-{end}/{size}"
+    return StreamingResponse(
+        store.iter_range(key, start, end),
+        status_code=206,
+        media_type=content_type_for(key),
+        headers=headers
+    )
+
 @app.post("/jobs/{job_id}/post")
-def post_job_to_boards(
+async def post_job_to_boards(
     job_id: str,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     user = Depends(get_current_user)
 ):
     try:
         # Get the job
-        from models import Job
-        job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
+        job = await get_user_job_async(db, job_id, user.id)
         if not job:
             raise HTTPException(status_code=404, detail="Job not found")
         
         # Post with Riley
-        postings = post_job_with_riley(db, job.id, job.title, job.job_description)
+        postings = await post_job_with_riley_async(db, job.id, job.title, job.job_description)
         
         # Update job status
-        job.status = "posted"
-        db.commit()
+        await mark_job_posted_async(db, job)
         
         return {
             "message": "Job posted successfully by Riley",
@@ -370,20 +947,31 @@ def post_job_to_boards(
         raise HTTPException(status_code=500, detail=f"Failed to post job: {str(e)}")
 
 @app.get("/jobs/{job_id}/stats")
-def get_posting_stats(
+async def get_posting_stats(
     job_id: str,
-    db: Session = Depends(get_db),
+    request: Request,
+    db: AsyncSession = Depends(get_read_db),
     user = Depends(get_current_user)
 ):
     try:
-        # Verify job belongs to user
-        from models import Job
-        job = db.query(Job).filter(Job.id == job_id, Job.user_id == user.id).first()
-        if not job:
+        # Verify job belongs to user - postings bump its version
+        version = await get_user_job_version_async(db, job_id, user.id)
+        if version is None:
             raise HTTPException(status_code=404, detail="Job not found")
         
-        stats = get_job_posting_stats(db, job_id)
-        return stats
+        etag = make_etag(request, user.id, version)
+        cached = not_modified(request, etag)
+        if cached:
+            return cached
+        
+        # The version is part of the key - a write seen by another worker is a miss here
+        cache_key = await response_cache.key(user.id, request, [job_tag(job_id)], version)
+        hit = await response_cache.get(cache_key)
+        if hit:
+            return cached_response(request, *hit)
+        
+        stats = await get_job_posting_stats_async(db, job_id)
+        return await cache_response(cache_key, etag, stats)
     except HTTPException:
         raise
     except Exception as e:
@@ -0,0 +1,88 @@
+"""
+Runs API scenarios for the tests against a throwaway SQLite database
+
+The app reads its settings (DATABASE_URL, BLOB_STORE_PATH, ...) when it is imported,
+so every scenario runs in a fresh interpreter with its own temporary directory. The
+agents answer with canned text - no API key or network needed.
+
+    def _scenario_upload():
+        with api_client() as (client, headers):
+            ...
+
+    def test_upload():
+        run_scenario(__name__, "_scenario_upload")
+"""
+from contextlib import contextmanager
+import os
+import subprocess
+import sys
+import tempfile
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+JOB_DESCRIPTION = """**Job Title**
+Backend Engineer
+
+**Required Qualifications**
+- Python
+- PostgreSQL
+
+**Nice to Have**
+- Kubernetes
+"""
+
+
+def run_scenario(module, function, **env):
+    """Run module.function() in a fresh interpreter against a new temporary database"""
+    with tempfile.TemporaryDirectory() as tmp:
+        scenario_env = {
+            **os.environ,
+            "DATABASE_URL": f"sqlite:///{os.path.join(tmp, 'thinkloop.db')}",
+            "BLOB_STORE_PATH": os.path.join(tmp, "blobs"),
+            "EMBEDDING_INDEX_PATH": os.path.join(tmp, "embeddings"),
+            "ANTHROPIC_API_KEY": "test",
+            "MIGRATE_ON_STARTUP": "true",
+            **env
+        }
+        for name in ("ASYNC_DATABASE_URL", "DATABASE_REPLICA_URLS", "RATE_LIMIT_DATABASE_URL"):
+            if name not in env:
+                scenario_env.pop(name, None)
+        code = f"import {module}; {module}.{function}()"
+        subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=scenario_env, check=True)
+
+
+def stub_agents(score=70):
+    """Canned Jamie, Morgan and Riley answers"""
+    import agents
+
+    async def create_job_description_async(self, user_input):
+        return JOB_DESCRIPTION
+
+    async def score_resume_async(self, resume_text, job_description):
+        return {"score": score, "analysis": f"SCORE: {score}\n\nRECOMMENDATION:\nGOOD MATCH", "candidate_id": "stub"}
+
+    def post_job(self, job_title, job_description, selected_boards=None):
+        return [{"board": board, "status": "posted", "job_url": f"https://jobs.example/{board}", "views": 0, "applications": 0}
+                for board in selected_boards or ["LinkedIn"]]
+
+    agents.JamieAgent.create_job_description_async = create_job_description_async
+    agents.MorganAgent.score_resume_async = score_resume_async
+    agents.RileyAgent.post_job = post_job
+
+
+def signup(client, email, password="testpass123"):
+    """Create a user, return its Authorization headers"""
+    response = client.post("/signup", json={"email": email, "password": password})
+    assert response.status_code == 200, response.text
+    return {"Authorization": f"Bearer {response.json()['token']}"}
+
+
+@contextmanager
+def api_client(score=70):
+    """A TestClient for the app (migrated, agents stubbed) and headers for a new user"""
+    stub_agents(score)
+    from fastapi.testclient import TestClient
+    import api
+
+    with TestClient(api.app) as client:
+        yield client, signup(client, "owner@thinkloop.test")
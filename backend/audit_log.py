@@ -0,0 +1,178 @@
+"""
+Buffered audit log - compliance records without a commit per action
+
+record() only puts a row on a bounded in-process queue. A background thread writes
+the queue out as one multi-row INSERT once AUDIT_BATCH_SIZE rows are waiting or
+AUDIT_FLUSH_INTERVAL seconds have passed, and once more on shutdown. If the database
+falls behind the queue absorbs the gap; when it is full new rows are dropped and
+counted (see /health/audit) rather than slowing requests down.
+
+Entries show up in GET /audit-logs after the next flush, not immediately.
+"""
+from datetime import datetime
+from sqlalchemy import select, insert, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import AuditLog, generate_uuid
+from pagination import decode_cursor, split_page
+import os
+import queue
+import threading
+import time
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))          # rows buffered before we start dropping
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))            # rows per INSERT
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))  # seconds a row can wait for a full batch
+AUDIT_RETRY_INTERVAL = float(os.getenv("AUDIT_RETRY_INTERVAL", "5.0"))  # back-off after a failed flush
+
+
+class AuditWriter:
+    """Bounded queue in front of a batching flusher thread"""
+
+    def __init__(self, engine=None, queue_size=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval=AUDIT_FLUSH_INTERVAL, retry_interval=AUDIT_RETRY_INTERVAL):
+        self.engine = engine
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.retry_interval = retry_interval
+        self._queue = queue.Queue(maxsize=queue_size)
+        self._batch = []                     # taken off the queue, not yet written
+        self._batch_ready = threading.Event()
+        self._stopping = threading.Event()
+        self._flush_lock = threading.Lock()
+        self._stats_lock = threading.Lock()
+        self._thread = None
+        self.written = 0
+        self.batches = 0
+        self.dropped = 0
+        self.failed_flushes = 0
+        self.last_error = None
+        self.flush_total = 0.0
+        self.flush_max = 0.0
+
+    def record(self, action: str, user_id: str = None, entity_type: str = None, entity_id: str = None):
+        """Queue an audit entry - never blocks, drops (and counts) it if the queue is full"""
+        if self._thread is None:
+            self._start()
+        row = {
+            "id": generate_uuid(),
+            "user_id": user_id,
+            "action": action,
+            "entity_type": entity_type,
+            "entity_id": entity_id,
+            "created_at": datetime.utcnow()
+        }
+        try:
+            self._queue.put_nowait(row)
+        except queue.Full:
+            with self._stats_lock:
+                self.dropped += 1
+            return
+        if self._queue.qsize() >= self.batch_size:
+            self._batch_ready.set()
+
+    def _start(self):
+        with _start_lock:
+            if self._thread is not None:
+                return
+            self._thread = threading.Thread(target=self._run, name="audit-log-flusher", daemon=True)
+            self._thread.start()
+
+    def _run(self):
+        while not self._stopping.is_set():
+            self._batch_ready.wait(self.flush_interval)
+            self._batch_ready.clear()
+            if not self.flush():
+                # The database is down or behind - rows wait in the queue until it recovers
+                self._stopping.wait(self.retry_interval)
+
+    def _write(self, rows):
+        started = time.perf_counter()
+        try:
+            engine = self.engine
+            if engine is None:
+                from database import engine
+            with engine.begin() as connection:
+                connection.execute(insert(AuditLog), rows)
+        except Exception as e:
+            with self._stats_lock:
+                self.failed_flushes += 1
+                self.last_error = str(e)
+            print(f"Audit log flush error: {e}")
+            return False
+        elapsed = time.perf_counter() - started
+        with self._stats_lock:
+            self.written += len(rows)
+            self.batches += 1
+            self.flush_total += elapsed
+            self.flush_max = max(self.flush_max, elapsed)
+        return True
+
+    def flush(self):
+        """Write everything queued so far, returns False if the database refused it"""
+        with self._flush_lock:
+            while True:
+                while len(self._batch) < self.batch_size:
+                    try:
+                        self._batch.append(self._queue.get_nowait())
+                    except queue.Empty:
+                        break
+                if not self._batch:
+                    return True
+                if not self._write(self._batch):
+                    return False
+                self._batch = []
+
+    def shutdown(self, timeout=5.0):
+        """Stop the flusher and write what's left"""
+        self._stopping.set()
+        self._batch_ready.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+        if not self.flush():
+            lost = len(self._batch) + self._queue.qsize()
+            print(f"Audit log: {lost} entries not written at shutdown")
+
+    def stats(self):
+        with self._stats_lock:
+            return {
+                "queued": self._queue.qsize() + len(self._batch),
+                "capacity": self._queue.maxsize,
+                "written": self.written,
+                "batches": self.batches,
+                "dropped": self.dropped,
+                "failed_flushes": self.failed_flushes,
+                "last_error": self.last_error,
+                "flush_avg_ms": round(self.flush_total / (self.batches or 1) * 1000, 3),
+                "flush_max_ms": round(self.flush_max * 1000, 3)
+            }
+
+
+_start_lock = threading.Lock()
+
+audit_log = AuditWriter()
+
+
+def _audit_page_stmt(user_id: str, limit: int, cursor: str = None, action: str = None):
+    # Served by ix_audit_logs_user_id_created_at
+    stmt = select(AuditLog).where(AuditLog.user_id == user_id)
+    if action:
+        stmt = stmt.where(AuditLog.action == action)
+    if cursor:
+        created_at, entry_id = decode_cursor(cursor, datetime, str)
+        stmt = stmt.where(tuple_(AuditLog.created_at, AuditLog.id) < tuple_(created_at, entry_id))
+    return stmt.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit + 1)
+
+
+def _audit_cursor_key(entry):
+    return entry.created_at, entry.id
+
+
+async def get_user_audit_page_async(db: AsyncSession, user_id: str, limit: int, cursor: str = None, action: str = None):
+    """
+    One page of the user's audit entries, newest first
+
+    Returns (entries, next_cursor) - next_cursor is None on the last page.
+    Raises ValueError for an invalid cursor.
+    """
+    stmt = _audit_page_stmt(user_id, limit, cursor, action)
+    return split_page((await db.scalars(stmt)).all(), limit, _audit_cursor_key)
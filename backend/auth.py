@@ -3,8 +3,9 @@ from jose import JWTError, jwt
 from datetime import datetime, timedelta
 import os
 
-# Password hashing
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+# Password hashing - raising BCRYPT_ROUNDS upgrades existing hashes on next login
+BCRYPT_ROUNDS = int(os.getenv("BCRYPT_ROUNDS", "12"))
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=BCRYPT_ROUNDS)
 
 # JWT settings
 SECRET_KEY = os.getenv("SECRET_KEY", "your-secret-key-change-this-in-production")
@@ -19,6 +20,10 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
     """Verify a password against hash"""
     return pwd_context.verify(plain_password, hashed_password)
 
+def verify_and_update(plain_password: str, hashed_password: str):
+    """Verify a password, returns (valid, new_hash) - new_hash is None unless the cost changed"""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
 def create_access_token(data: dict):
     """Create JWT token"""
     to_encode = data.copy()
@@ -27,6 +32,14 @@ def create_access_token(data: dict):
     encoded_jwt = jwt.encode(to_encode, SECRET_KEY, algorithm=ALGORITHM)
     return encoded_jwt
 
+def create_user_token(user):
+    """Token for a user - the subject is the stable user id, not the email"""
+    return create_access_token({"sub": user.id})
+
+def is_legacy_subject(subject: str) -> bool:
+    """Tokens issued before the switch to user ids carry the email as subject"""
+    return "@" in subject
+
 def verify_token(token: str):
     """Verify JWT token"""
     try:
@@ -0,0 +1,221 @@
+"""
+Storage and latency benchmark for the compressed text columns (migration 0007)
+
+Storage: total bytes of resumes, analyses and job descriptions stored raw, with plain
+zlib, with the built-in dictionary and with a dictionary trained on the first half of
+the corpus (measured on the second half), plus the SQLite file size of the same
+candidates stored as Text vs CompressedText.
+
+Latency: compress/decompress per value, and a 50-row page of candidates loaded the
+way the list endpoint does it (load_only, no text columns) vs with every column.
+
+The synthetic corpus only approximates real resumes - point --database-url at a copy
+of production data for numbers worth quoting.
+
+Usage:
+    python bench_compression.py
+    python bench_compression.py --documents 5000
+    python bench_compression.py --database-url postgresql+psycopg://localhost/thinkloop_copy
+"""
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("ANTHROPIC_API_KEY", "bench")
+
+from datetime import datetime
+import argparse
+import random
+import statistics
+import tempfile
+import uuid
+
+from sqlalchemy import Column, MetaData, String, Table, Text, create_engine, select
+from sqlalchemy.orm import Session, load_only
+
+from bench_helpers import measure
+from candidate_service import LIST_COLUMNS
+from compressed_text import compress, decompress, dictionaries, dictionary_id, train_dictionary, BUILTIN_DICTIONARY
+from models import Candidate, Job, User
+from skill_matrix import VOCABULARY
+
+PAGE_SIZE = 50
+
+# Synthetic corpus
+
+FIRST_NAMES = ["Alex", "Jordan", "Sam", "Taylor", "Morgan", "Riley", "Casey", "Jamie", "Avery", "Quinn"]
+LAST_NAMES = ["Garcia", "Smith", "Nguyen", "Patel", "Kim", "Johnson", "Okafor", "Müller", "Rossi", "Haddad"]
+TITLES = ["Software Engineer", "Senior Software Engineer", "Data Engineer", "Product Manager", "DevOps Engineer",
+          "Data Scientist", "Frontend Developer", "Engineering Manager", "QA Engineer", "Solutions Architect"]
+COMPANIES = ["Acme Corp", "Globex", "Initech", "Umbrella Health", "Stark Industries", "Hooli", "Wayne Fintech"]
+VERBS = ["Built", "Led", "Designed and implemented", "Migrated", "Reduced", "Improved", "Owned", "Automated", "Scaled"]
+OBJECTS = ["the payments platform", "a data pipeline processing 2TB/day", "CI/CD for 40 services",
+           "the customer onboarding flow", "our search infrastructure", "an internal analytics dashboard",
+           "the mobile app release process", "on-call tooling and alerting"]
+OUTCOMES = ["cutting latency by {n}%", "saving ${n}k a year", "for {n}M monthly users", "with {n}% fewer incidents",
+            "ahead of schedule", "across {n} teams"]
+
+
+def _bullet(rng):
+    outcome = rng.choice(OUTCOMES).format(n=rng.randint(2, 90))
+    return f"- {rng.choice(VERBS)} {rng.choice(OBJECTS)} using {', '.join(rng.sample(VOCABULARY, 3))}, {outcome}"
+
+
+def synthetic_resume(rng):
+    lines = [f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}", rng.choice(TITLES),
+             f"{uuid.UUID(int=rng.getrandbits(128)).hex[:8]}@example.com | (555) {rng.randint(100, 999)}-{rng.randint(1000, 9999)}",
+             "", "PROFESSIONAL SUMMARY", f"{rng.randint(2, 15)} years building software with {', '.join(rng.sample(VOCABULARY, 4))}.",
+             "", "EXPERIENCE:"]
+    for _ in range(rng.randint(2, 4)):
+        start = rng.randint(2008, 2022)
+        lines += [f"{rng.choice(TITLES)} - {rng.choice(COMPANIES)} ({start}-{min(start + rng.randint(1, 5), 2025)})"]
+        lines += [_bullet(rng) for _ in range(rng.randint(3, 6))]
+    lines += ["", "EDUCATION:", "Bachelor of Science in Computer Science, State University", "",
+              "SKILLS:", ", ".join(rng.sample(VOCABULARY, rng.randint(6, 14)))]
+    return "\n".join(lines)
+
+
+def synthetic_analysis(rng):
+    score = rng.randint(20, 95)
+    recommendation = "STRONG MATCH" if score >= 85 else "GOOD MATCH" if score >= 70 else "WEAK MATCH" if score >= 50 else "REJECT"
+    return "\n".join([
+        f"SCORE: {score}", "", "MATCH ANALYSIS:",
+        f"- Skills Match: {rng.randint(30, 100)}% - strong on {', '.join(rng.sample(VOCABULARY, 3))}",
+        f"- Experience Match: {rng.randint(1, 15)} years, relevant to the role",
+        "- Domain Match: Good fit for the industry", "- Education Match: Relevant degree", "",
+        "STRENGTHS:", *[_bullet(rng) for _ in range(3)], "",
+        "WEAKNESSES/GAPS:", f"- No experience with {rng.choice(VOCABULARY)}", f"- Limited {rng.choice(VOCABULARY)} exposure", "",
+        "RED FLAGS:", "- NONE", "", "RECOMMENDATION:", recommendation, "",
+        "RECRUITER NOTE:", "Solid candidate for the role, worth a conversation about scope and seniority.",
+    ])
+
+
+def synthetic_job(rng):
+    return "\n".join([
+        f"**Job Title**\n{rng.choice(TITLES)}", "",
+        f"**Role Summary**\nJoin {rng.choice(COMPANIES)} to work on {rng.choice(OBJECTS)}.", "",
+        "**Key Responsibilities**", *[_bullet(rng) for _ in range(5)], "",
+        "**Required Qualifications**", *[f"- {rng.randint(2, 8)}+ years of {skill}" for skill in rng.sample(VOCABULARY, 4)], "",
+        "**Nice to Have**", *[f"- Experience with {skill}" for skill in rng.sample(VOCABULARY, 3)], "",
+        "**Work Location**\nRemote",
+    ])
+
+
+def synthetic_corpus(documents, seed=1234):
+    rng = random.Random(seed)
+    return {
+        "resume_text": [synthetic_resume(rng) for _ in range(documents)],
+        "analysis": [synthetic_analysis(rng) for _ in range(documents)],
+        "job_description": [synthetic_job(rng) for _ in range(max(1, documents // 20))],
+    }
+
+
+def database_corpus(url, documents):
+    engine = create_engine(url)
+    with Session(engine) as db:
+        candidates = db.execute(select(Candidate.resume_text, Candidate.analysis).limit(documents)).all()
+        jobs = db.scalars(select(Job.job_description).limit(max(1, documents // 20))).all()
+    engine.dispose()
+    return {
+        "resume_text": [c.resume_text for c in candidates],
+        "analysis": [c.analysis for c in candidates if c.analysis],
+        "job_description": list(jobs),
+    }
+
+
+# Storage
+
+def storage_report(corpus):
+    print(f"{'column':<18}{'docs':>7}{'raw KB':>10}{'zlib':>9}{'builtin':>9}{'trained':>9}{'compress us':>13}{'decompress us':>15}")
+    for column, texts in corpus.items():
+        if len(texts) < 2:
+            continue
+        train, test = texts[:len(texts) // 2], texts[len(texts) // 2:]
+        trained_id = dictionaries.register(train_dictionary(train))
+        raw = sum(len(t.encode()) for t in test)
+        sizes = {name: sum(len(compress(t, dict_id)) for t in test)
+                 for name, dict_id in (("zlib", 0), ("builtin", dictionary_id(BUILTIN_DICTIONARY)), ("trained", trained_id))}
+
+        sample = test[len(test) // 2]
+        packed = compress(sample, trained_id)
+        compress_us = measure(lambda: compress(sample, trained_id), 5, 1, 0.05)["median_us"]
+        decompress_us = measure(lambda: decompress(packed), 5, 1, 0.05)["median_us"]
+        ratios = "".join(f"{raw / size:>8.2f}x" for size in sizes.values())
+        print(f"{column:<18}{len(test):>7}{raw / 1024:>10.1f}{ratios}{compress_us:>13.1f}{decompress_us:>15.1f}")
+
+
+def sqlite_size_report(corpus, candidates):
+    """Same candidates in a SQLite file as plain Text and as CompressedText"""
+    resumes, analyses = corpus["resume_text"], corpus["analysis"]
+    rows = [{"id": str(uuid.uuid4()), "job_id": "job", "full_name": "Candidate", "email": "c@example.com",
+             "resume_text": resumes[i % len(resumes)], "analysis": analyses[i % len(analyses)]}
+            for i in range(candidates)]
+    plain_candidates = Table("candidates", MetaData(), Column("id", String, primary_key=True), Column("job_id", String),
+                             Column("full_name", String), Column("email", String),
+                             Column("resume_text", Text), Column("analysis", Text))
+    compressed_candidates = Table("candidates", MetaData(), Column("id", String, primary_key=True), Column("job_id", String),
+                                  Column("full_name", String), Column("email", String),
+                                  Column("resume_text", Candidate.resume_text.type), Column("analysis", Candidate.analysis.type))
+
+    sizes = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for name, table in (("text", plain_candidates), ("compressed", compressed_candidates)):
+            path = os.path.join(tmp, f"{name}.db")
+            engine = create_engine(f"sqlite:///{path}")
+            table.create(engine)
+            with engine.begin() as connection:
+                connection.execute(table.insert(), rows)
+            engine.dispose()
+            sizes[name] = os.path.getsize(path)
+    print(f"\nSQLite file, {candidates} candidates: text {sizes['text'] / 1024 / 1024:.1f} MB, "
+          f"compressed {sizes['compressed'] / 1024 / 1024:.1f} MB ({sizes['text'] / sizes['compressed']:.2f}x smaller)")
+
+
+# Page latency
+
+def page_latency_report(corpus, candidates):
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = create_engine(f"sqlite:///{os.path.join(tmp, 'bench.db')}")
+        for table in (User.__table__, Job.__table__, Candidate.__table__):
+            table.create(engine)
+        resumes, analyses = corpus["resume_text"], corpus["analysis"]
+        with engine.begin() as connection:
+            connection.execute(User.__table__.insert(), [{"id": "user", "email": "u@example.com", "hashed_password": "x"}])
+            connection.execute(Job.__table__.insert(), [{"id": "job", "user_id": "user", "title": "Engineer",
+                                                         "job_description": corpus["job_description"][0], "version": 0}])
+            connection.execute(Candidate.__table__.insert(), [
+                {"id": str(uuid.uuid4()), "job_id": "job", "full_name": "Candidate", "email": "c@example.com",
+                 "resume_text": resumes[i % len(resumes)], "analysis": analyses[i % len(analyses)],
+                 "score": i % 100, "status": "screened", "applied_at": datetime.utcnow()}
+                for i in range(candidates)
+            ])
+
+        page = select(Candidate).where(Candidate.job_id == "job").order_by(Candidate.score.desc(), Candidate.id.desc()).limit(PAGE_SIZE)
+        with Session(engine) as db:
+            def load(stmt):
+                db.scalars(stmt).all()
+                db.expunge_all()
+            list_us = measure(lambda: load(page.options(load_only(*LIST_COLUMNS))), 7, 2, 0.1)["median_us"]
+            full_us = measure(lambda: load(page), 7, 2, 0.1)["median_us"]
+        engine.dispose()
+    print(f"\n{PAGE_SIZE}-candidate page: list columns {list_us / 1000:.2f} ms, "
+          f"every column (decompressing resume + analysis) {full_us / 1000:.2f} ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000, help="resumes and analyses in the corpus")
+    parser.add_argument("--candidates", type=int, default=20000, help="rows for the SQLite size and page tests")
+    parser.add_argument("--database-url", help="read the corpus from this database instead of generating one")
+    args = parser.parse_args()
+
+    corpus = database_corpus(args.database_url, args.documents) if args.database_url else synthetic_corpus(args.documents)
+    average = statistics.mean(len(t.encode()) for t in corpus["resume_text"])
+    print(f"Corpus: {len(corpus['resume_text'])} resumes (avg {average:.0f} bytes), "
+          f"{len(corpus['analysis'])} analyses, {len(corpus['job_description'])} job descriptions\n")
+    storage_report(corpus)
+    sqlite_size_report(corpus, args.candidates)
+    page_latency_report(corpus, args.candidates)
+
+
+if __name__ == "__main__":
+    main()
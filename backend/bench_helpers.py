@@ -0,0 +1,263 @@
+"""
+Microbenchmarks for the CPU-bound helpers on the request path
+
+Covers RateLimiter.__call__ on a 10k-client store, resume text extraction from
+generated PDFs and DOCXs, Morgan's SCORE: parsing, extract_recommendation,
+Alex's JSON fence extraction, JWT encode/decode and the skill-matrix pre-rank. Each case comes in small,
+large and pathological flavours where that makes sense.
+
+Every case is calibrated to run for at least --min-time per repeat, then timed
+--repeat times after --warmup untimed repeats with the GC off; the median per-call
+time is what gets saved and compared. With --compare, cases slower than the
+baseline by more than --threshold percent are flagged and the exit status is 1.
+
+Usage:
+    python bench_helpers.py
+    python bench_helpers.py --filter parse_pdf --repeat 9
+    python bench_helpers.py --output before.json
+    python bench_helpers.py --compare before.json --threshold 10
+"""
+import os
+
+# The helpers never touch the database or the API, but importing them builds clients
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("ANTHROPIC_API_KEY", "bench")
+
+from datetime import datetime, timezone
+from types import SimpleNamespace
+import argparse
+import gc
+import io
+import json
+import math
+import platform
+import random
+import statistics
+import sys
+import time
+
+import docx
+from fastapi import HTTPException
+
+from agents import MorganAgent
+from alex_agent import extract_json_block
+from auth import create_access_token, verify_token
+from bench_load import resume_pdf, RESUME_LINES
+from candidate_service import extract_recommendation
+from rate_limiter import RateLimiter, InMemoryRateLimitStore
+from resume_parser import parse_resume_file
+from skill_matrix import candidate_matrix, job_skill_vector, rank_scores, priority_order
+
+
+# Fixtures
+
+def resume_docx(paragraphs):
+    doc = docx.Document()
+    for text in paragraphs:
+        doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def morgan_reply(filler_lines=0, score=True):
+    lines = ["SCORE: 82"] if score else []
+    lines += ["", "MATCH ANALYSIS:", "- Skills Match: 85% - Python, FastAPI, PostgreSQL"]
+    lines += [f"- Detail {i}: relevant experience with distributed systems" for i in range(filler_lines)]
+    lines += ["", "RECOMMENDATION:", "GOOD MATCH - consider for interview", "", "RECRUITER NOTE:", "Worth a call."]
+    return "\n".join(lines)
+
+
+def alex_reply(questions, fence="```json"):
+    payload = json.dumps([
+        {"question": f"Question {i}?", "type": "technical", "looking_for": "specifics", "red_flags": "vagueness"}
+        for i in range(questions)
+    ], indent=2)
+    if fence is None:
+        return payload
+    return f"Here are the questions:\n\n{fence}\n{payload}\n```\n\nLet me know if you need more."
+
+
+def fake_request(ip, path="/login"):
+    return SimpleNamespace(client=SimpleNamespace(host=ip), url=SimpleNamespace(path=path))
+
+
+def limiter_case(clients, over_limit=False):
+    store = InMemoryRateLimitStore()
+    limiter = RateLimiter(max_calls=1 if over_limit else 10**9, window_seconds=3600, store=store)
+    requests = [fake_request(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}") for i in range(clients)]
+    for request in requests:
+        limiter(request)
+    order = [random.choice(requests) for _ in range(4096)]
+    position = iter(range(10**18))
+
+    def call():
+        try:
+            limiter(order[next(position) & 4095])
+        except HTTPException:
+            pass
+    return call
+
+
+def build_cases():
+    """name -> zero-argument callable, fixtures are built once up front"""
+    random.seed(1234)
+    morgan = MorganAgent()
+    cases = {}
+
+    cases["rate_limiter/10k_clients_allowed"] = limiter_case(10_000)
+    cases["rate_limiter/10k_clients_rejected"] = limiter_case(10_000, over_limit=True)
+
+    pdfs = {
+        "small": resume_pdf(),
+        "large": resume_pdf(RESUME_LINES * 10, pages=50),
+        "pathological": resume_pdf([f"w{i}" for i in range(20_000)]),   # one page, 20k text runs
+    }
+    for size, pdf in pdfs.items():
+        cases[f"parse_pdf/{size}"] = lambda pdf=pdf: parse_resume_file("resume.pdf", pdf)
+
+    docxs = {
+        "small": resume_docx(RESUME_LINES),
+        "large": resume_docx(RESUME_LINES * 500),
+        "pathological": resume_docx(["x" * 500_000]),                   # one huge paragraph
+    }
+    for size, document in docxs.items():
+        cases[f"parse_docx/{size}"] = lambda document=document: parse_resume_file("resume.docx", document)
+
+    replies = {
+        "small": morgan_reply(),
+        "large": morgan_reply(filler_lines=500),
+        "pathological": morgan_reply(filler_lines=20_000, score=False),   # no SCORE: line at all
+    }
+    for size, reply in replies.items():
+        cases[f"morgan_score/{size}"] = lambda reply=reply: morgan._parse_score(reply, "resume")
+        cases[f"extract_recommendation/{size}"] = lambda reply=reply: extract_recommendation(reply)
+
+    fenced = {
+        "small_json_fence": alex_reply(5),
+        "small_plain_fence": alex_reply(5, fence="```"),
+        "small_bare": alex_reply(5, fence=None),
+        "large_json_fence": alex_reply(2_000),
+        "pathological_unclosed": "```json\n" + "x" * 500_000,
+    }
+    for name, reply in fenced.items():
+        cases[f"alex_json/{name}"] = lambda reply=reply: extract_json_block(reply)
+
+    token = create_access_token({"sub": "7c9e6679-7425-40de-944b-e07fc1f90ae7"})
+    cases["jwt/encode"] = lambda: create_access_token({"sub": "7c9e6679-7425-40de-944b-e07fc1f90ae7"})
+    cases["jwt/decode"] = lambda: verify_token(token)
+    cases["jwt/decode_invalid"] = lambda: verify_token(token[:-4] + "AAAA")
+
+    # A 500-resume backlog: building the matrix is the regex pass, ranking is the matvec
+    backlog = ["\n".join(random.sample(RESUME_LINES, len(RESUME_LINES) // 2)) for _ in range(500)]
+    job_description = "\n".join(RESUME_LINES)
+    matrix, weights = candidate_matrix(backlog), job_skill_vector(job_description)
+    cases["skill_rank/matrix_500"] = lambda: candidate_matrix(backlog)
+    cases["skill_rank/matvec_500"] = lambda: rank_scores(matrix, weights)
+    cases["skill_rank/queue_500"] = lambda: priority_order(backlog, job_description)
+    return cases
+
+
+# Runner
+
+def calibrate(fn, min_time):
+    """Loops per repeat so that one repeat takes at least min_time seconds"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            fn()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time:
+            return loops
+        if elapsed < min_time / 10:
+            loops *= 10
+        else:
+            loops = math.ceil(loops * min_time / elapsed * 1.1)
+
+
+def measure(fn, repeat, warmup, min_time):
+    loops = calibrate(fn, min_time)
+    timings = []
+    gc_was_enabled = gc.isenabled()
+    gc.disable()
+    try:
+        for i in range(warmup + repeat):
+            start = time.perf_counter()
+            for _ in range(loops):
+                fn()
+            elapsed = time.perf_counter() - start
+            if i >= warmup:
+                timings.append(elapsed / loops)
+    finally:
+        if gc_was_enabled:
+            gc.enable()
+    return {
+        "loops": loops,
+        "median_us": round(statistics.median(timings) * 1e6, 3),
+        "min_us": round(min(timings) * 1e6, 3),
+        "stdev_us": round(statistics.stdev(timings) * 1e6, 3) if len(timings) > 1 else 0.0,
+    }
+
+
+def compare(results, baseline, threshold):
+    """Print changes against an earlier run, returns the regressed case names"""
+    regressions = []
+    print(f"\n{'case':<44}{'before us':>12}{'after us':>12}{'change':>9}")
+    for name, result in results.items():
+        before = baseline["results"].get(name)
+        if before is None:
+            print(f"{name:<44}{'-':>12}{result['median_us']:>12.2f}{'new':>9}")
+            continue
+        change = (result["median_us"] / before["median_us"] - 1) * 100 if before["median_us"] else 0.0
+        flag = ""
+        if change > threshold:
+            regressions.append(name)
+            flag = "  REGRESSION"
+        print(f"{name:<44}{before['median_us']:>12.2f}{result['median_us']:>12.2f}{change:>+8.1f}%{flag}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--filter", help="only run cases whose name contains this")
+    parser.add_argument("--repeat", type=int, default=7)
+    parser.add_argument("--warmup", type=int, default=2)
+    parser.add_argument("--min-time", type=float, default=0.1, help="seconds per repeat")
+    parser.add_argument("--output", help="save results as JSON")
+    parser.add_argument("--compare", metavar="BASELINE_JSON")
+    parser.add_argument("--threshold", type=float, default=10.0, help="percent slowdown that counts as a regression")
+    args = parser.parse_args()
+
+    cases = build_cases()
+    if args.filter:
+        cases = {name: fn for name, fn in cases.items() if args.filter in name}
+
+    results = {}
+    print(f"{'case':<44}{'median us':>12}{'min us':>12}{'stdev':>10}{'loops':>9}")
+    for name, fn in cases.items():
+        result = results[name] = measure(fn, args.repeat, args.warmup, args.min_time)
+        print(f"{name:<44}{result['median_us']:>12.2f}{result['min_us']:>12.2f}"
+              f"{result['stdev_us']:>10.2f}{result['loops']:>9}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump({
+                "started_at": datetime.now(timezone.utc).isoformat(),
+                "python": sys.version.split()[0],
+                "machine": platform.machine(),
+                "settings": {"repeat": args.repeat, "warmup": args.warmup, "min_time": args.min_time},
+                "results": results,
+            }, f, indent=2)
+        print(f"\nSaved {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            regressions = compare(results, json.load(f), args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} regression(s) over {args.threshold:g}%")
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
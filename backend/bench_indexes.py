@@ -0,0 +1,126 @@
+"""
+Before/after benchmark for the hot-path indexes (migration 0002)
+
+Seeds a scratch database with N candidates spread over many jobs and users,
+then times get_job_candidates and get_user_jobs without and with the indexes.
+
+Usage:
+    python bench_indexes.py                          # 1M candidates in a temp SQLite file
+    python bench_indexes.py --candidates 200000
+    BENCH_DATABASE_URL=postgresql+psycopg2://localhost/thinkloop_bench python bench_indexes.py
+"""
+import argparse
+import os
+import random
+import statistics
+import tempfile
+import time
+import uuid
+from datetime import datetime, timedelta
+
+from sqlalchemy import Index
+from sqlalchemy.orm import sessionmaker
+
+from database import build_engine
+from models import Base, User, Job, Candidate
+from candidate_service import get_job_candidates
+from job_service import get_user_jobs
+
+HOT_PATH_INDEXES = ["ix_jobs_user_id_created_at", "ix_candidates_job_id_score"]
+
+
+def seed(engine, num_candidates, num_users, jobs_per_user):
+    now = datetime.utcnow()
+    users = [{"id": str(uuid.uuid4()), "email": f"bench{i}@thinkloop.com", "hashed_password": "x",
+              "plan": "free", "is_active": True, "created_at": now} for i in range(num_users)]
+    jobs = [{"id": str(uuid.uuid4()), "user_id": u["id"], "title": "Engineer", "job_description": "JD",
+             "requirements": "reqs", "status": "draft", "created_at": now - timedelta(minutes=random.randint(0, 100000)),
+             "updated_at": now} for u in users for _ in range(jobs_per_user)]
+
+    with engine.begin() as conn:
+        conn.execute(User.__table__.insert(), users)
+        conn.execute(Job.__table__.insert(), jobs)
+
+        batch = []
+        for i in range(num_candidates):
+            batch.append({"id": str(uuid.uuid4()), "job_id": random.choice(jobs)["id"], "full_name": f"Candidate {i}",
+                          "email": f"c{i}@example.com", "resume_text": "resume", "score": random.randint(0, 100),
+                          "analysis": "analysis", "recommendation": "GOOD MATCH", "status": "screened",
+                          "applied_at": now})
+            if len(batch) == 10000:
+                conn.execute(Candidate.__table__.insert(), batch)
+                batch = []
+        if batch:
+            conn.execute(Candidate.__table__.insert(), batch)
+
+    return users, jobs
+
+
+def time_queries(Session, users, jobs, samples):
+    job_ids = random.sample([j["id"] for j in jobs], min(samples, len(jobs)))
+    user_ids = random.sample([u["id"] for u in users], min(samples, len(users)))
+    results = {}
+
+    for name, fn, ids in [("get_job_candidates", get_job_candidates, job_ids),
+                          ("get_user_jobs", get_user_jobs, user_ids)]:
+        timings = []
+        for key in ids:
+            db = Session()
+            start = time.perf_counter()
+            fn(db, key)
+            timings.append((time.perf_counter() - start) * 1000)
+            db.close()
+        timings.sort()
+        results[name] = {
+            "p50_ms": round(statistics.median(timings), 3),
+            "p95_ms": round(timings[int(len(timings) * 0.95) - 1], 3),
+        }
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=1_000_000)
+    parser.add_argument("--users", type=int, default=1000)
+    parser.add_argument("--jobs-per-user", type=int, default=5)
+    parser.add_argument("--samples", type=int, default=200)
+    args = parser.parse_args()
+
+    url = os.getenv("BENCH_DATABASE_URL")
+    if not url:
+        url = "sqlite:///" + os.path.join(tempfile.mkdtemp(), "bench.db")
+    engine = build_engine(url, echo=False)
+    Session = sessionmaker(bind=engine)
+    random.seed(42)
+
+    indexes = [ix for table in Base.metadata.sorted_tables for ix in table.indexes if ix.name in HOT_PATH_INDEXES]
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    for ix in indexes:
+        ix.drop(engine)
+
+    print(f"Seeding {args.candidates:,} candidates into {engine.url.render_as_string(hide_password=True)}...")
+    start = time.perf_counter()
+    users, jobs = seed(engine, args.candidates, args.users, args.jobs_per_user)
+    print(f"Seeded in {time.perf_counter() - start:.1f}s ({len(jobs):,} jobs, {len(users):,} users)\n")
+
+    before = time_queries(Session, users, jobs, args.samples)
+    for ix in indexes:
+        ix.create(engine)
+    if engine.dialect.name == "postgresql":
+        with engine.begin() as conn:
+            conn.exec_driver_sql("ANALYZE")
+    after = time_queries(Session, users, jobs, args.samples)
+
+    print(f"{'query':<22}{'no index p50':>14}{'p95':>10}{'indexed p50':>14}{'p95':>10}{'speedup':>10}")
+    for name in before:
+        b, a = before[name], after[name]
+        speedup = b["p50_ms"] / a["p50_ms"] if a["p50_ms"] else float("inf")
+        print(f"{name:<22}{b['p50_ms']:>14}{b['p95_ms']:>10}{a['p50_ms']:>14}{a['p95_ms']:>10}{speedup:>9.1f}x")
+
+    engine.dispose()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,413 @@
+"""
+End-to-end load test for the API
+
+Starts the fake Messages API (fake_anthropic.py) and the app under uvicorn against a
+throwaway database, then drives a realistic mix of requests from simulated recruiters
+at a fixed concurrency. Each recruiter signs up and logs in from its own IP (sent as
+X-Forwarded-For, which uvicorn trusts from localhost) so the per-IP limits behave like
+production, creates a job, then loops over the weighted mix below.
+
+Reports throughput and p50/p95/p99 latency per route and saves them as JSON - pass an
+earlier result with --compare to see what moved.
+
+Usage:
+    python bench_load.py --concurrency 20 --duration 60
+    python bench_load.py --latency lognormal:2:0.7 --llm-rate-limit-rate 0.05 --output after.json --compare before.json
+    python bench_load.py --postgres postgresql://localhost/postgres --workers 4
+    python bench_load.py --api-url http://127.0.0.1:8000      # an app you started yourself
+
+--postgres creates a scratch database on that server and drops it afterwards.
+SQLite is the default and only sensible with a single worker.
+"""
+from datetime import datetime, timezone
+import argparse
+import asyncio
+import itertools
+import json
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+
+import httpx
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# action -> weight, tuned to what the dashboard does: mostly reads, a few LLM-backed writes
+DEFAULT_MIX = {
+    "list_candidates": 30,
+    "job_stats": 15,
+    "dashboard": 15,
+    "list_jobs": 10,
+    "get_job": 10,
+    "upload_pdf": 10,
+    "create_job": 5,
+    "login": 2,
+}
+
+# Lift the LLM quotas so they don't cap the run - pass --keep-quotas to test them too
+UNLIMITED_QUOTAS = {"free": {"minute": 10**12, "hour": 10**12, "month": 10**12}}
+
+RESUME_LINES = [
+    "Jordan Example - Senior Backend Engineer",
+    "7 years of Python, FastAPI and PostgreSQL",
+    "Led the migration of a payments platform to Kubernetes",
+    "BSc Computer Science",
+]
+
+
+def resume_pdf(lines=RESUME_LINES, pages=1):
+    """A PDF with real text on every page, small enough to build by hand"""
+    text = ("BT /F1 12 Tf 72 720 Td 16 TL " + " ".join(
+        "(" + line.replace("\\", "\\\\").replace("(", "\\(").replace(")", "\\)") + ") '" for line in lines
+    ) + " ET").encode()
+    # 1 catalog, 2 pages, 3 font, then a page and its content stream per page
+    kids = " ".join(f"{4 + 2 * i} 0 R" for i in range(pages)).encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, pages),
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    for i in range(pages):
+        objects.append(b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents %d 0 R "
+                       b"/Resources << /Font << /F1 3 0 R >> >> >>" % (5 + 2 * i))
+        objects.append(b"<< /Length %d >>\nstream\n%s\nendstream" % (len(text), text))
+    pdf = b"%PDF-1.4\n"
+    offsets = []
+    for number, body in enumerate(objects, 1):
+        offsets.append(len(pdf))
+        pdf += b"%d 0 obj\n%s\nendobj\n" % (number, body)
+    xref = len(pdf)
+    pdf += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    pdf += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    pdf += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return pdf
+
+
+def percentile(sorted_values, pct):
+    """Nearest-rank percentile of an already sorted list"""
+    if not sorted_values:
+        return None
+    rank = max(int(round(pct / 100 * len(sorted_values) + 0.5)) - 1, 0)
+    return sorted_values[min(rank, len(sorted_values) - 1)]
+
+
+class Recorder:
+    """Latencies and status codes per route"""
+
+    def __init__(self):
+        self.latencies = {}   # route -> [seconds]
+        self.statuses = {}    # route -> {status: count}
+
+    def record(self, route, status, seconds):
+        self.latencies.setdefault(route, []).append(seconds)
+        counts = self.statuses.setdefault(route, {})
+        counts[status] = counts.get(status, 0) + 1
+
+    def summary(self, elapsed):
+        routes = {}
+        for route in sorted(self.latencies):
+            values = sorted(self.latencies[route])
+            statuses = self.statuses[route]
+            routes[route] = {
+                "requests": len(values),
+                "errors": sum(n for status, n in statuses.items() if status == 0 or (status >= 400 and status != 429)),
+                "rate_limited": statuses.get(429, 0),
+                "throughput_rps": round(len(values) / elapsed, 2),
+                "p50_ms": round(percentile(values, 50) * 1000, 1),
+                "p95_ms": round(percentile(values, 95) * 1000, 1),
+                "p99_ms": round(percentile(values, 99) * 1000, 1),
+                "max_ms": round(values[-1] * 1000, 1),
+                "statuses": {str(status): n for status, n in sorted(statuses.items())},
+            }
+        everything = sorted(itertools.chain.from_iterable(self.latencies.values()))
+        total = {
+            "requests": len(everything),
+            "errors": sum(r["errors"] for r in routes.values()),
+            "rate_limited": sum(r["rate_limited"] for r in routes.values()),
+            "throughput_rps": round(len(everything) / elapsed, 2),
+            "p50_ms": round(percentile(everything, 50) * 1000, 1) if everything else None,
+            "p95_ms": round(percentile(everything, 95) * 1000, 1) if everything else None,
+            "p99_ms": round(percentile(everything, 99) * 1000, 1) if everything else None,
+        }
+        return total, routes
+
+
+class Recruiter:
+    """One simulated user with its own IP, token and jobs"""
+
+    def __init__(self, number, client, recorder, mix, pdf):
+        self.client = client
+        self.recorder = recorder
+        self.mix = mix
+        self.pdf = pdf
+        self.ip = f"10.{number >> 16 & 255}.{number >> 8 & 255}.{number & 255}"
+        self.email = f"load-{uuid.uuid4().hex[:12]}@example.com"
+        self.password = "load-test-password"
+        self.headers = {"X-Forwarded-For": self.ip}
+        self.job_ids = []
+
+    async def call(self, route, method, url, **kwargs):
+        start = time.perf_counter()
+        try:
+            response = await self.client.request(method, url, headers=self.headers, **kwargs)
+            status = response.status_code
+        except httpx.HTTPError:
+            response, status = None, 0
+        self.recorder.record(route, status, time.perf_counter() - start)
+        return response if status and status < 400 else None
+
+    async def sign_in(self):
+        response = await self.call("POST /signup", "POST", "/signup",
+                                   json={"email": self.email, "password": self.password, "full_name": "Load Test"})
+        if response is None:
+            return False
+        self.headers["Authorization"] = f"Bearer {response.json()['token']}"
+        await self.login()
+        return True
+
+    async def login(self):
+        response = await self.call("POST /login", "POST", "/login",
+                                   json={"email": self.email, "password": self.password})
+        if response is not None:
+            self.headers["Authorization"] = f"Bearer {response.json()['token']}"
+
+    async def create_job(self):
+        response = await self.call("POST /jobs", "POST", "/jobs",
+                                   json={"requirements": "Senior Python engineer, fintech, remote, $150k"})
+        if response is not None:
+            self.job_ids.append(response.json()["job"]["id"])
+
+    async def upload_pdf(self):
+        await self.call("POST /candidates/upload", "POST", "/candidates/upload",
+                        data={"job_id": random.choice(self.job_ids), "candidate_name": "Jordan Example",
+                              "candidate_email": f"{uuid.uuid4().hex[:8]}@example.com"},
+                        files={"resume_file": ("resume.pdf", self.pdf, "application/pdf")})
+
+    async def list_candidates(self):
+        await self.call("GET /jobs/{job_id}/candidates", "GET", f"/jobs/{random.choice(self.job_ids)}/candidates")
+
+    async def job_stats(self):
+        await self.call("GET /jobs/{job_id}/stats", "GET", f"/jobs/{random.choice(self.job_ids)}/stats")
+
+    async def get_job(self):
+        await self.call("GET /jobs/{job_id}", "GET", f"/jobs/{random.choice(self.job_ids)}")
+
+    async def list_jobs(self):
+        await self.call("GET /jobs", "GET", "/jobs")
+
+    async def dashboard(self):
+        await self.call("GET /dashboard", "GET", "/dashboard")
+
+    async def run(self, deadline):
+        if not await self.sign_in():
+            return
+        await self.create_job()
+        actions, weights = zip(*self.mix.items())
+        while time.monotonic() < deadline:
+            action = random.choices(actions, weights)[0]
+            if not self.job_ids and action not in ("create_job", "login", "list_jobs", "dashboard"):
+                action = "create_job"
+            await getattr(self, action)()
+
+
+async def drive(api_url, concurrency, duration, mix, timeout):
+    recorder = Recorder()
+    pdf = resume_pdf()
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=api_url, timeout=timeout, limits=limits) as client:
+        started = time.monotonic()
+        deadline = started + duration
+        numbers = itertools.count(random.randrange(1, 1 << 20))
+        recruiters = [Recruiter(next(numbers), client, recorder, mix, pdf) for _ in range(concurrency)]
+        await asyncio.gather(*(recruiter.run(deadline) for recruiter in recruiters))
+        elapsed = time.monotonic() - started
+    return recorder, elapsed
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_up(url, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(url, timeout=2).status_code < 500:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError(f"{url} did not come up within {timeout}s")
+
+
+def create_scratch_database(server_url):
+    from sqlalchemy import create_engine, text
+    from sqlalchemy.engine import make_url
+    name = f"thinkloop_bench_{uuid.uuid4().hex[:8]}"
+    engine = create_engine(server_url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    engine.dispose()
+    return make_url(server_url).set(database=name).render_as_string(hide_password=False), name
+
+
+def drop_scratch_database(server_url, name):
+    from sqlalchemy import create_engine, text
+    engine = create_engine(server_url, isolation_level="AUTOCOMMIT")
+    with engine.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+    engine.dispose()
+
+
+def compare(result, baseline):
+    """Print throughput and p95 changes against an earlier run"""
+    print(f"\nvs {baseline.get('started_at', 'baseline')}")
+    print(f"{'route':<34}{'rps':>10}{'Δ':>9}{'p95 ms':>10}{'Δ':>9}")
+    rows = [("total", result["total"], baseline["total"])]
+    rows += [(route, stats, baseline["routes"][route])
+             for route, stats in result["routes"].items() if route in baseline["routes"]]
+    for route, now, before in rows:
+        rps_change = (now["throughput_rps"] / before["throughput_rps"] - 1) * 100 if before["throughput_rps"] else 0
+        p95_change = (now["p95_ms"] / before["p95_ms"] - 1) * 100 if before["p95_ms"] else 0
+        print(f"{route:<34}{now['throughput_rps']:>10.2f}{rps_change:>+8.1f}%{now['p95_ms']:>10.1f}{p95_change:>+8.1f}%")
+
+
+def report(result):
+    print(f"\n{'route':<34}{'reqs':>7}{'err':>6}{'429':>6}{'rps':>9}{'p50':>9}{'p95':>9}{'p99':>9}")
+    for route, stats in [*result["routes"].items(), ("total", result["total"])]:
+        print(f"{route:<34}{stats['requests']:>7}{stats['errors']:>6}{stats['rate_limited']:>6}"
+              f"{stats['throughput_rps']:>9.2f}{stats['p50_ms']:>9}{stats['p95_ms']:>9}{stats['p99_ms']:>9}")
+    if result.get("llm"):
+        print(f"\nfake LLM: {result['llm']}")
+
+
+def parse_mix(values):
+    mix = dict(DEFAULT_MIX)
+    for value in values or []:
+        action, _, weight = value.partition("=")
+        if action not in DEFAULT_MIX:
+            raise SystemExit(f"Unknown action {action!r}, expected one of {', '.join(DEFAULT_MIX)}")
+        mix[action] = float(weight)
+    return {action: weight for action, weight in mix.items() if weight > 0}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, default=20, help="simulated recruiters")
+    parser.add_argument("--duration", type=float, default=60, help="seconds")
+    parser.add_argument("--mix", nargs="*", metavar="ACTION=WEIGHT", help=f"override weights of {', '.join(DEFAULT_MIX)}")
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers")
+    parser.add_argument("--database-url", help="run against this database instead of a temporary SQLite file")
+    parser.add_argument("--postgres", metavar="SERVER_URL", help="create a scratch database on this Postgres server")
+    parser.add_argument("--api-url", help="load an already running app instead of starting one")
+    parser.add_argument("--latency", default="lognormal:1.0:0.5", help="fake LLM latency, see fake_anthropic.py")
+    parser.add_argument("--llm-rate-limit-rate", type=float, default=0.0, help="fraction of LLM calls answered 429")
+    parser.add_argument("--keep-quotas", action="store_true", help="leave the per-user LLM quotas in place")
+    parser.add_argument("--timeout", type=float, default=120, help="per-request timeout in seconds")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--output", default="load_results.json")
+    parser.add_argument("--compare", metavar="BASELINE_JSON")
+    args = parser.parse_args()
+    random.seed(args.seed)
+    mix = parse_mix(args.mix)
+
+    processes = []
+    scratch = None
+    workdir = tempfile.mkdtemp(prefix="thinkloop-load-")
+    llm_url = None
+    database_label = "external"
+    try:
+        api_url = args.api_url
+        if api_url is None:
+            llm_port = free_port()
+            llm_url = f"http://127.0.0.1:{llm_port}"
+            processes.append(subprocess.Popen(
+                [sys.executable, "fake_anthropic.py", "--port", str(llm_port), "--latency", args.latency,
+                 "--rate-limit-rate", str(args.llm_rate_limit_rate)],
+                cwd=BACKEND_DIR
+            ))
+            wait_until_up(f"{llm_url}/stats")
+
+            database_url = args.database_url
+            if args.postgres:
+                database_url, scratch = create_scratch_database(args.postgres)
+            elif database_url is None:
+                database_url = f"sqlite:///{workdir}/load.db"
+            database_label = database_url.split(":", 1)[0]
+
+            env = {
+                **os.environ,
+                "DATABASE_URL": database_url,
+                "ANTHROPIC_BASE_URL": llm_url,
+                "ANTHROPIC_API_KEY": "fake-key",
+                "BLOB_STORE_PATH": os.path.join(workdir, "blobs"),
+            }
+            env.pop("ASYNC_DATABASE_URL", None)
+            if not args.keep_quotas:
+                env["QUOTA_PLANS"] = json.dumps(UNLIMITED_QUOTAS)
+
+            # Same as the release phase in the Procfile
+            subprocess.run([sys.executable, "-m", "alembic", "upgrade", "head"], cwd=BACKEND_DIR, env=env, check=True)
+
+            api_port = free_port()
+            api_url = f"http://127.0.0.1:{api_port}"
+            processes.append(subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "api:app", "--port", str(api_port),
+                 "--workers", str(args.workers), "--log-level", "warning"],
+                cwd=BACKEND_DIR, env=env
+            ))
+            wait_until_up(f"{api_url}/health")
+
+        print(f"Load testing {api_url} with {args.concurrency} recruiters for {args.duration:.0f}s")
+        started_at = datetime.now(timezone.utc).isoformat()
+        recorder, elapsed = asyncio.run(drive(api_url, args.concurrency, args.duration, mix, args.timeout))
+        total, routes = recorder.summary(elapsed)
+
+        result = {
+            "started_at": started_at,
+            "config": {
+                "concurrency": args.concurrency,
+                "duration_s": args.duration,
+                "workers": args.workers,
+                "database": database_label,
+                "latency": args.latency,
+                "llm_rate_limit_rate": args.llm_rate_limit_rate,
+                "keep_quotas": args.keep_quotas,
+                "mix": mix,
+                "seed": args.seed,
+            },
+            "elapsed_s": round(elapsed, 2),
+            "total": total,
+            "routes": routes,
+            "llm": httpx.get(f"{llm_url}/stats").json() if llm_url else None,
+        }
+    finally:
+        for process in reversed(processes):
+            process.terminate()
+        for process in processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+        if scratch:
+            drop_scratch_database(args.postgres, scratch)
+
+    report(result)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nSaved {args.output}")
+
+    if args.compare:
+        with open(args.compare) as f:
+            compare(result, json.load(f))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""
+Microbenchmark for RateLimiter.__call__
+
+Fills the store with N distinct clients, then times calls spread across all of
+them. With the sliding-window counter the per-call cost should stay flat as N grows.
+
+Usage:
+    python bench_rate_limiter.py
+    python bench_rate_limiter.py --clients 100 10000 100000 --calls 200000
+"""
+import argparse
+import random
+import time
+from types import SimpleNamespace
+
+from rate_limiter import RateLimiter, InMemoryRateLimitStore
+
+
+def fake_request(ip, path="/candidates"):
+    return SimpleNamespace(client=SimpleNamespace(host=ip), url=SimpleNamespace(path=path))
+
+
+def bench(num_clients, num_calls):
+    store = InMemoryRateLimitStore()
+    # High limit so every call takes the full "allowed" path
+    limiter = RateLimiter(max_calls=10**9, window_seconds=3600, store=store)
+    requests = [fake_request(f"10.{i >> 16 & 255}.{i >> 8 & 255}.{i & 255}") for i in range(num_clients)]
+
+    for request in requests:
+        limiter(request)
+
+    order = [random.choice(requests) for _ in range(num_calls)]
+    start = time.perf_counter()
+    for request in order:
+        limiter(request)
+    elapsed = time.perf_counter() - start
+    return elapsed / num_calls * 1e9, store.size()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 1_000, 10_000, 100_000])
+    parser.add_argument("--calls", type=int, default=200_000)
+    args = parser.parse_args()
+    random.seed(42)
+
+    print(f"{'clients':>10}{'ns/call':>12}{'keys':>10}")
+    for num_clients in args.clients:
+        ns_per_call, keys = bench(num_clients, args.calls)
+        print(f"{num_clients:>10,}{ns_per_call:>12.0f}{keys:>10,}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,199 @@
+"""
+Content-addressed blob store for original resume files
+Blobs are keyed by the SHA-256 of their bytes, so uploading the same file twice stores it once
+"""
+from abc import ABC, abstractmethod
+import hashlib
+import os
+import re
+import tempfile
+import threading
+from dotenv import load_dotenv
+
+load_dotenv()
+
+BLOB_STORE_BACKEND = os.getenv("BLOB_STORE_BACKEND", "local")
+BLOB_STORE_PATH = os.getenv("BLOB_STORE_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "blobs"))
+
+CHUNK_SIZE = 64 * 1024
+URL_PREFIX = "blob://"
+
+
+class BlobStore(ABC):
+    """
+    Interface every blob backend implements
+
+    Keys look like "<sha256 hex><ext>", e.g. "9f86d0...a08.pdf". The extension is kept
+    so the original content type can be served back without an extra column.
+    """
+
+    @abstractmethod
+    def put(self, fileobj, ext=""):
+        """Store the contents of a binary file object, return its key"""
+
+    @abstractmethod
+    def exists(self, key):
+        """True if a blob with this key is stored"""
+
+    @abstractmethod
+    def size(self, key):
+        """Size of a blob in bytes"""
+
+    @abstractmethod
+    def iter_range(self, key, start=0, end=None, chunk_size=CHUNK_SIZE):
+        """Yield the bytes of a blob from start to end (inclusive) in chunks"""
+
+    @abstractmethod
+    def delete(self, key):
+        """Remove a blob, no error if it isn't there"""
+
+
+class LocalBlobStore(BlobStore):
+    """
+    Blob store on the local filesystem
+
+    Files are sharded two levels deep by hash prefix (ab/cd/abcd...) so no single
+    directory grows past a few thousand entries.
+    """
+
+    def __init__(self, root):
+        self.root = root
+        os.makedirs(self.root, exist_ok=True)
+
+    def _path(self, key):
+        if not key or "/" in key or "\\" in key or key.startswith("."):
+            raise ValueError(f"Invalid blob key: {key}")
+        return os.path.join(self.root, key[:2], key[2:4], key)
+
+    def put(self, fileobj, ext=""):
+        digest = hashlib.sha256()
+
+        # Stream into a temp file in the store root while hashing, so large
+        # files never have to be held in memory twice
+        fd, tmp_path = tempfile.mkstemp(dir=self.root, prefix=".upload-")
+        try:
+            with os.fdopen(fd, "wb") as tmp:
+                while True:
+                    chunk = fileobj.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    digest.update(chunk)
+                    tmp.write(chunk)
+
+            key = digest.hexdigest() + ext.lower()
+            path = self._path(key)
+
+            if os.path.exists(path):
+                # Deduplicated - identical content already stored
+                os.remove(tmp_path)
+            else:
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                os.replace(tmp_path, path)
+            return key
+        except Exception:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def exists(self, key):
+        return os.path.exists(self._path(key))
+
+    def size(self, key):
+        return os.path.getsize(self._path(key))
+
+    def iter_range(self, key, start=0, end=None, chunk_size=CHUNK_SIZE):
+        with open(self._path(key), "rb") as f:
+            if end is None:
+                end = os.fstat(f.fileno()).st_size - 1
+            f.seek(start)
+            remaining = end - start + 1
+            while remaining > 0:
+                chunk = f.read(min(chunk_size, remaining))
+                if not chunk:
+                    break
+                remaining -= len(chunk)
+                yield chunk
+
+    def delete(self, key):
+        path = self._path(key)
+        if os.path.exists(path):
+            os.remove(path)
+
+
+# Backends by name - add S3-style stores here
+BACKENDS = {
+    "local": lambda: LocalBlobStore(BLOB_STORE_PATH),
+}
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_blob_store():
+    """Return the configured blob store (created on first use)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                if BLOB_STORE_BACKEND not in BACKENDS:
+                    raise ValueError(f"Unknown blob store backend: {BLOB_STORE_BACKEND}")
+                _store = BACKENDS[BLOB_STORE_BACKEND]()
+    return _store
+
+
+CONTENT_TYPES = {
+    ".pdf": "application/pdf",
+    ".docx": "application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+    ".doc": "application/msword",
+}
+
+
+def content_type_for(key):
+    ext = os.path.splitext(key)[1].lower()
+    return CONTENT_TYPES.get(ext, "application/octet-stream")
+
+
+RANGE_RE = re.compile(r"bytes=(\d*)-(\d*)")
+
+
+def parse_range_header(range_header, size):
+    """
+    Parse a single-range "bytes=start-end" header
+
+    Returns (start, end) inclusive, None if there is no usable header - a
+    malformed Range is ignored and the full file served (RFC 9110 14.2).
+    Raises ValueError only for a valid range the file can't satisfy.
+    Multi-range requests are served as the full file.
+    """
+    match = RANGE_RE.fullmatch((range_header or "").strip())
+    if not match:
+        return None
+    start_str, end_str = match.groups()
+    if start_str == "":
+        if end_str == "":
+            return None
+        # Suffix range: last N bytes
+        length = int(end_str)
+        if length == 0 or size == 0:
+            raise ValueError(f"Range not satisfiable: {range_header}")
+        return max(size - length, 0), size - 1
+
+    start = int(start_str)
+    end = int(end_str) if end_str else None
+    if end is not None and end < start:
+        return None     # invalid range-spec
+    if start >= size:
+        raise ValueError(f"Range not satisfiable: {range_header}")
+    return start, size - 1 if end is None else min(end, size - 1)
+
+
+def blob_url(key):
+    """URL stored on Candidate.resume_file_url"""
+    return URL_PREFIX + key
+
+
+def blob_key(url):
+    """Inverse of blob_url, None if the url isn't one of ours"""
+    if url and url.startswith(URL_PREFIX):
+        return url[len(URL_PREFIX):]
+    return None
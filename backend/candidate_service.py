@@ -1,17 +1,66 @@
-from sqlalchemy.orm import Session
-from models import Candidate
+from sqlalchemy import select, tuple_, update, or_, and_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+from starlette.concurrency import run_in_threadpool
+from models import Candidate, Job
 from agents import MorganAgent
+from pagination import decode_cursor, split_page
+from database import release_connection
+from response_cache import response_cache, job_tag
+from embedding_index import candidate_index, job_index, index_candidate, embed
+from skill_matrix import prerank_score, priority_order
+from audit_log import audit_log
+from datetime import datetime, timedelta
+import asyncio
+import os
 import uuid
 
+# Columns the list endpoint returns - resume_text and analysis stay in the database
+LIST_COLUMNS = (
+    Candidate.id, Candidate.job_id, Candidate.full_name, Candidate.email, Candidate.score,
+    Candidate.recommendation, Candidate.status, Candidate.applied_at
+)
+
+# Stored but not yet scored by Morgan - their score is the skill pre-rank until then
+PENDING_STATUS = "new"
+# Claimed by a score-pending request that is waiting on Morgan
+SCORING_STATUS = "scoring"
+UNSCORED_STATUSES = (PENDING_STATUS, SCORING_STATUS)
+SCORING_CONCURRENCY = int(os.getenv("SCORING_CONCURRENCY", "4"))    # Morgan calls in flight per scoring request
+SCORING_CLAIM_TIMEOUT = int(os.getenv("SCORING_CLAIM_TIMEOUT", "900"))  # seconds before an abandoned claim is retaken
+
 morgan = MorganAgent()
 
+def _new_candidate(job_id: str, resume_text: str, candidate_name: str, candidate_email: str,
+                   candidate_phone: str, resume_file_url: str, result: dict = None, provisional_score: int = 0):
+    candidate = Candidate(
+        id=str(uuid.uuid4()),
+        job_id=job_id,
+        full_name=candidate_name,
+        email=candidate_email,
+        phone=candidate_phone,
+        resume_text=resume_text,
+        resume_file_url=resume_file_url,
+        score=provisional_score,
+        status=PENDING_STATUS
+    )
+    if result is not None:
+        _apply_score(candidate, result)
+    return candidate
+
+def _apply_score(candidate: Candidate, result: dict):
+    candidate.score = result['score']
+    candidate.analysis = result['analysis']
+    candidate.recommendation = extract_recommendation(result['analysis'])
+    candidate.status = "screened"
+    candidate.screened_at = datetime.utcnow()
+
 def add_and_score_candidate(db: Session, job_id: str, resume_text: str, 
                            candidate_name: str, candidate_email: str, 
-                           candidate_phone: str = None):
+                           candidate_phone: str = None, resume_file_url: str = None):
     """Add candidate and get Morgan's score"""
     
     # Get the job
-    from models import Job
     job = db.query(Job).filter(Job.id == job_id).first()
     if not job:
         return None, "Job not found"
@@ -20,22 +69,15 @@ def add_and_score_candidate(db: Session, job_id: str, resume_text: str,
     result = morgan.score_resume(resume_text, job.job_description)
     
     # Save candidate to database
-    candidate = Candidate(
-        id=str(uuid.uuid4()),
-        job_id=job_id,
-        full_name=candidate_name,
-        email=candidate_email,
-        phone=candidate_phone,
-        resume_text=resume_text,
-        score=result['score'],
-        analysis=result['analysis'],
-        recommendation=extract_recommendation(result['analysis']),
-        status="screened"
-    )
+    candidate = _new_candidate(job_id, resume_text, candidate_name, candidate_email,
+                               candidate_phone, resume_file_url, result)
     
     db.add(candidate)
     db.commit()
     db.refresh(candidate)
+    response_cache.invalidate(job_tag(job_id))
+    index_candidate(candidate, job.user_id)
+    audit_log.record("candidate_scored", job.user_id, "candidate", candidate.id)
     
     return candidate, None
 
@@ -50,10 +92,281 @@ def extract_recommendation(analysis: str):
     else:
         return "REJECT"
 
-def get_job_candidates(db: Session, job_id: str, min_score: int = 0):
+def _job_candidates_stmt(job_id: str, min_score: int = 0,
+                         recommendation: str = None, status: str = None):
+    stmt = select(Candidate)\
+        .where(Candidate.job_id == job_id)\
+        .where(Candidate.score >= min_score)
+    if recommendation:
+        stmt = stmt.where(Candidate.recommendation == recommendation)
+    if status:
+        stmt = stmt.where(Candidate.status == status)
+    return stmt.order_by(Candidate.score.desc(), Candidate.id.desc())
+
+def _job_candidates_page_stmt(job_id: str, limit: int, cursor: str = None, min_score: int = 0,
+                              recommendation: str = None, status: str = None):
+    stmt = _job_candidates_stmt(job_id, min_score, recommendation, status)\
+        .options(load_only(*LIST_COLUMNS))
+    if cursor:
+        score, candidate_id = decode_cursor(cursor, int, str)
+        stmt = stmt.where(tuple_(Candidate.score, Candidate.id) < tuple_(score, candidate_id))
+    return stmt.limit(limit + 1)
+
+def _candidate_cursor_key(candidate):
+    return candidate.score, candidate.id
+
+def _candidate_for_user_stmt(candidate_id: str, user_id: str):
+    return select(Candidate).join(Job, Candidate.job_id == Job.id)\
+        .where(Candidate.id == candidate_id, Job.user_id == user_id)
+
+def _candidate_version_stmt(candidate_id: str, user_id: str):
+    # Candidate writes bump their job's version
+    return select(Job.version).join(Candidate, Candidate.job_id == Job.id)\
+        .where(Candidate.id == candidate_id, Job.user_id == user_id)
+
+def get_job_candidates(db: Session, job_id: str, min_score: int = 0,
+                       recommendation: str = None, status: str = None):
     """Get all candidates for a job, sorted by score"""
-    return db.query(Candidate)\
-        .filter(Candidate.job_id == job_id)\
-        .filter(Candidate.score >= min_score)\
-        .order_by(Candidate.score.desc())\
-        .all()
\ No newline at end of file
+    return db.scalars(_job_candidates_stmt(job_id, min_score, recommendation, status)).all()
+
+def get_job_candidates_page(db: Session, job_id: str, limit: int, cursor: str = None,
+                            min_score: int = 0, recommendation: str = None, status: str = None):
+    """
+    One page of a job's candidates, sorted by (score, id) descending
+
+    Returns (candidates, next_cursor) - next_cursor is None on the last page.
+    Raises ValueError for an invalid cursor.
+    """
+    stmt = _job_candidates_page_stmt(job_id, limit, cursor, min_score, recommendation, status)
+    return split_page(db.scalars(stmt).all(), limit, _candidate_cursor_key)
+
+def get_candidate_for_user(db: Session, candidate_id: str, user_id: str):
+    """Get a single candidate with all fields, only if it belongs to one of the user's jobs"""
+    return db.scalars(_candidate_for_user_stmt(candidate_id, user_id)).first()
+
+
+def _suggested_candidate_ids(job: Job, limit: int):
+    # Over-fetch - some matches are the same person applying to several jobs
+    vector = job_index.get(job.id)
+    if vector is None:
+        vector = embed(job.job_description)
+    return candidate_index.search(vector, job.user_id, exclude_group=job.id, k=limit * 3)
+
+def _suggested_candidates(matches: list, candidates: list, taken_emails: set, limit: int):
+    by_id = {c.id: c for c in candidates}
+    suggestions = []
+    for candidate_id, similarity in matches:
+        candidate = by_id.get(candidate_id)
+        if candidate is None or candidate.email.lower() in taken_emails:
+            continue
+        taken_emails.add(candidate.email.lower())
+        suggestions.append((candidate, similarity))
+        if len(suggestions) == limit:
+            break
+    return suggestions
+
+def _claimable(now: datetime):
+    # Pending, or claimed by a request that died before finishing
+    stale = now - timedelta(seconds=SCORING_CLAIM_TIMEOUT)
+    return or_(
+        Candidate.status == PENDING_STATUS,
+        and_(Candidate.status == SCORING_STATUS, Candidate.scoring_claimed_at < stale)
+    )
+
+def _scoring_queue_stmt(job_id: str):
+    # Upload order, so equal pre-ranks are scored first come first served
+    return select(Candidate)\
+        .options(load_only(*LIST_COLUMNS, Candidate.resume_text))\
+        .where(Candidate.job_id == job_id, _claimable(datetime.utcnow()))\
+        .order_by(Candidate.applied_at, Candidate.id)
+
+def _bump_version_stmt(job_id: str):
+    # Claims are bulk updates, which skip the models.py version events
+    return update(Job).where(Job.id == job_id).values(version=Job.version + 1)
+
+def _prioritize(candidates: list, job_description: str):
+    order, scores = priority_order([c.resume_text for c in candidates], job_description)
+    return [(candidates[i], scores[i]) for i in order]
+
+def estimate_candidate_tokens(resume_text: str, job_description: str):
+    """Worst-case LLM usage of scoring a candidate, for the quota reservation"""
+    return morgan.estimate_tokens(resume_text, job_description)
+
+
+# Async versions for the API routes
+
+async def add_and_score_candidate_async(db: AsyncSession, job_id: str, resume_text: str,
+                                        candidate_name: str, candidate_email: str,
+                                        candidate_phone: str = None, resume_file_url: str = None):
+    """Add candidate and get Morgan's score"""
+    job = (await db.scalars(select(Job).where(Job.id == job_id))).first()
+    if not job:
+        return None, "Job not found"
+    
+    # The DB connection goes back to the pool while Morgan is thinking
+    await release_connection(db)
+    result = await morgan.score_resume_async(resume_text, job.job_description)
+    
+    candidate = _new_candidate(job_id, resume_text, candidate_name, candidate_email,
+                               candidate_phone, resume_file_url, result)
+    
+    db.add(candidate)
+    await db.commit()
+    await db.refresh(candidate)
+    await response_cache.invalidate_async(job_tag(job_id))
+    await run_in_threadpool(index_candidate, candidate, job.user_id)
+    audit_log.record("candidate_scored", job.user_id, "candidate", candidate.id)
+    
+    return candidate, None
+
+async def add_candidate_unscored_async(db: AsyncSession, job_id: str, resume_text: str,
+                                       candidate_name: str, candidate_email: str,
+                                       candidate_phone: str = None, resume_file_url: str = None):
+    """Add candidate without calling Morgan - scored later by score_pending_candidates_async"""
+    job = (await db.scalars(select(Job).where(Job.id == job_id))).first()
+    if not job:
+        return None, "Job not found"
+    
+    candidate = _new_candidate(job_id, resume_text, candidate_name, candidate_email,
+                               candidate_phone, resume_file_url,
+                               provisional_score=prerank_score(resume_text, job.job_description))
+    
+    db.add(candidate)
+    await db.commit()
+    await db.refresh(candidate)
+    await response_cache.invalidate_async(job_tag(job_id))
+    await run_in_threadpool(index_candidate, candidate, job.user_id)
+    
+    return candidate, None
+
+async def attach_resume_file_async(db: AsyncSession, candidate: Candidate, resume_file_url: str):
+    """Point a saved candidate at its stored original resume file"""
+    candidate.resume_file_url = resume_file_url
+    await db.commit()
+
+async def get_scoring_queue_async(db: AsyncSession, job: Job):
+    """
+    The job's unscored candidates, best skill pre-rank first - [(candidate, pre-rank)].
+    Ranked against the current job description in one matrix-vector product.
+    """
+    candidates = (await db.scalars(_scoring_queue_stmt(job.id))).all()
+    if not candidates:
+        return []
+    return await run_in_threadpool(_prioritize, candidates, job.job_description)
+
+async def claim_candidates_async(db: AsyncSession, job: Job, candidates: list):
+    """
+    Claim candidates from the queue for scoring - one conditional UPDATE, so of two
+    overlapping requests only one gets each candidate. Returns (claim, claimed ones),
+    the claimed ones in queue order.
+    """
+    claim = str(uuid.uuid4())
+    now = datetime.utcnow()
+    result = await db.execute(
+        update(Candidate)
+        .where(Candidate.id.in_([c.id for c in candidates]), Candidate.job_id == job.id, _claimable(now))
+        .values(status=SCORING_STATUS, scoring_claim=claim, scoring_claimed_at=now)
+        .execution_options(synchronize_session=False)
+    )
+    claimed = set()
+    if result.rowcount:
+        await db.execute(_bump_version_stmt(job.id))
+        claimed = set((await db.scalars(select(Candidate.id).where(Candidate.scoring_claim == claim))).all())
+    await db.commit()
+    if claimed:
+        await response_cache.invalidate_async(job_tag(job.id))
+    return claim, [c for c in candidates if c.id in claimed]
+
+async def release_claim_async(db: AsyncSession, job: Job, claim: str):
+    """Put candidates still held by claim back in the queue - for a request that gives up"""
+    await db.rollback()
+    result = await db.execute(
+        update(Candidate)
+        .where(Candidate.scoring_claim == claim)
+        .values(status=PENDING_STATUS, scoring_claim=None, scoring_claimed_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    if result.rowcount:
+        await db.execute(_bump_version_stmt(job.id))
+    await db.commit()
+    await response_cache.invalidate_async(job_tag(job.id))
+
+async def score_pending_candidates_async(db: AsyncSession, job: Job, claim: str, candidates: list):
+    """
+    Score candidates claimed by claim_candidates_async with Morgan, SCORING_CONCURRENCY
+    at a time, and store the results - only for candidates still held by this claim.
+    Candidates Morgan fails on go back to pending. Returns the scored ones.
+    """
+    semaphore = asyncio.Semaphore(SCORING_CONCURRENCY)
+    
+    async def score(candidate):
+        async with semaphore:
+            return await morgan.score_resume_async(candidate.resume_text, job.job_description)
+    
+    # The DB connection goes back to the pool while Morgan is thinking
+    await release_connection(db)
+    results = await asyncio.gather(*(score(c) for c in candidates), return_exceptions=True)
+    
+    # Renewing the claim locks our rows until the commit, so a request retaking
+    # them as abandoned can't slip in between the check and the write
+    await db.execute(
+        update(Candidate).where(Candidate.scoring_claim == claim)
+        .values(scoring_claimed_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+    held = set((await db.scalars(select(Candidate.id).where(Candidate.scoring_claim == claim))).all())
+    
+    scored = []
+    for candidate, result in zip(candidates, results):
+        if candidate.id not in held:
+            print(f"Scoring claim lost for candidate {candidate.id}, result dropped")
+            continue
+        if isinstance(result, Exception):
+            print(f"Scoring error for candidate {candidate.id}: {result}")
+            continue
+        _apply_score(candidate, result)
+        candidate.scoring_claim = candidate.scoring_claimed_at = None
+        scored.append(candidate)
+    
+    # The rest go back to the queue
+    await db.execute(
+        update(Candidate).where(Candidate.scoring_claim == claim, Candidate.id.not_in([c.id for c in scored]))
+        .values(status=PENDING_STATUS, scoring_claim=None, scoring_claimed_at=None)
+        .execution_options(synchronize_session=False)
+    )
+    await db.execute(_bump_version_stmt(job.id))
+    await db.commit()
+    await response_cache.invalidate_async(job_tag(job.id))
+    for candidate in scored:
+        audit_log.record("candidate_scored", job.user_id, "candidate", candidate.id)
+    return scored
+
+async def get_job_candidates_page_async(db: AsyncSession, job_id: str, limit: int, cursor: str = None,
+                                        min_score: int = 0, recommendation: str = None, status: str = None):
+    """Async version of get_job_candidates_page"""
+    stmt = _job_candidates_page_stmt(job_id, limit, cursor, min_score, recommendation, status)
+    return split_page((await db.scalars(stmt)).all(), limit, _candidate_cursor_key)
+
+async def get_candidate_for_user_async(db: AsyncSession, candidate_id: str, user_id: str):
+    """Get a single candidate with all fields, only if it belongs to one of the user's jobs"""
+    return (await db.scalars(_candidate_for_user_stmt(candidate_id, user_id))).first()
+
+async def get_candidate_version_async(db: AsyncSession, candidate_id: str, user_id: str):
+    """Version of the candidate's job, None if the candidate isn't the user's"""
+    return (await db.execute(_candidate_version_stmt(candidate_id, user_id))).scalar()
+
+async def get_suggested_candidates_async(db: AsyncSession, job: Job, limit: int = 10):
+    """
+    Candidates from the user's other jobs whose resumes look most like this job's
+    description, best first - returns [(candidate, cosine similarity)]. People already
+    in this job's pipeline and repeat applicants are skipped.
+    """
+    matches = await run_in_threadpool(_suggested_candidate_ids, job, limit)
+    if not matches:
+        return []
+    candidates = (await db.scalars(
+        select(Candidate).options(load_only(*LIST_COLUMNS))
+        .where(Candidate.id.in_([candidate_id for candidate_id, _ in matches]))
+    )).all()
+    applied = (await db.scalars(select(Candidate.email).where(Candidate.job_id == job.id))).all()
+    return _suggested_candidates(matches, candidates, {email.lower() for email in applied}, limit)
@@ -0,0 +1,244 @@
+"""
+Compressed storage for the large text columns (resumes, Morgan's analyses, job descriptions)
+
+CompressedText is a column type that zlib-compresses on write and decompresses on
+load, so the models still see plain strings. Resumes and analyses are short and
+share a lot of wording, which plain zlib can't exploit in a few KB - every value is
+compressed against a preset dictionary of that common text instead.
+
+Stored values start with a format byte:
+    0x00                      raw UTF-8 - values too small to gain anything
+    0x01 + 4-byte dict id     zlib stream, compressed with that dictionary (0 = none)
+
+Dictionaries are identified by their crc32, so rows written with an older one still
+decode. The built-in dictionary is derived from our own prompts and common resume
+wording; a better one can be trained on real resumes:
+
+    python compressed_text.py train            # writes zdicts/<id>.zdict, prints the id
+    COMPRESSION_DICT=<id> ...                  # write new values with it (keep the file deployed)
+    python compressed_text.py recompress       # optional - rewrite existing rows with it
+
+Values are only decompressed for columns a query actually selects - the list
+endpoints use load_only() and never pay for it.
+"""
+from collections import Counter
+import os
+import re
+import struct
+import sys
+import threading
+import zlib
+
+from sqlalchemy import LargeBinary, select, update, table as sa_table, column as sa_column
+from sqlalchemy.types import TypeDecorator
+
+COMPRESSION_LEVEL = int(os.getenv("COMPRESSION_LEVEL", "6"))
+COMPRESSION_MIN_BYTES = int(os.getenv("COMPRESSION_MIN_BYTES", "64"))    # shorter values are stored raw
+COMPRESSION_DICT = os.getenv("COMPRESSION_DICT", "")                    # trained dictionary id, empty = built-in
+COMPRESSION_DICT_DIR = os.getenv("COMPRESSION_DICT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "zdicts"))
+
+RAW = b"\x00"
+ZLIB = b"\x01"
+MAX_DICT_BYTES = 32 * 1024    # zlib's window - anything further back is never referenced
+
+# Boilerplate every resume, Morgan analysis and Jamie job description repeats.
+# zlib favours the end of the dictionary, so the most common text goes last.
+BUILTIN_DICTIONARY = "\n".join([
+    "Bachelor of Science in Computer Science, Master of Science, University, GPA, Certified, Certification",
+    "References available upon request. Volunteer. Awards. Publications. Languages: English, Spanish",
+    "Responsible for managing, developing and maintaining, collaborated with cross-functional teams to ",
+    "Designed and implemented, improved performance by %, reduced costs by %, increased revenue by %",
+    "Led a team of engineers, mentored junior developers, stakeholders, delivered projects on time",
+    "Python, JavaScript, TypeScript, React, Node.js, SQL, PostgreSQL, AWS, Docker, Kubernetes, Git, Agile",
+    "Senior Software Engineer, Software Developer, Product Manager, Data Scientist, Project Manager",
+    "Present | January February March April May June July August September October November December",
+    "PROFESSIONAL SUMMARY\nWORK EXPERIENCE\nEXPERIENCE:\nEDUCATION:\nSKILLS:\nPROJECTS\nCERTIFICATIONS\n",
+    "**Job Title**\n**Role Summary**\n**Key Responsibilities**\n- \n**Required Qualifications**\n- ",
+    "**Nice to Have**\n- \n**Compensation & Benefits**\n**Work Location**\nRemote, Hybrid, full-time, years of experience",
+    "SCORE: \n\nMATCH ANALYSIS:\n- Skills Match: \n- Experience Match: \n- Domain Match: \n- Education Match: \n\n",
+    "STRENGTHS:\n- \nWEAKNESSES/GAPS:\n- \nRED FLAGS:\n- NONE\n\nRECOMMENDATION:\n",
+    "STRONG MATCH - interview immediately\nGOOD MATCH - consider for interview\n",
+    "WEAK MATCH - maybe as backup\nREJECT - does not meet requirements\n\nRECRUITER NOTE:\n",
+    "The candidate has experience with the team and the role, strong experience in the requirements of this position ",
+]).encode()
+
+
+def dictionary_id(dictionary: bytes):
+    return zlib.crc32(dictionary)
+
+
+class Dictionaries:
+    """Every dictionary we can decode with, plus the one new values are written with"""
+
+    def __init__(self, path=COMPRESSION_DICT_DIR, current=COMPRESSION_DICT):
+        self.path = path
+        self.current = current
+        self._by_id = None
+        self._lock = threading.Lock()
+
+    def _load(self):
+        with self._lock:
+            if self._by_id is None:
+                by_id = {0: b"", dictionary_id(BUILTIN_DICTIONARY): BUILTIN_DICTIONARY}
+                if os.path.isdir(self.path):
+                    for name in os.listdir(self.path):
+                        if name.endswith(".zdict"):
+                            with open(os.path.join(self.path, name), "rb") as f:
+                                data = f.read()
+                            by_id[dictionary_id(data)] = data
+                if self.current and int(self.current) not in by_id:
+                    raise RuntimeError(f"Compression dictionary {self.current} not found in {self.path}")
+                self._by_id = by_id
+            return self._by_id
+
+    def get(self, dict_id):
+        by_id = self._by_id or self._load()
+        if dict_id not in by_id:
+            raise ValueError(f"Unknown compression dictionary {dict_id}")
+        return by_id[dict_id]
+
+    def write_id(self):
+        self._by_id or self._load()
+        return int(self.current) if self.current else dictionary_id(BUILTIN_DICTIONARY)
+
+    def register(self, dictionary: bytes):
+        """Make a dictionary usable in this process only, returns its id"""
+        dict_id = dictionary_id(dictionary)
+        by_id = self._by_id or self._load()
+        by_id[dict_id] = dictionary
+        return dict_id
+
+    def add(self, dictionary: bytes):
+        """Save a trained dictionary next to the others, returns its id"""
+        os.makedirs(self.path, exist_ok=True)
+        with open(os.path.join(self.path, f"{dictionary_id(dictionary)}.zdict"), "wb") as f:
+            f.write(dictionary)
+        return self.register(dictionary)
+
+
+dictionaries = Dictionaries()
+
+
+def compress(text: str, dict_id: int = None):
+    data = text.encode()
+    if len(data) < COMPRESSION_MIN_BYTES:
+        return RAW + data
+    dict_id = dictionaries.write_id() if dict_id is None else dict_id
+    dictionary = dictionaries.get(dict_id)
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=dictionary) if dictionary else zlib.compressobj(COMPRESSION_LEVEL)
+    packed = ZLIB + struct.pack(">I", dict_id) + compressor.compress(data) + compressor.flush()
+    # Incompressible text (a base64 blob pasted into a resume) is cheaper raw
+    return packed if len(packed) < len(data) + 1 else RAW + data
+
+
+def decompress(value):
+    if isinstance(value, str):
+        return value    # a row written before migration 0007
+    value = bytes(value)
+    if value[:1] == RAW:
+        return value[1:].decode()
+    if value[:1] == ZLIB:
+        dictionary = dictionaries.get(struct.unpack(">I", value[1:5])[0])
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        return (decompressor.decompress(value[5:]) + decompressor.flush()).decode()
+    raise ValueError("Unknown compressed text format")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored zlib-compressed - reads and writes plain str"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else compress(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else decompress(value)
+
+
+# Training
+
+WORD_RE = re.compile(r"\S+\s*")
+
+
+def train_dictionary(samples, size=MAX_DICT_BYTES, max_words=6):
+    """
+    Build a preset dictionary from sample texts - the word n-grams that would save
+    the most bytes across the samples (length x documents containing them), best last
+    """
+    seen_in = Counter()
+    for text in samples:
+        words = WORD_RE.findall(text)
+        grams = set()
+        for n in range(2, max_words + 1):
+            grams.update("".join(words[i:i + n]) for i in range(len(words) - n + 1))
+        seen_in.update(grams)
+
+    chosen, total = [], 0
+    for gram, documents in sorted(seen_in.items(), key=lambda item: len(item[0]) * item[1], reverse=True):
+        if documents < 2:
+            continue
+        encoded = gram.encode()
+        if total + len(encoded) > size:
+            continue
+        if any(gram in longer for longer in chosen[-200:]):
+            continue    # already covered by a longer n-gram
+        chosen.append(gram)
+        total += len(encoded)
+    return "".join(reversed(chosen)).encode()
+
+
+def recompress_column(connection, table_name, column, encode=None, batch_size=500, key="id"):
+    """
+    Rewrite every value of table_name.column in keyset batches - compressed with the
+    current dictionary by default, or with encode(text). Reads rows in any stored
+    format, plain text included. Returns the number of rows rewritten.
+    """
+    encode = encode or compress
+    # Untyped columns - the stored bytes (or legacy text) go in and out untouched
+    table = sa_table(table_name, sa_column(key), sa_column(column))
+    key_col, value_col = table.c[key], table.c[column]
+    rewritten, last = 0, None
+    while True:
+        stmt = select(key_col, value_col).order_by(key_col).limit(batch_size)
+        if last is not None:
+            stmt = stmt.where(key_col > last)
+        rows = connection.execute(stmt).all()
+        if not rows:
+            return rewritten
+        for row_key, stored in rows:
+            if stored is not None:
+                connection.execute(update(table).where(key_col == row_key).values({column: encode(decompress(stored))}))
+                rewritten += 1
+        last = rows[-1][0]
+
+
+COLUMNS = (("candidates", "resume_text"), ("candidates", "analysis"), ("jobs", "job_description"))
+
+
+def _main(argv):
+    from database import engine
+    from models import Candidate
+
+    command = argv[0] if argv else None
+    if command == "train":
+        limit = int(argv[1]) if len(argv) > 1 else 500
+        with engine.connect() as connection:
+            samples = connection.execute(
+                select(Candidate.resume_text).order_by(Candidate.applied_at.desc()).limit(limit)
+            ).scalars().all()
+        dict_id = dictionaries.add(train_dictionary(samples))
+        print(f"Trained on {len(samples)} resumes - dictionary {dict_id}")
+        print(f"Deploy zdicts/{dict_id}.zdict and set COMPRESSION_DICT={dict_id}")
+    elif command == "recompress":
+        with engine.begin() as connection:
+            for table_name, column in COLUMNS:
+                count = recompress_column(connection, table_name, column)
+                print(f"{table_name}.{column}: {count} rows rewritten")
+    else:
+        sys.exit("Usage: python compressed_text.py train [samples] | recompress")
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])
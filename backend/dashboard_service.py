@@ -0,0 +1,131 @@
+from sqlalchemy import select, func, case, literal, null, union_all
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+from models import Job, Candidate
+from candidate_service import UNSCORED_STATUSES
+
+TOP_SCORE = 80      # candidates at or above this count as top candidates
+TOP_LIMIT = 5
+PENDING = "PENDING"  # recommendation bucket for candidates Morgan hasn't scored yet
+
+def _job_stats_stmt(user_id: str):
+    """
+    A row per (job, recommendation) - jobs without candidates come back once with a
+    zero count. Candidates still waiting for Morgan count as candidates under PENDING,
+    but their provisional pre-rank stays out of the scores.
+    """
+    scored = Candidate.status.not_in(UNSCORED_STATUSES)
+    recommendation = case((Candidate.id.is_not(None) & ~scored, PENDING), else_=Candidate.recommendation)
+    return (
+        select(
+            literal("job").label("kind"),
+            Job.id.label("job_id"), Job.title.label("name"), Job.status, Job.created_at.label("at"), Job.version,
+            recommendation.label("recommendation"),
+            func.count(Candidate.id).label("candidates"),
+            func.count(case((scored, 1))).label("scored"),
+            func.coalesce(func.sum(case((scored, Candidate.score))), 0).label("score_total"),
+            func.count(case((scored & (Candidate.score >= TOP_SCORE), 1))).label("top_candidates"),
+            null().label("candidate_id"), null().label("score")
+        )
+        .select_from(Job)
+        .outerjoin(Candidate, Candidate.job_id == Job.id)
+        .where(Job.user_id == user_id)
+        .group_by(Job.id, Job.title, Job.status, Job.created_at, Job.version, recommendation)
+    )
+
+def _top_candidates_stmt(user_id: str):
+    top = (
+        select(Candidate.id, Candidate.job_id, Candidate.full_name, Candidate.score,
+               Candidate.recommendation, Candidate.applied_at)
+        .join(Job, Candidate.job_id == Job.id)
+        .where(Job.user_id == user_id, Candidate.score >= TOP_SCORE, Candidate.status.not_in(UNSCORED_STATUSES))
+        .order_by(Candidate.score.desc(), Candidate.id.desc())
+        .limit(TOP_LIMIT)
+        .subquery()
+    )
+    return select(
+        literal("top").label("kind"),
+        top.c.job_id, top.c.full_name.label("name"), null().label("status"), top.c.applied_at.label("at"),
+        null().label("version"), top.c.recommendation,
+        null().label("candidates"), null().label("scored"), null().label("score_total"), null().label("top_candidates"),
+        top.c.id.label("candidate_id"), top.c.score
+    )
+
+def _dashboard_stmt(user_id: str):
+    """The whole dashboard, its validator included, in one round trip"""
+    return union_all(_job_stats_stmt(user_id), _top_candidates_stmt(user_id))
+
+def _average(total, count):
+    return round(total / count, 1) if count else None
+
+def _dashboard(rows: list):
+    """(version, dashboard) - the version matches get_user_jobs_version_async's"""
+    stat_rows = sorted((r for r in rows if r.kind == "job"), key=lambda r: (r.at, r.job_id), reverse=True)
+    top_rows = sorted((r for r in rows if r.kind == "top"), key=lambda r: (r.score, r.candidate_id), reverse=True)
+
+    jobs = {}
+    versions = {}
+    for row in stat_rows:
+        job = jobs.get(row.job_id)
+        if job is None:
+            versions[row.job_id] = (row.at, row.version)
+            job = jobs[row.job_id] = {
+                'id': row.job_id,
+                'title': row.name,
+                'status': row.status,
+                'created_at': str(row.at),
+                'candidates': 0,
+                'scored': 0,
+                'score_total': 0,
+                'top_candidates': 0,
+                'recommendations': {}
+            }
+        if row.candidates:
+            job['candidates'] += row.candidates
+            job['scored'] += row.scored
+            job['score_total'] += row.score_total
+            job['top_candidates'] += row.top_candidates
+            key = row.recommendation or 'UNKNOWN'
+            job['recommendations'][key] = job['recommendations'].get(key, 0) + row.candidates
+
+    totals = {'jobs': len(jobs), 'candidates': 0, 'scored': 0, 'score_total': 0, 'top_candidates': 0, 'recommendations': {}}
+    for job in jobs.values():
+        for key in ('candidates', 'scored', 'score_total', 'top_candidates'):
+            totals[key] += job[key]
+        for key, count in job['recommendations'].items():
+            totals['recommendations'][key] = totals['recommendations'].get(key, 0) + count
+        # Averages are over Morgan's scores only - provisional pre-ranks are another scale of confidence
+        job['avg_score'] = _average(job.pop('score_total'), job['scored'])
+    totals['avg_score'] = _average(totals.pop('score_total'), totals['scored'])
+
+    version = (len(versions), max((at for at, _ in versions.values()), default=None),
+               sum(v for _, v in versions.values()))
+    return version, {
+        'totals': totals,
+        'jobs': list(jobs.values()),
+        'top_candidates': [
+            {
+                'id': c.candidate_id,
+                'job_id': c.job_id,
+                'name': c.name,
+                'score': c.score,
+                'recommendation': c.recommendation,
+                'applied_at': str(c.at)
+            }
+            for c in top_rows
+        ]
+    }
+
+def get_dashboard(db: Session, user_id: str):
+    """
+    (version, dashboard) - per-job candidate counts, score averages and recommendation
+    mix, plus the best candidates
+    """
+    return _dashboard(db.execute(_dashboard_stmt(user_id)).all())
+
+
+# Async versions for the API routes
+
+async def get_dashboard_async(db: AsyncSession, user_id: str):
+    """Async version of get_dashboard"""
+    return _dashboard((await db.execute(_dashboard_stmt(user_id))).all())
@@ -1,16 +1,224 @@
-from sqlalchemy import create_engine
+from collections import OrderedDict
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import QueuePool, AsyncAdaptedQueuePool
+import asyncio
+import itertools
+import logging
 import os
+import threading
+import time
 from dotenv import load_dotenv
+from telemetry import record_span
 
 load_dotenv()
 
 DATABASE_URL = os.getenv("DATABASE_URL", "postgresql://localhost/thinkloop_dev")
 
-engine = create_engine(DATABASE_URL, echo=True, pool_pre_ping=True)
+
+def to_async_url(url):
+    """Map a sync database URL onto its async driver (asyncpg / aiosqlite)"""
+    if url.startswith("sqlite"):
+        return "sqlite+aiosqlite" + url[url.index(":"):]
+    for prefix in ("postgresql+psycopg2://", "postgresql://", "postgres://"):
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
+
+
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or to_async_url(DATABASE_URL)
+
+# Optional read replicas, comma separated - GET routes read from these
+DATABASE_REPLICA_URLS = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
+READ_STICKINESS_SECONDS = float(os.getenv("READ_STICKINESS_SECONDS", "5"))  # reads stay on the primary after a write
+# Where recent writers are kept - memory only works with a single worker, see ReplicaRouter
+READ_STICKINESS_BACKEND = os.getenv("READ_STICKINESS_BACKEND", "memory")
+READ_STICKINESS_REDIS_URL = os.getenv("READ_STICKINESS_REDIS_URL", "redis://localhost:6379/2")
+REPLICA_HEALTH_INTERVAL = float(os.getenv("REPLICA_HEALTH_INTERVAL", "10"))
+
+# Engine settings - defaults are tuned for production
+# Every worker process gets its own pool, so size it so that
+#   workers * (DB_POOL_SIZE + DB_MAX_OVERFLOW) stays under Postgres max_connections
+DB_ECHO = os.getenv("DB_ECHO", "false").lower() == "true"
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "5"))
+DB_MAX_OVERFLOW = int(os.getenv("DB_MAX_OVERFLOW", "5"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))         # seconds to wait for a free connection
+DB_POOL_RECYCLE = int(os.getenv("DB_POOL_RECYCLE", "1800"))         # seconds before a connection is replaced
+DB_STATEMENT_TIMEOUT_MS = int(os.getenv("DB_STATEMENT_TIMEOUT_MS", "30000"))  # Postgres only, 0 disables
+DB_SLOW_QUERY_MS = float(os.getenv("DB_SLOW_QUERY_MS", "200"))      # 0 disables the slow query log
+
+slow_query_logger = logging.getLogger("thinkloop.sql.slow")
+
+
+class PoolMetrics:
+    """Counters for connection pool behaviour, updated from pool events"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.checkouts = 0
+        self.connects = 0
+        self.invalidations = 0
+        self.acquire_wait_total = 0.0
+        self.acquire_wait_max = 0.0
+        self.slow_queries = 0
+
+    def record_wait(self, seconds):
+        with self.lock:
+            self.acquire_wait_total += seconds
+            self.acquire_wait_max = max(self.acquire_wait_max, seconds)
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "checkouts": self.checkouts,
+                "connects": self.connects,
+                "invalidations": self.invalidations,
+                "acquire_wait_avg_ms": round(self.acquire_wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "acquire_wait_max_ms": round(self.acquire_wait_max * 1000, 3),
+                "slow_queries": self.slow_queries
+            }
+
+
+pool_metrics = PoolMetrics()
+async_pool_metrics = PoolMetrics()
+
+
+def _instrumented_pool(base, metrics):
+    """Subclass a pool class so it records how long callers wait to get a connection"""
+
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return base._do_get(self)
+        finally:
+            metrics.record_wait(time.perf_counter() - start)
+
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+
+def _instrument(engine, metrics, slow_query_ms):
+    """Attach pool counters, per-request query timing and the slow query log to an engine"""
+
+    @event.listens_for(engine.pool, "connect")
+    def on_connect(dbapi_conn, record):
+        with metrics.lock:
+            metrics.connects += 1
+
+    @event.listens_for(engine.pool, "checkout")
+    def on_checkout(dbapi_conn, record, proxy):
+        with metrics.lock:
+            metrics.checkouts += 1
+
+    # Fired for pool_pre_ping failures as well as disconnects seen mid-query
+    @event.listens_for(engine.pool, "invalidate")
+    def on_invalidate(dbapi_conn, record, exception):
+        with metrics.lock:
+            metrics.invalidations += 1
+
+    # The start time lives on the statement's execution context, not the pooled
+    # connection - after_cursor_execute never fires for a statement that raises
+    @event.listens_for(engine, "before_cursor_execute")
+    def before_execute(conn, cursor, statement, parameters, context, executemany):
+        context._query_start = time.perf_counter()
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def after_execute(conn, cursor, statement, parameters, context, executemany):
+        elapsed = time.perf_counter() - context._query_start
+        record_span("db", elapsed)
+        if slow_query_ms > 0 and elapsed * 1000 >= slow_query_ms:
+            with metrics.lock:
+                metrics.slow_queries += 1
+            slow_query_logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, statement)
+
+
+def _engine_options(url, pool_base, metrics):
+    """Engine keyword arguments from the DB_* settings, shared by the sync and async engines"""
+    options = {
+        "echo": DB_ECHO,
+        "pool_pre_ping": True,
+    }
+
+    if url.startswith("sqlite"):
+        # SQLite connections are cheap and local - keep SQLAlchemy's default pool
+        options["connect_args"] = {"check_same_thread": False}
+    else:
+        options.update(
+            poolclass=_instrumented_pool(pool_base, metrics),
+            pool_size=DB_POOL_SIZE,
+            max_overflow=DB_MAX_OVERFLOW,
+            pool_timeout=DB_POOL_TIMEOUT,
+            pool_recycle=DB_POOL_RECYCLE,
+        )
+        if DB_STATEMENT_TIMEOUT_MS > 0:
+            if url.startswith("postgresql+asyncpg"):
+                options["connect_args"] = {"server_settings": {"statement_timeout": str(DB_STATEMENT_TIMEOUT_MS)}}
+            elif url.startswith("postgresql"):
+                options["connect_args"] = {"options": f"-c statement_timeout={DB_STATEMENT_TIMEOUT_MS}"}
+
+    return options
+
+
+def build_engine(url, metrics=pool_metrics, **overrides):
+    """Create an engine from the DB_* settings (keyword arguments win)"""
+    options = _engine_options(url, QueuePool, metrics)
+    options.update(overrides)
+    new_engine = create_engine(url, **options)
+    _instrument(new_engine, metrics, DB_SLOW_QUERY_MS)
+    return new_engine
+
+
+def build_async_engine(url, metrics=async_pool_metrics, **overrides):
+    """Async counterpart of build_engine - same settings, async driver"""
+    options = _engine_options(url, AsyncAdaptedQueuePool, metrics)
+    options.update(overrides)
+    new_engine = create_async_engine(url, **options)
+    _instrument(new_engine.sync_engine, metrics, DB_SLOW_QUERY_MS)
+    return new_engine
+
+
+def get_pool_stats(target_engine=None, metrics=pool_metrics):
+    """Live pool state plus the cumulative counters"""
+    pool = (target_engine or engine).pool
+    stats = {"pool": pool.__class__.__name__}
+    if isinstance(pool, QueuePool):
+        stats.update({
+            "size": pool.size(),
+            "checked_out": pool.checkedout(),
+            "checked_in": pool.checkedin(),
+            "overflow": max(pool.overflow(), 0),
+            "max_overflow": pool._max_overflow
+        })
+    stats.update(metrics.snapshot())
+    return stats
+
+
+def get_async_pool_stats():
+    return get_pool_stats(async_engine.sync_engine, async_pool_metrics)
+
+
+engine = build_engine(DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine for the API routes - DB waits don't block the event loop
+async_engine = build_async_engine(ASYNC_DATABASE_URL)
+
+AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
+
+def run_migrations(target_engine=None, revision="head"):
+    """Apply Alembic migrations (same as `alembic upgrade head` in backend/)"""
+    from alembic import command
+    from alembic.config import Config
+
+    config = Config(os.path.join(os.path.dirname(os.path.abspath(__file__)), "alembic.ini"))
+    config.attributes["configure_logger"] = False
+    with (target_engine or engine).begin() as connection:
+        config.attributes["connection"] = connection
+        command.upgrade(config, revision)
+
+
 def get_db():
     db = SessionLocal()
     try:
@@ -18,12 +226,187 @@ def get_db():
     finally:
         db.close()
 
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+class Replica:
+    """One read replica with its own engine, session factory and pool counters"""
+
+    def __init__(self, url):
+        self.url = url
+        self.metrics = PoolMetrics()
+        self.engine = build_async_engine(to_async_url(url), metrics=self.metrics)
+        self.sessionmaker = async_sessionmaker(self.engine, autoflush=False, expire_on_commit=False)
+        self.healthy = True
+        self.last_error = None
+
+
+class InMemoryWriterStore:
+    """
+    Recent writers of this process only - a write handled by one worker doesn't
+    make another worker's reads sticky, so use it with a single worker
+    """
+
+    blocking = False
+
+    def __init__(self):
+        # user id -> expiry. Every entry lives equally long, so the dict is kept in
+        # expiry order (oldest first) and expired entries are always at the front.
+        self._writers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def mark(self, user_id, seconds):
+        now = time.monotonic()
+        with self._lock:
+            writers = self._writers
+            writers[user_id] = now + seconds
+            writers.move_to_end(user_id)
+            while writers:
+                oldest = next(iter(writers))
+                if writers[oldest] > now:
+                    break
+                del writers[oldest]
+
+    def is_recent(self, user_id):
+        with self._lock:
+            expires = self._writers.get(user_id)
+        return expires is not None and expires > time.monotonic()
+
+
+class RedisWriterStore:
+    """Recent writers shared by every worker - one key per user, expiring with the stickiness"""
+
+    blocking = True
+
+    def __init__(self, url=READ_STICKINESS_REDIS_URL, client=None):
+        if client is None:
+            import redis  # optional dependency, only needed for this backend
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    def mark(self, user_id, seconds):
+        self.client.set(f"sticky:{user_id}", 1, px=max(int(seconds * 1000), 1))
+
+    def is_recent(self, user_id):
+        return bool(self.client.exists(f"sticky:{user_id}"))
+
+
+def build_writer_store(backend=READ_STICKINESS_BACKEND):
+    if backend == "memory":
+        return InMemoryWriterStore()
+    if backend == "redis":
+        return RedisWriterStore()
+    raise ValueError(f"Unknown read stickiness backend: {backend}")
+
+
+class ReplicaRouter:
+    """
+    Picks where a read-only request goes
+
+    Healthy replicas are used round-robin. A user who wrote within the last
+    READ_STICKINESS_SECONDS keeps reading from the primary so they see their own
+    writes, whichever token they use. With no replicas configured every read goes
+    to the primary.
+
+    Recent writers live in READ_STICKINESS_BACKEND - with more than one worker it
+    has to be redis, or a read served by another worker than the write can still
+    go to a lagging replica.
+    """
+
+    def __init__(self, urls, stickiness_seconds=READ_STICKINESS_SECONDS, writers=None):
+        self.replicas = [Replica(url) for url in urls]
+        self.stickiness_seconds = stickiness_seconds
+        self._next = itertools.count()
+        if writers is None:
+            writers = build_writer_store() if self.replicas else InMemoryWriterStore()
+        self.writers = writers
+
+    def pick(self):
+        """Next healthy replica, or None to use the primary"""
+        healthy = [r for r in self.replicas if r.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._next) % len(healthy)]
+
+    async def _call(self, fn, *args):
+        if self.writers.blocking:
+            return await asyncio.to_thread(fn, *args)
+        return fn(*args)
+
+    async def mark_write(self, user_id):
+        """Call before the write happens, so no response can go out ahead of it"""
+        if not self.replicas:
+            return
+        try:
+            await self._call(self.writers.mark, user_id, self.stickiness_seconds)
+        except Exception as e:
+            print(f"Read stickiness error: {e}")
+
+    async def is_sticky(self, user_id):
+        if user_id is None or not self.replicas:
+            return False
+        try:
+            return await self._call(self.writers.is_recent, user_id)
+        except Exception as e:
+            # Can't tell - the primary is always safe
+            print(f"Read stickiness error: {e}")
+            return True
+
+    async def check_health(self, timeout=2.0):
+        for replica in self.replicas:
+            try:
+                async with replica.engine.connect() as conn:
+                    await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout)
+                replica.healthy = True
+                replica.last_error = None
+            except Exception as e:
+                replica.healthy = False
+                replica.last_error = str(e)
+
+    async def run_health_checks(self):
+        """Background loop - started from the API startup hook when replicas exist"""
+        while True:
+            await self.check_health()
+            await asyncio.sleep(REPLICA_HEALTH_INTERVAL)
+
+    def stats(self):
+        return [
+            {
+                "url": r.engine.url.render_as_string(hide_password=True),
+                "healthy": r.healthy,
+                "last_error": r.last_error,
+                **get_pool_stats(r.engine.sync_engine, r.metrics)
+            }
+            for r in self.replicas
+        ]
+
+
+replica_router = ReplicaRouter(DATABASE_REPLICA_URLS)
+
+
+def read_session(sticky=False):
+    """
+    Session for read-only work - a replica when one is healthy, the primary
+    when there is none or the user wrote recently (see ReplicaRouter.is_sticky)
+    """
+    replica = None if sticky else replica_router.pick()
+
+    session_factory = replica.sessionmaker if replica else AsyncSessionLocal
+    return session_factory()
+
+async def release_connection(db):
+    """
+    End the session's transaction so its connection goes back to the pool
+    while we wait on something slow (an LLM call). Loaded objects stay usable
+    because AsyncSessionLocal doesn't expire them on commit.
+    """
+    await db.commit()
+
 
 if __name__ == "__main__":
-    from models import init_database
-    
-    print("Creating database tables...")
-    init_database(engine)
-    
+    print("Running database migrations...")
+    run_migrations()
+
     print("\nDatabase initialized successfully!")
-    print(f"Connected to: {DATABASE_URL}")
\ No newline at end of file
+    print(f"Connected to: {DATABASE_URL}")
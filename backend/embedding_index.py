@@ -0,0 +1,243 @@
+"""
+Local vector index for matching past candidates to new jobs - no GPU, no network
+
+Texts are embedded with hashed TF-IDF: word unigrams and bigrams are hashed (signed)
+into EMBEDDING_DIM buckets with sublinear term frequency. The IDF weights come from
+per-bucket document frequencies kept next to the vectors, so appending a document
+never re-embeds the others - IDF and the cosine normalisation are applied at query time.
+
+Each index is an append-only file of fixed-size records (key, group, owner, vector),
+memory-mapped for reads. Appends and clear() take an exclusive file lock, so every
+uvicorn worker can write to the same index; readers pick up rows added by other workers
+on the next search. Scoring a user's rows is a single float32 matrix-vector product. A random
+generation number, written when the files are created, tells readers the index was
+rebuilt and everything they have mapped is stale.
+
+    candidate_index   key = candidate id, group = job id, owner = user id
+    job_index         key = job id,       group = job id, owner = user id
+
+Rebuild from the database (after changing EMBEDDING_DIM, or to backfill):
+    python embedding_index.py rebuild
+"""
+from collections import Counter
+import fcntl
+import math
+import os
+import re
+import sys
+import threading
+import zlib
+
+import numpy as np
+
+EMBEDDING_INDEX_PATH = os.getenv("EMBEDDING_INDEX_PATH", os.path.join(os.path.dirname(os.path.abspath(__file__)), "embeddings"))
+EMBEDDING_DIM = int(os.getenv("EMBEDDING_DIM", "1024"))     # 4 KB per document
+
+TOKEN_RE = re.compile(r"[a-z0-9][a-z0-9+#]*(?:\.[a-z0-9]+)*")   # keeps c++, c#, node.js
+STOPWORDS = frozenset("""
+a an and are as at be but by for from has have in is it its of on or our that the their this to
+was we were will with you your they i my me he she his her them who what when where which
+""".split())
+
+KEY_BYTES = 36   # uuid4 strings
+
+
+def _grams(text):
+    tokens = [t for t in TOKEN_RE.findall((text or "").lower()) if t not in STOPWORDS]
+    return tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+
+
+def embed(text, dim=EMBEDDING_DIM):
+    """Hashed, signed, sublinear term frequencies - IDF is applied at query time"""
+    vector = np.zeros(dim, dtype=np.float32)
+    for gram, count in Counter(_grams(text)).items():
+        h = zlib.crc32(gram.encode())
+        vector[h % dim] += (1.0 if h & 0x80000000 else -1.0) * (1.0 + math.log(count))
+    return vector
+
+
+class VectorIndex:
+    """Append-only memory-mapped vectors with owner and group columns"""
+
+    def __init__(self, name, path=EMBEDDING_INDEX_PATH, dim=EMBEDDING_DIM):
+        self.dim = dim
+        self.record = np.dtype([
+            ("key", f"S{KEY_BYTES}"), ("group", f"S{KEY_BYTES}"), ("owner", f"S{KEY_BYTES}"),
+            ("vector", "<f4", (dim,))
+        ])
+        self.vectors_path = os.path.join(path, f"{name}.vec")
+        self.df_path = os.path.join(path, f"{name}.df")     # per-bucket document counts, then documents, generation
+        self.lock_path = os.path.join(path, f"{name}.lock")
+        self._lock = threading.Lock()
+        self._rows = None          # memmap of the records seen so far
+        self._owners = None        # in-memory copies, so filtering doesn't page in vectors
+        self._groups = None
+        self._keys = None
+        self._generation = None    # of the files the rows above came from
+
+    def _create_files(self):
+        # Caller holds the file lock
+        if not os.path.exists(self.df_path):
+            header = np.zeros(self.dim + 2, dtype=np.int64)
+            header[self.dim + 1] = int.from_bytes(os.urandom(7), "little")
+            header.tofile(self.df_path)
+            open(self.vectors_path, "ab").close()
+
+    def _file_lock(self):
+        os.makedirs(os.path.dirname(self.lock_path), exist_ok=True)
+        lock = open(self.lock_path, "a")
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        return lock
+
+    def add(self, key, group, owner, text):
+        """Embed text and append it - visible to searches in every worker"""
+        row = np.zeros(1, dtype=self.record)
+        row["key"], row["group"], row["owner"] = key.encode(), group.encode(), owner.encode()
+        row["vector"] = embed(text, self.dim)
+        with self._file_lock():
+            self._create_files()    # under the lock, so a concurrent clear() can't remove them mid-append
+            df = np.memmap(self.df_path, dtype=np.int64, mode="r+", shape=(self.dim + 1,))
+            df[:self.dim] += row["vector"][0] != 0
+            df[self.dim] += 1
+            df.flush()
+            with open(self.vectors_path, "ab") as f:
+                f.write(row.tobytes())
+
+    def _read_generation(self):
+        # Index files written before generations existed count as generation 0
+        generation = np.fromfile(self.df_path, dtype=np.int64, count=1, offset=8 * (self.dim + 1))
+        return int(generation[0]) if len(generation) else 0
+
+    def _refresh(self):
+        """Map rows appended since the last search, by this or any other worker"""
+        try:
+            # The same generation either side of the size - no rebuild in between
+            while True:
+                generation = self._read_generation()
+                count = os.path.getsize(self.vectors_path) // self.record.itemsize
+                if self._read_generation() == generation:
+                    break
+        except FileNotFoundError:
+            return 0
+        with self._lock:
+            seen = 0 if self._rows is None else len(self._rows)
+            if generation != self._generation or count < seen:
+                seen = 0   # rebuilt since we last looked
+                self._rows = self._owners = self._groups = self._keys = None
+                self._generation = generation
+            if count > seen:
+                rows = np.memmap(self.vectors_path, dtype=self.record, mode="r", shape=(count,))
+                new = rows[seen:]
+                if seen == 0:
+                    self._owners, self._groups, self._keys = new["owner"].copy(), new["group"].copy(), new["key"].copy()
+                else:
+                    self._owners = np.concatenate([self._owners, new["owner"]])
+                    self._groups = np.concatenate([self._groups, new["group"]])
+                    self._keys = np.concatenate([self._keys, new["key"]])
+                self._rows = rows
+            elif count == 0:
+                self._rows = self._owners = self._groups = self._keys = None
+            return count
+
+    def _idf(self):
+        """IDF weights per bucket, None if the index was cleared since the last refresh"""
+        try:
+            df = np.fromfile(self.df_path, dtype=np.int64, count=self.dim + 1)
+        except FileNotFoundError:
+            return None
+        if len(df) < self.dim + 1:
+            return None
+        documents = df[self.dim]
+        return (np.log((1 + documents) / (1 + df[:self.dim])) + 1).astype(np.float32)
+
+    def get(self, key):
+        """The stored (un-weighted) vector for key, None if it isn't indexed"""
+        if not self._refresh():
+            return None
+        matches = np.flatnonzero(self._keys == key.encode())
+        return np.array(self._rows["vector"][matches[-1]]) if len(matches) else None
+
+    def search(self, vector, owner, exclude_group=None, k=10):
+        """Top k (key, cosine similarity) among owner's rows, best first"""
+        if not self._refresh():
+            return []
+        mask = self._owners == owner.encode()
+        if exclude_group is not None:
+            mask &= self._groups != exclude_group.encode()
+        rows = np.flatnonzero(mask)
+        if not len(rows):
+            return []
+
+        idf = self._idf()
+        if idf is None:
+            return []
+        query = vector * idf
+        query_norm = np.linalg.norm(query)
+        if not query_norm:
+            return []
+        matrix = self._rows["vector"][rows] * idf
+        norms = np.linalg.norm(matrix, axis=1)
+        norms[norms == 0] = 1
+        scores = (matrix @ (query / query_norm)) / norms
+
+        k = min(k, len(rows))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind="stable")]
+        return [(self._keys[rows[i]].decode(), float(scores[i])) for i in top]
+
+    def clear(self):
+        """Remove the index files - takes the same file lock as add(), so no append is cut in half"""
+        with self._file_lock(), self._lock:
+            for path in (self.vectors_path, self.df_path):
+                if os.path.exists(path):
+                    os.remove(path)
+            self._rows = self._owners = self._groups = self._keys = self._generation = None
+
+
+candidate_index = VectorIndex("candidates")
+job_index = VectorIndex("jobs")
+
+
+def index_candidate(candidate, user_id):
+    """Add a new candidate's resume - indexing problems never fail the request"""
+    try:
+        candidate_index.add(candidate.id, candidate.job_id, user_id, candidate.resume_text)
+    except Exception as e:
+        print(f"Candidate indexing error: {e}")
+
+
+def index_job(job):
+    try:
+        job_index.add(job.id, job.id, job.user_id, job.job_description)
+    except Exception as e:
+        print(f"Job indexing error: {e}")
+
+
+def rebuild(batch_size=1000):
+    """Re-embed every job and candidate from the database"""
+    from sqlalchemy import select
+    from database import SessionLocal
+    from models import Candidate, Job
+
+    candidate_index.clear()
+    job_index.clear()
+    with SessionLocal() as db:
+        jobs = db.execute(select(Job.id, Job.user_id, Job.job_description).execution_options(yield_per=batch_size))
+        for job in jobs:
+            job_index.add(job.id, job.id, job.user_id, job.job_description)
+        print(f"Indexed {job_index._refresh()} jobs")
+
+        candidates = db.execute(
+            select(Candidate.id, Candidate.job_id, Job.user_id, Candidate.resume_text)
+            .join(Job, Candidate.job_id == Job.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for candidate in candidates:
+            candidate_index.add(candidate.id, candidate.job_id, candidate.user_id, candidate.resume_text)
+        print(f"Indexed {candidate_index._refresh()} candidates")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("Usage: python embedding_index.py rebuild")
+    rebuild()
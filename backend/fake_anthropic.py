@@ -0,0 +1,223 @@
+"""
+Local stand-in for the Anthropic Messages API, for load tests
+
+Answers POST /v1/messages like the real API - plain JSON or, with "stream": true,
+server-sent events - after a latency drawn from a configurable distribution, and
+can inject 429 rate_limit_error responses. Jamie prompts get a job description,
+Morgan prompts get a scored analysis the app can parse. GET /stats returns call counts.
+
+Point the app at it with ANTHROPIC_BASE_URL=http://127.0.0.1:8900
+
+Usage:
+    python fake_anthropic.py --port 8900
+    python fake_anthropic.py --latency lognormal:1.5:0.6 --rate-limit-rate 0.05
+
+Latency specs (seconds):
+    fixed:S             always S
+    uniform:LO:HI       uniform between LO and HI
+    lognormal:MED:SIGMA lognormal with median MED - long right tail, like the real API
+"""
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+import argparse
+import asyncio
+import json
+import math
+import random
+import threading
+import uuid
+
+app = FastAPI(title="Fake Anthropic Messages API")
+
+
+def parse_latency(spec):
+    """Latency spec string -> function returning a delay in seconds"""
+    kind, _, params = spec.partition(":")
+    values = [float(v) for v in params.split(":")] if params else []
+    if kind == "fixed" and len(values) == 1:
+        return lambda: values[0]
+    if kind == "uniform" and len(values) == 2:
+        return lambda: random.uniform(values[0], values[1])
+    if kind == "lognormal" and len(values) == 2:
+        return lambda: random.lognormvariate(math.log(values[0]), values[1])
+    raise ValueError(f"Invalid latency spec: {spec}")
+
+
+class Settings:
+    def __init__(self, latency="lognormal:1.0:0.5", rate_limit_rate=0.0, retry_after=1, stream_chunks=20):
+        self.latency_spec = latency
+        self.latency = parse_latency(latency)
+        self.rate_limit_rate = rate_limit_rate
+        self.retry_after = retry_after
+        self.stream_chunks = stream_chunks
+
+
+settings = Settings()
+
+
+class CallStats:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.calls = 0
+        self.streamed = 0
+        self.rate_limited = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+
+    def snapshot(self):
+        with self.lock:
+            return {
+                "calls": self.calls,
+                "streamed": self.streamed,
+                "rate_limited": self.rate_limited,
+                "input_tokens": self.input_tokens,
+                "output_tokens": self.output_tokens,
+                "latency": settings.latency_spec
+            }
+
+
+stats = CallStats()
+
+
+def _prompt_text(body):
+    parts = []
+    for message in body.get("messages", []):
+        content = message.get("content", "")
+        if isinstance(content, str):
+            parts.append(content)
+        else:
+            parts += [block.get("text", "") for block in content if isinstance(block, dict)]
+    return "\n".join(parts)
+
+
+def _reply(prompt):
+    if "You are Morgan" in prompt:
+        score = random.randint(30, 98)
+        if score >= 85:
+            recommendation = "STRONG MATCH - interview immediately"
+        elif score >= 70:
+            recommendation = "GOOD MATCH - consider for interview"
+        elif score >= 50:
+            recommendation = "WEAK MATCH - maybe as backup"
+        else:
+            recommendation = "REJECT - does not meet requirements"
+        return (
+            f"SCORE: {score}\n\n"
+            "MATCH ANALYSIS:\n- Skills Match: 80% - most of the required stack\n"
+            "- Experience Match: 5 years, relevant\n- Domain Match: adjacent industry\n"
+            "- Education Match: BSc Computer Science\n\n"
+            "STRENGTHS:\n- Shipped production services\n- Strong testing habits\n- Clear writing\n\n"
+            "WEAKNESSES/GAPS:\n- Limited team leadership\n- No on-call experience\n\n"
+            "RED FLAGS:\n- NONE\n\n"
+            f"RECOMMENDATION:\n{recommendation}\n\n"
+            "RECRUITER NOTE:\nSolid candidate, worth a screening call."
+        )
+    return (
+        "# Senior Software Engineer\n\n"
+        "## About the role\nJoin a small team building the core platform.\n\n"
+        "## Responsibilities\n- Design and ship backend services\n- Review code and mentor\n"
+        "- Own features end to end\n\n"
+        "## Requirements\n- 5+ years of Python\n- PostgreSQL\n- Experience with cloud deployments\n\n"
+        "## Nice to have\n- FastAPI\n- Kubernetes\n\n"
+        "## Compensation\nCompetitive salary and equity, remote friendly."
+    )
+
+
+def _message(body, text, input_tokens, output_tokens):
+    return {
+        "id": f"msg_{uuid.uuid4().hex[:24]}",
+        "type": "message",
+        "role": "assistant",
+        "model": body.get("model", "claude-fake"),
+        "content": [{"type": "text", "text": text}],
+        "stop_reason": "end_turn",
+        "stop_sequence": None,
+        "usage": {"input_tokens": input_tokens, "output_tokens": output_tokens}
+    }
+
+
+def _event(name, data):
+    return f"event: {name}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _stream(body, text, input_tokens, output_tokens, delay):
+    # Time to first token is a fifth of the total, the rest is spread across the chunks
+    message = _message(body, "", input_tokens, 0)
+    message["content"] = []
+    message["stop_reason"] = None
+    await asyncio.sleep(delay * 0.2)
+    yield _event("message_start", {"type": "message_start", "message": message})
+    yield _event("content_block_start", {"type": "content_block_start", "index": 0,
+                                         "content_block": {"type": "text", "text": ""}})
+    size = max(len(text) // settings.stream_chunks, 1)
+    chunks = [text[i:i + size] for i in range(0, len(text), size)]
+    for chunk in chunks:
+        await asyncio.sleep(delay * 0.8 / len(chunks))
+        yield _event("content_block_delta", {"type": "content_block_delta", "index": 0,
+                                             "delta": {"type": "text_delta", "text": chunk}})
+    yield _event("content_block_stop", {"type": "content_block_stop", "index": 0})
+    yield _event("message_delta", {"type": "message_delta",
+                                   "delta": {"stop_reason": "end_turn", "stop_sequence": None},
+                                   "usage": {"output_tokens": output_tokens}})
+    yield _event("message_stop", {"type": "message_stop"})
+
+
+@app.post("/v1/messages")
+async def create_message(request: Request):
+    body = await request.json()
+    with stats.lock:
+        stats.calls += 1
+
+    if settings.rate_limit_rate and random.random() < settings.rate_limit_rate:
+        with stats.lock:
+            stats.rate_limited += 1
+        return JSONResponse(
+            status_code=429,
+            content={"type": "error", "error": {"type": "rate_limit_error",
+                                                "message": "Number of request tokens has exceeded your rate limit"}},
+            headers={"retry-after": str(settings.retry_after)}
+        )
+
+    prompt = _prompt_text(body)
+    text = _reply(prompt)
+    input_tokens = len(prompt) // 4 + 1
+    output_tokens = min(len(text) // 4 + 1, body.get("max_tokens", 4096))
+    with stats.lock:
+        stats.input_tokens += input_tokens
+        stats.output_tokens += output_tokens
+    delay = settings.latency()
+
+    if body.get("stream"):
+        with stats.lock:
+            stats.streamed += 1
+        return StreamingResponse(_stream(body, text, input_tokens, output_tokens, delay),
+                                 media_type="text/event-stream")
+
+    await asyncio.sleep(delay)
+    return _message(body, text, input_tokens, output_tokens)
+
+
+@app.get("/stats")
+def call_stats():
+    return stats.snapshot()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--latency", default="lognormal:1.0:0.5", help="latency distribution, see above")
+    parser.add_argument("--rate-limit-rate", type=float, default=0.0, help="fraction of calls answered with a 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="retry-after seconds sent with injected 429s")
+    parser.add_argument("--stream-chunks", type=int, default=20, help="text deltas per streamed reply")
+    args = parser.parse_args()
+
+    global settings
+    settings = Settings(args.latency, args.rate_limit_rate, args.retry_after, args.stream_chunks)
+
+    import uvicorn
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
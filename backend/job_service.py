@@ -1,22 +1,28 @@
-from sqlalchemy.orm import Session
+from sqlalchemy import select, tuple_, func
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, load_only
+from starlette.concurrency import run_in_threadpool
 from models import Job
 from agents import JamieAgent
+from pagination import decode_cursor, split_page
+from database import release_connection
+from response_cache import response_cache, job_tag
+from embedding_index import index_job
+from audit_log import audit_log
+from datetime import datetime
 import uuid
 
+# Columns the list endpoint returns - job_description and requirements stay in the database
+LIST_COLUMNS = (Job.id, Job.user_id, Job.title, Job.status, Job.created_at)
+
 jamie = JamieAgent()
 
-def create_job_from_requirements(db: Session, user_id: str, requirements: str):
-    """Create job using Jamie and save to database"""
-    
-    # Jamie generates JD
-    jd = jamie.create_job_description(requirements)
-    
+def _new_job(user_id: str, requirements: str, jd: str):
     # Extract title (first line of JD usually has title)
     lines = jd.split('\n')
     title = lines[0].replace('#', '').strip() if lines else "Untitled Job"
     
-    # Save to database
-    job = Job(
+    return Job(
         id=str(uuid.uuid4()),
         user_id=user_id,
         title=title,
@@ -24,17 +30,115 @@ def create_job_from_requirements(db: Session, user_id: str, requirements: str):
         requirements=requirements,
         status="draft"
     )
+
+def _user_jobs_page_stmt(user_id: str, limit: int, cursor: str = None, status: str = None):
+    stmt = select(Job).options(load_only(*LIST_COLUMNS)).where(Job.user_id == user_id)
+    if status:
+        stmt = stmt.where(Job.status == status)
+    if cursor:
+        created_at, job_id = decode_cursor(cursor, datetime, str)
+        stmt = stmt.where(tuple_(Job.created_at, Job.id) < tuple_(created_at, job_id))
+    return stmt.order_by(Job.created_at.desc(), Job.id.desc()).limit(limit + 1)
+
+def _job_cursor_key(job):
+    return job.created_at, job.id
+
+def _user_jobs_version_stmt(user_id: str):
+    # Any write to one of the user's jobs, candidates or postings changes one of these
+    return select(func.count(Job.id), func.max(Job.created_at), func.coalesce(func.sum(Job.version), 0))\
+        .where(Job.user_id == user_id)
+
+def _user_job_version_stmt(job_id: str, user_id: str):
+    return select(Job.version).where(Job.id == job_id, Job.user_id == user_id)
+
+def create_job_from_requirements(db: Session, user_id: str, requirements: str):
+    """Create job using Jamie and save to database"""
+    
+    # Jamie generates JD
+    jd = jamie.create_job_description(requirements)
+    
+    # Save to database
+    job = _new_job(user_id, requirements, jd)
     
     db.add(job)
     db.commit()
     db.refresh(job)
+    index_job(job)
+    audit_log.record("job_created", user_id, "job", job.id)
     
     return job
 
 def get_user_jobs(db: Session, user_id: str):
     """Get all jobs for a user"""
-    return db.query(Job).filter(Job.user_id == user_id).order_by(Job.created_at.desc()).all()
+    return db.query(Job).filter(Job.user_id == user_id).order_by(Job.created_at.desc(), Job.id.desc()).all()
+
+def get_user_jobs_page(db: Session, user_id: str, limit: int, cursor: str = None, status: str = None):
+    """
+    One page of a user's jobs, newest first, keyed on (created_at, id)
+
+    Returns (jobs, next_cursor) - next_cursor is None on the last page.
+    Raises ValueError for an invalid cursor.
+    """
+    rows = db.scalars(_user_jobs_page_stmt(user_id, limit, cursor, status)).all()
+    return split_page(rows, limit, _job_cursor_key)
 
 def get_job_by_id(db: Session, job_id: str):
     """Get single job"""
-    return db.query(Job).filter(Job.id == job_id).first()
\ No newline at end of file
+    return db.query(Job).filter(Job.id == job_id).first()
+
+
+def mark_job_posted(db: Session, job: Job):
+    """Set a job's status to posted"""
+    job.status = "posted"
+    db.commit()
+    response_cache.invalidate(job_tag(job.id))
+    audit_log.record("job_posted", job.user_id, "job", job.id)
+
+def estimate_job_tokens(requirements: str):
+    """Worst-case LLM usage of creating a job, for the quota reservation"""
+    return jamie.estimate_tokens(requirements)
+
+
+# Async versions for the API routes
+
+async def create_job_from_requirements_async(db: AsyncSession, user_id: str, requirements: str):
+    """Create job using Jamie and save to database"""
+    await release_connection(db)
+    jd = await jamie.create_job_description_async(requirements)
+    job = _new_job(user_id, requirements, jd)
+    
+    db.add(job)
+    await db.commit()
+    await db.refresh(job)
+    await run_in_threadpool(index_job, job)
+    audit_log.record("job_created", user_id, "job", job.id)
+    
+    return job
+
+async def mark_job_posted_async(db: AsyncSession, job: Job):
+    """Set a job's status to posted"""
+    job.status = "posted"
+    await db.commit()
+    await response_cache.invalidate_async(job_tag(job.id))
+    audit_log.record("job_posted", job.user_id, "job", job.id)
+
+async def get_user_jobs_page_async(db: AsyncSession, user_id: str, limit: int, cursor: str = None, status: str = None):
+    """Async version of get_user_jobs_page"""
+    rows = (await db.scalars(_user_jobs_page_stmt(user_id, limit, cursor, status))).all()
+    return split_page(rows, limit, _job_cursor_key)
+
+async def get_job_by_id_async(db: AsyncSession, job_id: str):
+    """Get single job"""
+    return (await db.scalars(select(Job).where(Job.id == job_id))).first()
+
+async def get_user_job_async(db: AsyncSession, job_id: str, user_id: str):
+    """Get a job only if it belongs to the user"""
+    return (await db.scalars(select(Job).where(Job.id == job_id, Job.user_id == user_id))).first()
+
+async def get_user_jobs_version_async(db: AsyncSession, user_id: str):
+    """Validator for everything derived from the user's jobs - one aggregate over the jobs rows"""
+    return tuple((await db.execute(_user_jobs_version_stmt(user_id))).one())
+
+async def get_user_job_version_async(db: AsyncSession, job_id: str, user_id: str):
+    """Version of one of the user's jobs, None if it isn't theirs"""
+    return (await db.execute(_user_job_version_stmt(job_id, user_id))).scalar()
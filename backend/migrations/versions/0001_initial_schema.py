@@ -0,0 +1,121 @@
+"""Initial schema
+
+Matches what Base.metadata.create_all used to build on startup. Tables that
+already exist (databases created before migrations) are left alone, so this
+revision is safe to run against an existing deployment.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0001"
+down_revision: Union[str, Sequence[str], None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _missing(table_name):
+    return not sa.inspect(op.get_bind()).has_table(table_name)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if _missing("users"):
+        op.create_table(
+            "users",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("hashed_password", sa.String(), nullable=False),
+            sa.Column("full_name", sa.String()),
+            sa.Column("company_name", sa.String()),
+            sa.Column("plan", sa.String()),
+            sa.Column("is_active", sa.Boolean()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+        op.create_index("ix_users_email", "users", ["email"], unique=True)
+
+    if _missing("jobs"):
+        op.create_table(
+            "jobs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.String(), sa.ForeignKey("users.id"), nullable=False),
+            sa.Column("title", sa.String(), nullable=False),
+            sa.Column("job_description", sa.Text(), nullable=False),
+            sa.Column("requirements", sa.Text()),
+            sa.Column("status", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+            sa.Column("updated_at", sa.DateTime()),
+        )
+
+    if _missing("candidates"):
+        op.create_table(
+            "candidates",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("job_id", sa.String(), sa.ForeignKey("jobs.id"), nullable=False),
+            sa.Column("full_name", sa.String(), nullable=False),
+            sa.Column("email", sa.String(), nullable=False),
+            sa.Column("phone", sa.String()),
+            sa.Column("resume_text", sa.Text(), nullable=False),
+            sa.Column("resume_file_url", sa.String()),
+            sa.Column("score", sa.Integer()),
+            sa.Column("analysis", sa.Text()),
+            sa.Column("recommendation", sa.String()),
+            sa.Column("status", sa.String()),
+            sa.Column("applied_at", sa.DateTime()),
+            sa.Column("screened_at", sa.DateTime()),
+        )
+
+    if _missing("interviews"):
+        op.create_table(
+            "interviews",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("candidate_id", sa.String(), sa.ForeignKey("candidates.id"), nullable=False),
+            sa.Column("status", sa.String()),
+            sa.Column("questions", sa.JSON()),
+            sa.Column("responses", sa.JSON()),
+            sa.Column("transcript", sa.Text()),
+            sa.Column("started_at", sa.DateTime()),
+            sa.Column("completed_at", sa.DateTime()),
+        )
+
+    if _missing("job_postings"):
+        op.create_table(
+            "job_postings",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("job_id", sa.String(), sa.ForeignKey("jobs.id"), nullable=False),
+            sa.Column("board", sa.String(), nullable=False),
+            sa.Column("job_url", sa.String()),
+            sa.Column("views", sa.Integer()),
+            sa.Column("applications", sa.Integer()),
+            sa.Column("posted_at", sa.DateTime()),
+        )
+
+    if _missing("audit_logs"):
+        op.create_table(
+            "audit_logs",
+            sa.Column("id", sa.String(), primary_key=True),
+            sa.Column("user_id", sa.String(), sa.ForeignKey("users.id")),
+            sa.Column("action", sa.String(), nullable=False),
+            sa.Column("entity_type", sa.String()),
+            sa.Column("entity_id", sa.String()),
+            sa.Column("created_at", sa.DateTime()),
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("audit_logs")
+    op.drop_table("job_postings")
+    op.drop_table("interviews")
+    op.drop_table("candidates")
+    op.drop_table("jobs")
+    op.drop_index("ix_users_email", table_name="users")
+    op.drop_table("users")
@@ -0,0 +1,42 @@
+"""Indexes for the hot-path list queries
+
+- jobs (user_id, created_at DESC)           get_user_jobs
+- candidates (job_id, score DESC)           get_job_candidates
+- job_postings (job_id)                     get_job_posting_stats
+- audit_logs (user_id, created_at DESC)     per-user audit history
+- interviews (candidate_id)                 candidate -> interviews
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0002"
+down_revision: Union[str, Sequence[str], None] = "0001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index("ix_jobs_user_id_created_at", "jobs", ["user_id", sa.text("created_at DESC")])
+    op.create_index("ix_candidates_job_id_score", "candidates", ["job_id", sa.text("score DESC")])
+    op.create_index("ix_job_postings_job_id", "job_postings", ["job_id"])
+    op.create_index("ix_audit_logs_user_id_created_at", "audit_logs", ["user_id", sa.text("created_at DESC")])
+    op.create_index("ix_interviews_candidate_id", "interviews", ["candidate_id"])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_interviews_candidate_id", table_name="interviews")
+    op.drop_index("ix_audit_logs_user_id_created_at", table_name="audit_logs")
+    op.drop_index("ix_job_postings_job_id", table_name="job_postings")
+    op.drop_index("ix_candidates_job_id_score", table_name="candidates")
+    op.drop_index("ix_jobs_user_id_created_at", table_name="jobs")
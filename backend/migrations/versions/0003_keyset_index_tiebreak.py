@@ -0,0 +1,39 @@
+"""Add the id tie-breaker to the list indexes for keyset pagination
+
+Pages are keyed on (created_at, id) for jobs and (score, id) for candidates,
+so the index has to cover the full sort key for the seek to stay index-only.
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0003"
+down_revision: Union[str, Sequence[str], None] = "0002"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index("ix_jobs_user_id_created_at", table_name="jobs")
+    op.create_index("ix_jobs_user_id_created_at", "jobs",
+                    ["user_id", sa.text("created_at DESC"), sa.text("id DESC")])
+    op.drop_index("ix_candidates_job_id_score", table_name="candidates")
+    op.create_index("ix_candidates_job_id_score", "candidates",
+                    ["job_id", sa.text("score DESC"), sa.text("id DESC")])
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index("ix_candidates_job_id_score", table_name="candidates")
+    op.create_index("ix_candidates_job_id_score", "candidates", ["job_id", sa.text("score DESC")])
+    op.drop_index("ix_jobs_user_id_created_at", table_name="jobs")
+    op.create_index("ix_jobs_user_id_created_at", "jobs", ["user_id", sa.text("created_at DESC")])
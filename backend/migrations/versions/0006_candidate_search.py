@@ -0,0 +1,87 @@
+"""Full-text search index on candidates
+
+Postgres: a stored generated tsvector column (name > analysis > resume text) with
+a GIN index - Postgres keeps it current on every insert and update. Adding the
+column rewrites the candidates table, run it in a quiet window on big databases.
+
+SQLite (local mode): an external-content FTS5 table over the same three columns,
+kept current by triggers and backfilled with 'rebuild'.
+
+Neither is in the ORM models - search_service builds the queries, and env.py keeps
+autogenerate from trying to drop them.
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0006"
+down_revision: Union[str, Sequence[str], None] = "0005"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SQLITE_TRIGGERS = {
+    "candidates_fts_ai": """
+        CREATE TRIGGER candidates_fts_ai AFTER INSERT ON candidates BEGIN
+            INSERT INTO candidates_fts (rowid, full_name, analysis, resume_text)
+            VALUES (new.rowid, new.full_name, new.analysis, new.resume_text);
+        END
+    """,
+    "candidates_fts_ad": """
+        CREATE TRIGGER candidates_fts_ad AFTER DELETE ON candidates BEGIN
+            INSERT INTO candidates_fts (candidates_fts, rowid, full_name, analysis, resume_text)
+            VALUES ('delete', old.rowid, old.full_name, old.analysis, old.resume_text);
+        END
+    """,
+    # Only the indexed columns - status changes don't touch the index
+    "candidates_fts_au": """
+        CREATE TRIGGER candidates_fts_au AFTER UPDATE OF full_name, analysis, resume_text ON candidates BEGIN
+            INSERT INTO candidates_fts (candidates_fts, rowid, full_name, analysis, resume_text)
+            VALUES ('delete', old.rowid, old.full_name, old.analysis, old.resume_text);
+            INSERT INTO candidates_fts (rowid, full_name, analysis, resume_text)
+            VALUES (new.rowid, new.full_name, new.analysis, new.resume_text);
+        END
+    """,
+}
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("""
+            ALTER TABLE candidates ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(full_name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(analysis, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(resume_text, '')), 'C')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX ix_candidates_search_vector ON candidates USING gin (search_vector)")
+    elif dialect == "sqlite":
+        op.execute("""
+            CREATE VIRTUAL TABLE candidates_fts USING fts5(
+                full_name, analysis, resume_text,
+                content='candidates', content_rowid='rowid', tokenize='porter unicode61'
+            )
+        """)
+        for trigger in SQLITE_TRIGGERS.values():
+            op.execute(trigger)
+        op.execute("INSERT INTO candidates_fts (candidates_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    dialect = op.get_bind().dialect.name
+    if dialect == "postgresql":
+        op.execute("DROP INDEX IF EXISTS ix_candidates_search_vector")
+        op.execute("ALTER TABLE candidates DROP COLUMN IF EXISTS search_vector")
+    elif dialect == "sqlite":
+        for name in SQLITE_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS candidates_fts")
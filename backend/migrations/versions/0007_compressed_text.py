@@ -0,0 +1,229 @@
+"""Compressed resume_text, analysis and job_description
+
+The three columns become binary and hold compressed_text's format. Every existing
+row is rewritten in batches, so on a big database run this in a quiet window.
+
+The database can't read the text any more, so the full-text index stops being
+maintained by the database and search_index feeds it instead:
+
+Postgres: search_vector keeps its values but stops being a generated column. The
+binary columns are stored EXTERNAL, so TOAST doesn't try to compress them a second time.
+
+SQLite: the external-content FTS5 table and its triggers are replaced by an FTS5
+table with its own copy of the text, filled from the decompressed rows.
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+import os
+import struct
+import zlib
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0007"
+down_revision: Union[str, Sequence[str], None] = "0006"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+COLUMNS = (("candidates", "resume_text", False), ("candidates", "analysis", True), ("jobs", "job_description", False))
+
+# compressed_text's format and built-in dictionary as of this revision - frozen here so
+# later changes to the app module can't change what this migration writes or reads
+RAW = b"\x00"
+ZLIB = b"\x01"
+COMPRESSION_LEVEL = 6
+COMPRESSION_MIN_BYTES = 64
+BUILTIN_DICTIONARY = "\n".join([
+    "Bachelor of Science in Computer Science, Master of Science, University, GPA, Certified, Certification",
+    "References available upon request. Volunteer. Awards. Publications. Languages: English, Spanish",
+    "Responsible for managing, developing and maintaining, collaborated with cross-functional teams to ",
+    "Designed and implemented, improved performance by %, reduced costs by %, increased revenue by %",
+    "Led a team of engineers, mentored junior developers, stakeholders, delivered projects on time",
+    "Python, JavaScript, TypeScript, React, Node.js, SQL, PostgreSQL, AWS, Docker, Kubernetes, Git, Agile",
+    "Senior Software Engineer, Software Developer, Product Manager, Data Scientist, Project Manager",
+    "Present | January February March April May June July August September October November December",
+    "PROFESSIONAL SUMMARY\nWORK EXPERIENCE\nEXPERIENCE:\nEDUCATION:\nSKILLS:\nPROJECTS\nCERTIFICATIONS\n",
+    "**Job Title**\n**Role Summary**\n**Key Responsibilities**\n- \n**Required Qualifications**\n- ",
+    "**Nice to Have**\n- \n**Compensation & Benefits**\n**Work Location**\nRemote, Hybrid, full-time, years of experience",
+    "SCORE: \n\nMATCH ANALYSIS:\n- Skills Match: \n- Experience Match: \n- Domain Match: \n- Education Match: \n\n",
+    "STRENGTHS:\n- \nWEAKNESSES/GAPS:\n- \nRED FLAGS:\n- NONE\n\nRECOMMENDATION:\n",
+    "STRONG MATCH - interview immediately\nGOOD MATCH - consider for interview\n",
+    "WEAK MATCH - maybe as backup\nREJECT - does not meet requirements\n\nRECRUITER NOTE:\n",
+    "The candidate has experience with the team and the role, strong experience in the requirements of this position ",
+]).encode()
+BUILTIN_DICTIONARY_ID = zlib.crc32(BUILTIN_DICTIONARY)
+# Downgrading has to read rows written with trained dictionaries too
+DICT_DIR = os.getenv("COMPRESSION_DICT_DIR", os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "..", "zdicts"))
+
+
+def _dictionary(dict_id):
+    if dict_id == 0:
+        return b""
+    if dict_id == BUILTIN_DICTIONARY_ID:
+        return BUILTIN_DICTIONARY
+    path = os.path.join(DICT_DIR, f"{dict_id}.zdict")
+    if not os.path.exists(path):
+        raise RuntimeError(f"Compression dictionary {dict_id} not found in {DICT_DIR}")
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def compress(text):
+    data = text.encode()
+    if len(data) < COMPRESSION_MIN_BYTES:
+        return RAW + data
+    compressor = zlib.compressobj(COMPRESSION_LEVEL, zdict=BUILTIN_DICTIONARY)
+    packed = ZLIB + struct.pack(">I", BUILTIN_DICTIONARY_ID) + compressor.compress(data) + compressor.flush()
+    return packed if len(packed) < len(data) + 1 else RAW + data
+
+
+def decompress(value):
+    if isinstance(value, str):
+        return value    # not converted yet
+    value = bytes(value)
+    if value[:1] == RAW:
+        return value[1:].decode()
+    if value[:1] == ZLIB:
+        dictionary = _dictionary(struct.unpack(">I", value[1:5])[0])
+        decompressor = zlib.decompressobj(zdict=dictionary) if dictionary else zlib.decompressobj()
+        return (decompressor.decompress(value[5:]) + decompressor.flush()).decode()
+    raise ValueError("Unknown compressed text format")
+
+
+def recompress_column(connection, table_name, column, encode=compress, batch_size=500):
+    """Rewrite every value of table_name.column with encode(text), in keyset batches"""
+    table = sa.table(table_name, sa.column("id"), sa.column(column))
+    rows_after = sa.select(table.c.id, table.c[column]).order_by(table.c.id).limit(batch_size)
+    last = None
+    while True:
+        rows = connection.execute(rows_after if last is None else rows_after.where(table.c.id > last)).all()
+        if not rows:
+            return
+        for row_id, stored in rows:
+            if stored is not None:
+                connection.execute(sa.update(table).where(table.c.id == row_id).values({column: encode(decompress(stored))}))
+        last = rows[-1][0]
+
+
+def rebuild_sqlite_search_index(connection, batch_size=500):
+    """Fill candidates_fts with the decompressed text of every candidate"""
+    candidates = sa.table("candidates", sa.column("rowid"), sa.column("id"), sa.column("full_name"),
+                          sa.column("analysis"), sa.column("resume_text"))
+    fts = sa.table("candidates_fts", sa.column("rowid"), sa.column("full_name"), sa.column("analysis"), sa.column("resume_text"))
+    rows_after = sa.select(candidates).order_by(candidates.c.id).limit(batch_size)
+    last = None
+    while True:
+        rows = connection.execute(rows_after if last is None else rows_after.where(candidates.c.id > last)).all()
+        if not rows:
+            return
+        connection.execute(fts.insert(), [
+            {
+                "rowid": row.rowid,
+                "full_name": row.full_name,
+                "analysis": None if row.analysis is None else decompress(row.analysis),
+                "resume_text": decompress(row.resume_text)
+            }
+            for row in rows
+        ])
+        last = rows[-1].id
+
+# As created by 0006
+SQLITE_0006_TRIGGERS = {
+    "candidates_fts_ai": """
+        CREATE TRIGGER candidates_fts_ai AFTER INSERT ON candidates BEGIN
+            INSERT INTO candidates_fts (rowid, full_name, analysis, resume_text)
+            VALUES (new.rowid, new.full_name, new.analysis, new.resume_text);
+        END
+    """,
+    "candidates_fts_ad": """
+        CREATE TRIGGER candidates_fts_ad AFTER DELETE ON candidates BEGIN
+            INSERT INTO candidates_fts (candidates_fts, rowid, full_name, analysis, resume_text)
+            VALUES ('delete', old.rowid, old.full_name, old.analysis, old.resume_text);
+        END
+    """,
+    "candidates_fts_au": """
+        CREATE TRIGGER candidates_fts_au AFTER UPDATE OF full_name, analysis, resume_text ON candidates BEGIN
+            INSERT INTO candidates_fts (candidates_fts, rowid, full_name, analysis, resume_text)
+            VALUES ('delete', old.rowid, old.full_name, old.analysis, old.resume_text);
+            INSERT INTO candidates_fts (rowid, full_name, analysis, resume_text)
+            VALUES (new.rowid, new.full_name, new.analysis, new.resume_text);
+        END
+    """,
+}
+
+
+def _sqlite_alter_types(type_):
+    for table, column, nullable in COLUMNS:
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column(column, type_=type_, existing_nullable=nullable)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        op.execute("ALTER TABLE candidates ALTER COLUMN search_vector DROP EXPRESSION")
+        for table, column, _ in COLUMNS:
+            # Valid raw-format values straight away, compressed below
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE bytea USING decode('00', 'hex') || convert_to({column}, 'UTF8')")
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET STORAGE EXTERNAL")
+    elif dialect == "sqlite":
+        for name in SQLITE_0006_TRIGGERS:
+            op.execute(f"DROP TRIGGER IF EXISTS {name}")
+        op.execute("DROP TABLE IF EXISTS candidates_fts")
+
+    for table, column, _ in COLUMNS:
+        recompress_column(bind, table, column)
+
+    if dialect == "sqlite":
+        # After compressing - the batch copy CASTs, which would turn text into headerless bytes
+        _sqlite_alter_types(sa.LargeBinary())
+        op.execute("""
+            CREATE VIRTUAL TABLE candidates_fts USING fts5(
+                full_name, analysis, resume_text, tokenize='porter unicode61'
+            )
+        """)
+        rebuild_sqlite_search_index(bind)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    bind = op.get_bind()
+    dialect = bind.dialect.name
+    if dialect == "postgresql":
+        for table, column, _ in COLUMNS:
+            recompress_column(bind, table, column, encode=lambda text: RAW + text.encode())
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} TYPE text USING convert_from(substring({column} from 2), 'UTF8')")
+            op.execute(f"ALTER TABLE {table} ALTER COLUMN {column} SET STORAGE EXTENDED")
+        op.execute("DROP INDEX IF EXISTS ix_candidates_search_vector")
+        op.execute("ALTER TABLE candidates DROP COLUMN IF EXISTS search_vector")
+        op.execute("""
+            ALTER TABLE candidates ADD COLUMN search_vector tsvector GENERATED ALWAYS AS (
+                setweight(to_tsvector('english', coalesce(full_name, '')), 'A') ||
+                setweight(to_tsvector('english', coalesce(analysis, '')), 'B') ||
+                setweight(to_tsvector('english', coalesce(resume_text, '')), 'C')
+            ) STORED
+        """)
+        op.execute("CREATE INDEX ix_candidates_search_vector ON candidates USING gin (search_vector)")
+    elif dialect == "sqlite":
+        for table, column, _ in COLUMNS:
+            recompress_column(bind, table, column, encode=lambda text: text)
+        op.execute("DROP TABLE IF EXISTS candidates_fts")
+        _sqlite_alter_types(sa.Text())
+        op.execute("""
+            CREATE VIRTUAL TABLE candidates_fts USING fts5(
+                full_name, analysis, resume_text,
+                content='candidates', content_rowid='rowid', tokenize='porter unicode61'
+            )
+        """)
+        for trigger in SQLITE_0006_TRIGGERS.values():
+            op.execute(trigger)
+        op.execute("INSERT INTO candidates_fts (candidates_fts) VALUES ('rebuild')")
@@ -0,0 +1,39 @@
+"""Scoring claims on candidates
+
+POST /jobs/{id}/score-pending claims its batch (status "scoring", a claim id and
+when it was taken) before calling Morgan, so overlapping requests never score or
+bill the same candidate twice. A claim older than SCORING_CLAIM_TIMEOUT is treated
+as abandoned and can be taken again.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-19
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = "0008"
+down_revision: Union[str, Sequence[str], None] = "0007"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column("candidates", sa.Column("scoring_claim", sa.String(), nullable=True))
+    op.add_column("candidates", sa.Column("scoring_claimed_at", sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    # Anything mid-scoring goes back to the queue
+    op.execute("UPDATE candidates SET status = 'new' WHERE status = 'scoring'")
+    # Not batch mode - rebuilding candidates on SQLite would renumber the rowids
+    # candidates_fts points at. Plain DROP COLUMN needs SQLite 3.35+.
+    op.drop_column("candidates", "scoring_claimed_at")
+    op.drop_column("candidates", "scoring_claim")
@@ -1,6 +1,8 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, ForeignKey, Float, Boolean, JSON
+from sqlalchemy import Column, Integer, BigInteger, String, Text, DateTime, ForeignKey, Float, Boolean, JSON, Index, event, update, select, inspect
 from sqlalchemy.ext.declarative import declarative_base
 from sqlalchemy.orm import relationship
+from compressed_text import CompressedText
+from search_index import INDEXED_COLUMNS, index_candidate, unindex_candidate
 from datetime import datetime
 import uuid
 
@@ -37,12 +39,14 @@ class Job(Base):
     user_id = Column(String, ForeignKey("users.id"), nullable=False)
     
     title = Column(String, nullable=False)
-    job_description = Column(Text, nullable=False)
+    job_description = Column(CompressedText, nullable=False)
     requirements = Column(Text)
     status = Column(String, default="draft")
     
     created_at = Column(DateTime, default=datetime.utcnow)
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    # Bumped on every change to the job, its candidates or its postings - used for ETags
+    version = Column(Integer, nullable=False, default=0, server_default="0")
     
     user = relationship("User", back_populates="jobs")
     candidates = relationship("Candidate", back_populates="job")
@@ -63,14 +67,16 @@ class Candidate(Base):
     email = Column(String, nullable=False)
     phone = Column(String)
     
-    resume_text = Column(Text, nullable=False)
+    resume_text = Column(CompressedText, nullable=False)
     resume_file_url = Column(String)
     
     score = Column(Integer, default=0)
-    analysis = Column(Text)
+    analysis = Column(CompressedText)
     recommendation = Column(String)
     
     status = Column(String, default="new")
+    scoring_claim = Column(String)          # set while a score-pending request is scoring it
+    scoring_claimed_at = Column(DateTime)
     
     applied_at = Column(DateTime, default=datetime.utcnow)
     screened_at = Column(DateTime)
@@ -129,6 +135,66 @@ class AuditLog(Base):
     created_at = Column(DateTime, default=datetime.utcnow)
 
 
+class RateLimitCounter(Base):
+    """Shared rate limit counters - one row per key per fixed window"""
+    __tablename__ = "rate_limits"
+    
+    key = Column(String, primary_key=True)
+    window_index = Column(BigInteger, primary_key=True)
+    count = Column(Integer, nullable=False, default=0)
+    expires_at = Column(Float, nullable=False, index=True)
+
+
+# Indexes for the list queries - keep in sync with migrations/versions
+Index("ix_jobs_user_id_created_at", Job.user_id, Job.created_at.desc(), Job.id.desc())
+Index("ix_candidates_job_id_score", Candidate.job_id, Candidate.score.desc(), Candidate.id.desc())
+Index("ix_job_postings_job_id", JobPosting.job_id)
+Index("ix_audit_logs_user_id_created_at", AuditLog.user_id, AuditLog.created_at.desc())
+Index("ix_interviews_candidate_id", Interview.candidate_id)
+
+
+# Keep Job.version moving with every write that changes what the job endpoints return.
+# Done in SQL (version = version + 1) so concurrent writers never lose a bump.
+def _bump_own_version(mapper, connection, job):
+    job.version = Job.version + 1
+
+def _bump_job_version(mapper, connection, target):
+    connection.execute(update(Job).where(Job.id == target.job_id).values(version=Job.version + 1))
+
+event.listen(Job, "before_update", _bump_own_version)
+for _model in (Candidate, JobPosting):
+    for _event in ("after_insert", "after_update", "after_delete"):
+        event.listen(_model, _event, _bump_job_version)
+
+
+# The database can't read compressed candidate text, so the full-text index is fed
+# from here, in the same transaction (see search_index)
+def _search_values(connection, candidate):
+    state = inspect(candidate)
+    missing = [name for name in INDEXED_COLUMNS if name not in state.dict]
+    values = {name: state.dict.get(name) for name in INDEXED_COLUMNS}
+    if missing and state.has_identity:
+        # Not loaded (load_only) - read them rather than trigger a lazy load mid-flush
+        columns = [getattr(Candidate, name) for name in missing]
+        values.update(connection.execute(select(*columns).where(Candidate.id == candidate.id)).one()._mapping)
+    return values
+
+def _index_new_candidate(mapper, connection, candidate):
+    index_candidate(connection, candidate.id, _search_values(connection, candidate), replace=False)
+
+def _reindex_candidate(mapper, connection, candidate):
+    state = inspect(candidate)
+    if any(state.attrs[name].history.has_changes() for name in INDEXED_COLUMNS):
+        index_candidate(connection, candidate.id, _search_values(connection, candidate))
+
+def _unindex_candidate(mapper, connection, candidate):
+    unindex_candidate(connection, candidate.id)
+
+event.listen(Candidate, "after_insert", _index_new_candidate)
+event.listen(Candidate, "after_update", _reindex_candidate)
+event.listen(Candidate, "before_delete", _unindex_candidate)
+
+
 def init_database(engine):
     Base.metadata.create_all(bind=engine)
     print("Database tables created successfully")
\ No newline at end of file
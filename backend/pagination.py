@@ -0,0 +1,50 @@
+"""
+Keyset (cursor) pagination helpers
+A cursor is the sort key of the last row on the previous page, so fetching page 500
+costs the same index seek as page 1 - no OFFSET scans
+"""
+import base64
+import json
+from datetime import datetime
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+
+def encode_cursor(*values):
+    """Encode the sort key of the last row on a page into an opaque cursor"""
+    raw = json.dumps([v.isoformat() if isinstance(v, datetime) else v for v in values])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor, *types):
+    """
+    Decode a cursor back into its sort key, converting each value with the given types
+
+    Raises ValueError for malformed or tampered cursors
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode()))
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(values, list) or len(values) != len(types):
+        raise ValueError("Invalid cursor")
+
+    try:
+        return [datetime.fromisoformat(v) if t is datetime else t(v) for v, t in zip(values, types)]
+    except (TypeError, ValueError):
+        raise ValueError("Invalid cursor")
+
+
+def split_page(rows, limit, cursor_key):
+    """
+    Trim a limit + 1 row fetch down to one page
+
+    cursor_key maps the last row of the page to its sort key.
+    Returns (rows, next_cursor) - next_cursor is None on the last page.
+    """
+    if len(rows) <= limit:
+        return rows, None
+    return rows[:limit], encode_cursor(*cursor_key(rows[limit - 1]))
@@ -0,0 +1,131 @@
+"""
+Bounded process pool for bcrypt so password hashing can't starve the rest of the API
+A burst of logins or signups queues here (up to PASSWORD_POOL_MAX_QUEUE) and is then
+rejected fast with PasswordPoolBusy instead of taking every CPU
+"""
+from concurrent.futures import ProcessPoolExecutor
+from auth import hash_password, verify_and_update
+from telemetry import record_span
+import asyncio
+import multiprocessing
+import os
+import threading
+import time
+
+PASSWORD_POOL_WORKERS = int(os.getenv("PASSWORD_POOL_WORKERS", "2"))
+PASSWORD_POOL_MAX_QUEUE = int(os.getenv("PASSWORD_POOL_MAX_QUEUE", "32"))  # waiting jobs before we return 503
+
+
+class PasswordPoolBusy(Exception):
+    """Raised when the hashing queue is full - map to 503"""
+
+
+class HashMetrics:
+    """Latency of the bcrypt work itself and of the wait in the queue before it"""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.completed = 0
+        self.rejected = 0
+        self.hash_total = 0.0
+        self.hash_max = 0.0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def record(self, wait, duration):
+        with self.lock:
+            self.completed += 1
+            self.wait_total += wait
+            self.wait_max = max(self.wait_max, wait)
+            self.hash_total += duration
+            self.hash_max = max(self.hash_max, duration)
+
+    def record_rejected(self):
+        with self.lock:
+            self.rejected += 1
+
+    def snapshot(self):
+        with self.lock:
+            n = self.completed or 1
+            return {
+                "completed": self.completed,
+                "rejected": self.rejected,
+                "hash_avg_ms": round(self.hash_total / n * 1000, 3),
+                "hash_max_ms": round(self.hash_max * 1000, 3),
+                "queue_wait_avg_ms": round(self.wait_total / n * 1000, 3),
+                "queue_wait_max_ms": round(self.wait_max * 1000, 3)
+            }
+
+
+def _timed(fn, *args):
+    # Runs in the worker process - wall clock so the parent can compute queue wait
+    started = time.time()
+    result = fn(*args)
+    return started, time.time(), result
+
+
+class PasswordHasher:
+    """Admission-controlled wrapper around a dedicated ProcessPoolExecutor"""
+
+    def __init__(self, workers=PASSWORD_POOL_WORKERS, max_queue=PASSWORD_POOL_MAX_QUEUE):
+        self.workers = workers
+        self.max_queue = max_queue
+        self.metrics = HashMetrics()
+        self._executor = None
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def _get_executor(self):
+        with self._lock:
+            if self._executor is None:
+                # spawn, not fork - forking a process that runs an event loop and threads isn't safe
+                self._executor = ProcessPoolExecutor(
+                    max_workers=self.workers,
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._executor
+
+    async def _run(self, fn, *args):
+        with self._lock:
+            if self._pending >= self.workers + self.max_queue:
+                self.metrics.record_rejected()
+                raise PasswordPoolBusy("Password hashing queue is full")
+            self._pending += 1
+
+        try:
+            submitted = time.time()
+            loop = asyncio.get_running_loop()
+            started, finished, result = await loop.run_in_executor(self._get_executor(), _timed, fn, *args)
+            self.metrics.record(max(started - submitted, 0.0), finished - started)
+            record_span("bcrypt_wait", max(started - submitted, 0.0))
+            record_span("bcrypt", finished - started)
+            return result
+        finally:
+            with self._lock:
+                self._pending -= 1
+
+    async def hash(self, password):
+        return await self._run(hash_password, password)
+
+    async def verify(self, password, hashed_password):
+        """Returns (valid, new_hash) - new_hash is set when the stored hash needs upgrading"""
+        return await self._run(verify_and_update, password, hashed_password)
+
+    def stats(self):
+        with self._lock:
+            pending = self._pending
+        return {
+            "workers": self.workers,
+            "max_queue": self.max_queue,
+            "in_flight": pending,
+            **self.metrics.snapshot()
+        }
+
+    def shutdown(self):
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown(wait=False, cancel_futures=True)
+                self._executor = None
+
+
+password_hasher = PasswordHasher()
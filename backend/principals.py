@@ -0,0 +1,110 @@
+"""
+Cache of authenticated principals so auth doesn't hit the database on every request
+Entries are immutable snapshots of a user, keyed by the token subject, with TTL + LRU eviction
+"""
+from collections import OrderedDict
+from dataclasses import dataclass
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session, object_session
+from models import User
+import os
+import threading
+import time
+
+PRINCIPAL_CACHE_TTL = float(os.getenv("PRINCIPAL_CACHE_TTL", "60"))      # seconds
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))   # entries
+
+
+@dataclass(frozen=True)
+class Principal:
+    """Read-only snapshot of a user - safe to share across requests and sessions"""
+    id: str
+    email: str
+    full_name: str
+    company_name: str
+    plan: str
+    is_active: bool
+
+    @classmethod
+    def from_user(cls, user):
+        return cls(
+            id=user.id,
+            email=user.email,
+            full_name=user.full_name,
+            company_name=user.company_name,
+            plan=user.plan,
+            is_active=user.is_active
+        )
+
+
+class PrincipalCache:
+    """Thread-safe TTL + LRU cache of Principals keyed by token subject"""
+
+    def __init__(self, max_size=PRINCIPAL_CACHE_SIZE, ttl_seconds=PRINCIPAL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries = OrderedDict()   # subject -> (expires_at, principal)
+        self._lock = threading.Lock()
+
+    def get(self, subject):
+        with self._lock:
+            entry = self._entries.get(subject)
+            if entry is None:
+                return None
+            expires_at, principal = entry
+            if expires_at <= time.monotonic():
+                del self._entries[subject]
+                return None
+            self._entries.move_to_end(subject)
+            return principal
+
+    def put(self, subject, principal):
+        with self._lock:
+            self._entries[subject] = (time.monotonic() + self.ttl_seconds, principal)
+            self._entries.move_to_end(subject)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def invalidate_user(self, user_id, email=None):
+        """Drop every entry for a user (they may be cached under id and email subjects)"""
+        with self._lock:
+            for subject in [user_id, email]:
+                if subject is not None:
+                    self._entries.pop(subject, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+
+principal_cache = PrincipalCache()
+
+
+PENDING_INVALIDATIONS = "principal_invalidations"   # Session.info key
+
+
+def _queue_invalidation(mapper, connection, user):
+    # Flushed is not committed - another request could re-read and re-cache the old
+    # row before the commit lands, so just note the user until after_commit
+    subjects = object_session(user).info.setdefault(PENDING_INVALIDATIONS, set())
+    subjects.add((user.id, user.email))
+    # The user may still be cached under an email they just changed away from
+    for old_email in inspect(user).attrs.email.history.deleted or ():
+        subjects.add((user.id, old_email))
+
+
+def _invalidate_committed(session):
+    for user_id, email in session.info.pop(PENDING_INVALIDATIONS, ()):
+        principal_cache.invalidate_user(user_id, email)
+
+
+def _discard_rolled_back(session):
+    session.info.pop(PENDING_INVALIDATIONS, None)
+
+
+# Any ORM update or delete of a user (deactivation, plan change, email change)
+# evicts their cached principal in this process once it is committed
+event.listen(User, "after_update", _queue_invalidation)
+event.listen(User, "after_delete", _queue_invalidation)
+event.listen(Session, "after_commit", _invalidate_committed)
+event.listen(Session, "after_rollback", _discard_rolled_back)
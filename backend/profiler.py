@@ -0,0 +1,200 @@
+"""
+Opt-in statistical profiler for live requests
+
+A request is profiled when it carries X-Profile-Token matching PROFILE_TOKEN, or is
+picked at random with probability PROFILE_SAMPLE_RATE. While any profiled request is
+in flight a sampler thread walks its asyncio task every PROFILE_INTERVAL_MS:
+  - while the task is running, the event loop thread's real stack
+  - while it is suspended, the chain of coroutines it is awaiting in
+so the result is a wall-clock profile - time waiting on the DB or Claude shows up
+next to CPU time. Stacks are kept collapsed ("a;b;c count"), ready for flamegraph.pl
+or speedscope, in a bounded buffer of recent profiles.
+
+With nothing being profiled the cost is a header lookup per request and an idle thread.
+"""
+from collections import Counter, deque
+import asyncio
+import hmac
+import itertools
+import os
+import random
+import sys
+import threading
+import time
+
+PROFILE_TOKEN = os.getenv("PROFILE_TOKEN")                                  # unset disables header-triggered profiles and the admin endpoints
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "0"))          # fraction of requests profiled at random
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_BUFFER_SIZE = int(os.getenv("PROFILE_BUFFER_SIZE", "50"))           # recent profiles kept
+PROFILE_MAX_STACKS = int(os.getenv("PROFILE_MAX_STACKS", "5000"))           # distinct stacks kept per profile
+
+PROFILE_HEADER = "x-profile-token"
+# Never profiled - the admin and monitoring endpoints take the same token as a credential
+UNPROFILED_PATHS = ("/admin/profiles", "/health", "/metrics")
+
+
+def is_profile_token(value):
+    return bool(PROFILE_TOKEN) and value is not None and hmac.compare_digest(value, PROFILE_TOKEN)
+
+
+def _frame_label(frame):
+    code = frame.f_code
+    return f"{code.co_name} ({os.path.basename(code.co_filename)}:{frame.f_lineno})"
+
+
+class Profile:
+    """Collapsed stacks for one request"""
+
+    _ids = itertools.count(1)
+
+    def __init__(self, method, path):
+        self.id = next(self._ids)
+        self.method = method
+        self.path = path
+        self.route = None
+        self.started_at = time.time()
+        self.duration = None
+        self.samples = 0
+        self.dropped = 0
+        self.stacks = Counter()
+
+    def add(self, stack):
+        self.samples += 1
+        if stack in self.stacks or len(self.stacks) < PROFILE_MAX_STACKS:
+            self.stacks[stack] += 1
+        else:
+            self.dropped += 1
+
+    def summary(self):
+        return {
+            "id": self.id,
+            "method": self.method,
+            "route": self.route or self.path,
+            "started_at": self.started_at,
+            "duration_ms": round(self.duration * 1000, 1) if self.duration is not None else None,
+            "samples": self.samples,
+            "dropped_samples": self.dropped
+        }
+
+    def collapsed(self):
+        return "".join(f"{stack} {count}\n" for stack, count in self.stacks.most_common())
+
+
+class Sampler:
+    """Background thread that samples the tasks of profiled requests"""
+
+    def __init__(self, interval_ms=PROFILE_INTERVAL_MS, buffer_size=PROFILE_BUFFER_SIZE):
+        self.interval = interval_ms / 1000
+        self.profiles = deque(maxlen=buffer_size)   # finished, newest last
+        self._active = {}                           # profile id -> (profile, task, loop thread id)
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._thread = None
+
+    def start(self, profile, task):
+        with self._lock:
+            self._active[profile.id] = (profile, task, threading.get_ident())
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="request-profiler", daemon=True)
+                self._thread.start()
+        self._wake.set()
+
+    def stop(self, profile):
+        with self._lock:
+            self._active.pop(profile.id, None)
+            self.profiles.append(profile)
+
+    def get(self, profile_id):
+        with self._lock:
+            return next((p for p in self.profiles if p.id == profile_id), None)
+
+    def recent(self, route=None):
+        with self._lock:
+            return [p.summary() for p in reversed(self.profiles) if route is None or p.route == route]
+
+    def _run(self):
+        while True:
+            with self._lock:
+                active = list(self._active.values())
+                if not active:
+                    self._wake.clear()
+            if not active:
+                # Idle until the next profiled request - no sampling cost when off
+                self._wake.wait()
+                continue
+
+            frames = sys._current_frames()
+            for profile, task, thread_id in active:
+                profile.add(self._task_stack(task, frames.get(thread_id)))
+            time.sleep(self.interval)
+
+    def _task_stack(self, task, thread_frame):
+        # Coroutines the task is awaiting in, outermost first
+        chain = []
+        awaiting = None
+        coro = task.get_coro()
+        while coro is not None:
+            frame = getattr(coro, "cr_frame", None) or getattr(coro, "gi_frame", None)
+            if frame is None:
+                awaiting = type(coro).__name__
+                break
+            chain.append(frame)
+            coro = getattr(coro, "cr_await", None) or getattr(coro, "gi_yieldfrom", None)
+
+        labels = [_frame_label(f) for f in chain]
+        if not chain:
+            return "<no frames>"
+
+        # Running right now - the loop thread's stack continues below the innermost coroutine
+        below = []
+        frame = thread_frame
+        while frame is not None and frame is not chain[-1]:
+            below.append(frame)
+            frame = frame.f_back
+        if frame is chain[-1]:
+            labels += [_frame_label(f) for f in reversed(below)]
+        elif awaiting:
+            labels.append(f"<awaiting {awaiting}>")
+        return ";".join(labels)
+
+
+sampler = Sampler()
+
+
+class ProfilingMiddleware:
+    """
+    ASGI middleware - add it before any other middleware so it is the innermost one
+    and runs in the same task as the endpoint
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    def _wants_profile(self, scope):
+        if PROFILE_TOKEN:
+            for name, value in scope.get("headers", ()):
+                if name == PROFILE_HEADER.encode():
+                    return is_profile_token(value.decode("latin-1"))
+        return PROFILE_SAMPLE_RATE > 0 and random.random() < PROFILE_SAMPLE_RATE
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"].startswith(UNPROFILED_PATHS) or not self._wants_profile(scope):
+            await self.app(scope, receive, send)
+            return
+
+        profile = Profile(scope["method"], scope["path"])
+
+        async def send_with_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append((b"x-profile-id", str(profile.id).encode()))
+            await send(message)
+
+        started = time.perf_counter()
+        sampler.start(profile, asyncio.current_task())
+        try:
+            await self.app(scope, receive, send_with_id)
+        finally:
+            profile.duration = time.perf_counter() - started
+            route = scope.get("route")
+            profile.route = getattr(route, "path", None)
+            sampler.stop(profile)
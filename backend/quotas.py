@@ -0,0 +1,180 @@
+"""
+Per-user LLM quotas by plan
+Usage is metered in billable tokens - input tokens plus output tokens weighted by
+their price - per minute, hour and calendar month (UTC), so a budget is a cost budget.
+An agent call first reserves a worst-case estimate, then the reservation is settled
+against the usage the Anthropic API reports.
+"""
+from contextlib import asynccontextmanager
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from starlette.concurrency import run_in_threadpool
+from rate_limiter import get_rate_limit_store
+import json
+import math
+import os
+import time
+
+CHARS_PER_TOKEN = 4  # rough estimate for English prompts
+OUTPUT_TOKEN_WEIGHT = float(os.getenv("OUTPUT_TOKEN_WEIGHT", "5"))  # Sonnet output costs 5x input
+
+# Billable tokens per period - QUOTA_PLANS (JSON) overrides or adds plans
+PLAN_QUOTAS = {
+    "free": {"minute": 100_000, "hour": 500_000, "month": 5_000_000},
+    "pro": {"minute": 500_000, "hour": 5_000_000, "month": 100_000_000},
+    "enterprise": {"minute": 2_000_000, "hour": 20_000_000, "month": 1_000_000_000},
+}
+PLAN_QUOTAS.update(json.loads(os.getenv("QUOTA_PLANS", "{}")))
+DEFAULT_PLAN = "free"
+
+
+def estimate_tokens(prompt, max_tokens):
+    """Worst-case billable tokens for one call - the prompt plus every output token allowed"""
+    return len(prompt) // CHARS_PER_TOKEN + 1 + math.ceil(max_tokens * OUTPUT_TOKEN_WEIGHT)
+
+
+def billable_tokens(usage):
+    return usage.input_tokens + math.ceil(usage.output_tokens * OUTPUT_TOKEN_WEIGHT)
+
+
+def _windows(now):
+    """(period, window_index, resets_at) for each metered period"""
+    utc = datetime.fromtimestamp(now, timezone.utc)
+    month_index = utc.year * 12 + utc.month - 1
+    year, month = divmod(month_index + 1, 12)
+    return [
+        ("minute", int(now // 60), (now // 60 + 1) * 60),
+        ("hour", int(now // 3600), (now // 3600 + 1) * 3600),
+        ("month", month_index, datetime(year, month + 1, 1, tzinfo=timezone.utc).timestamp()),
+    ]
+
+
+def quota_headers(remaining, retry_after=None):
+    """Remaining-budget headers, plus Retry-After when throttled"""
+    headers = {f"X-Quota-Remaining-{period.capitalize()}": str(left) for period, left in remaining.items()}
+    if retry_after is not None:
+        headers["Retry-After"] = str(retry_after)
+    return headers
+
+
+class QuotaExceeded(Exception):
+    """Raised when a call doesn't fit in the user's plan - map to 429"""
+
+    def __init__(self, period, retry_after, remaining):
+        super().__init__(f"{period.capitalize()} LLM quota exceeded")
+        self.period = period
+        self.retry_after = retry_after
+        self.remaining = remaining
+
+
+class QuotaTooLarge(Exception):
+    """Raised when one call is bigger than a whole period of the plan - it can never fit, map to 413"""
+
+    def __init__(self, period, limit, estimate):
+        super().__init__(f"Request needs up to {estimate} billable tokens, more than the {period} LLM quota of {limit}")
+        self.period = period
+        self.limit = limit
+        self.estimate = estimate
+
+
+class Reservation:
+    """Budget held for one request, charged with the usage of each agent call made under it"""
+
+    def __init__(self, counters, estimate, remaining):
+        self.counters = counters
+        self.estimate = estimate
+        self.remaining = remaining
+        self.used = 0
+        self.calls = 0
+
+    def record(self, usage):
+        self.used += billable_tokens(usage)
+        self.calls += 1
+
+
+_current_reservation = ContextVar("quota_reservation", default=None)
+
+
+def record_usage(usage):
+    """Called by the agents after each API call - charges the active reservation, if any"""
+    reservation = _current_reservation.get()
+    if reservation is not None and usage is not None:
+        reservation.record(usage)
+
+
+class QuotaManager:
+    """Reserves and settles plan budgets in a rate limit store, so they hold across workers"""
+
+    def __init__(self, store=None, plans=PLAN_QUOTAS):
+        self._store = store
+        self.plans = plans
+
+    @property
+    def store(self):
+        return self._store if self._store is not None else get_rate_limit_store()
+
+    def _counters(self, principal, windows):
+        limits = self.plans.get(principal.plan) or self.plans[DEFAULT_PLAN]
+        # The {user id} hash tag keeps a user's counters on one Redis Cluster slot
+        counters = [
+            (f"quota:{{{principal.id}}}:{period}", window_index, limits[period], resets_at)
+            for period, window_index, resets_at in windows
+        ]
+        return limits, counters
+
+    def remaining(self, principal, now=None):
+        """Budget left in each period, without reserving any - a hint, reserve() still decides"""
+        windows = _windows(time.time() if now is None else now)
+        limits, counters = self._counters(principal, windows)
+        _, totals = self.store.reserve(counters, 0)
+        return {period: max(limits[period] - total, 0) for (period, _, _), total in zip(windows, totals)}
+
+    def reserve(self, principal, estimate, now=None):
+        now = time.time() if now is None else now
+        windows = _windows(now)
+        limits, counters = self._counters(principal, windows)
+        # Waiting wouldn't help - don't send the client into a retry loop
+        for period, _, _ in windows:
+            if estimate > limits[period]:
+                raise QuotaTooLarge(period, limits[period], estimate)
+
+        allowed, totals = self.store.reserve(counters, estimate)
+        remaining = {period: max(limits[period] - total, 0) for (period, _, _), total in zip(windows, totals)}
+        if not allowed:
+            # Retry once every period that's too full has rolled over
+            resets_at, period = max(
+                (resets_at, period)
+                for (period, _, resets_at), total in zip(windows, totals)
+                if total + estimate > limits[period]
+            )
+            raise QuotaExceeded(period, max(1, math.ceil(resets_at - now)), remaining)
+        return Reservation(counters, estimate, remaining)
+
+    def settle(self, reservation, actual):
+        """Swap the estimate for the actual usage"""
+        if actual != reservation.estimate:
+            self.store.adjust(reservation.counters, actual - reservation.estimate)
+
+    @asynccontextmanager
+    async def metered(self, principal, estimate):
+        """
+        Hold estimate for the duration of the block, then settle it with the usage
+        the agents recorded. Raises QuotaExceeded (or QuotaTooLarge) before the block runs.
+        """
+        # Shared stores do blocking I/O - keep it off the event loop
+        reservation = await run_in_threadpool(self.reserve, principal, estimate)
+        token = _current_reservation.set(reservation)
+        try:
+            yield reservation
+        except BaseException:
+            # A failed request only pays for what the API actually billed
+            await run_in_threadpool(self.settle, reservation, reservation.used)
+            raise
+        else:
+            # Calls that report no usage keep the estimate
+            await run_in_threadpool(self.settle, reservation, reservation.used if reservation.calls else reservation.estimate)
+        finally:
+            _current_reservation.reset(token)
+
+
+quota_manager = QuotaManager()
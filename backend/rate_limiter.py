@@ -1,80 +1,497 @@
 """
 Rate limiter to prevent API abuse and control Claude API costs
 Works as FastAPI dependency, not decorator
+
+Uses a sliding-window counter: per (ip, endpoint) we keep the call counts of the
+current and previous fixed windows and weight the previous one by how much of it
+still overlaps the sliding window. Each call is O(1) time and memory.
+
+Counters live in a pluggable store (RATE_LIMIT_BACKEND):
+    memory  per-process dict - limits multiply by the number of workers
+    redis   any Redis-protocol server, updated atomically by a Lua script
+    sql     a table in SQLite/Postgres - shared across workers with no extra infrastructure
+
+The same stores keep the usage counters behind the per-user LLM quotas (quotas.py).
 """
+from abc import ABC, abstractmethod
 from fastapi import Request, HTTPException
-from datetime import datetime, timedelta
-from collections import defaultdict
+import logging
+import os
 import threading
+import time
+
+NS_PER_SECOND = 1_000_000_000
+MS_PER_SECOND = 1000
+LOCK_STRIPES = int(os.getenv("RATE_LIMIT_LOCK_STRIPES", "64"))
+SWEEP_INTERVAL_SECONDS = float(os.getenv("RATE_LIMIT_SWEEP_INTERVAL", "60"))
+
+RATE_LIMIT_BACKEND = os.getenv("RATE_LIMIT_BACKEND", "memory")
+RATE_LIMIT_REDIS_URL = os.getenv("RATE_LIMIT_REDIS_URL", "redis://localhost:6379/0")
+RATE_LIMIT_DATABASE_URL = os.getenv("RATE_LIMIT_DATABASE_URL")  # defaults to DATABASE_URL
+
+logger = logging.getLogger("thinkloop.rate_limit")
+
+
+def retry_after_units(current, previous, max_calls, window, offset):
+    """
+    How long until one more call fits, in the same units as window/offset
+
+    Either the previous window's weight decays enough within this window, or we
+    have to wait for the next window - where this window's count becomes the
+    previous one, at almost full weight, and has to decay in turn.
+    """
+    if previous and current < max_calls:
+        needed = window - ((max_calls - current - 1) * window) // previous
+        return max(needed - offset, 0)
+    wait = window - offset
+    if current:
+        wait += max(window - ((max_calls - 1) * window) // current, 0)
+    return wait
+
+
+class RateLimitStore(ABC):
+    """
+    Interface for rate limit backends
+
+    hit() counts one call against key and returns (allowed, retry_after_seconds).
+    Rejected calls are not counted.
+    """
+
+    sweep_interval = SWEEP_INTERVAL_SECONDS
+    _sweeper = None
+
+    @abstractmethod
+    def hit(self, key, max_calls, window_seconds):
+        """Count one call against key if it fits, returns (allowed, retry_after_seconds)"""
+
+    @abstractmethod
+    def reserve(self, counters, amount):
+        """
+        Add amount to every counter, all or nothing
+
+        counters is a list of (key, window_index, limit, expires_at) - expires_at is a
+        unix timestamp after which the counter can be dropped. Returns (allowed, totals)
+        with each counter's total after the call, or as it was when refused.
+        """
+
+    @abstractmethod
+    def adjust(self, counters, delta):
+        """Add delta (may be negative) to counters reserved earlier, without a limit check - totals stop at 0"""
+
+    def sweep(self):
+        """Drop expired counters, returns how many were removed"""
+        return 0
+
+    def _start_sweeper(self):
+        # Background expiry so requests never pay for cleanup
+        with _sweeper_lock:
+            if self._sweeper is not None:
+                return
+
+            def run():
+                while True:
+                    time.sleep(self.sweep_interval)
+                    try:
+                        self.sweep()
+                    except Exception:
+                        logger.exception("Rate limit sweep failed")
+
+            self._sweeper = threading.Thread(target=run, name="rate-limit-sweeper", daemon=True)
+            self._sweeper.start()
+
+
+_sweeper_lock = threading.Lock()
+
+
+class InMemoryRateLimitStore(RateLimitStore):
+    """
+    Per-process sliding-window counters
+
+    Keys are spread over striped locks so unrelated clients don't contend, and a
+    background sweeper thread drops idle keys instead of doing it inline.
+    """
+
+    def __init__(self, stripes=LOCK_STRIPES, sweep_interval=SWEEP_INTERVAL_SECONDS):
+        self.stripes = stripes
+        self.sweep_interval = sweep_interval
+        self._locks = [threading.Lock() for _ in range(stripes)]
+        # Format: {key: [window_index, current_count, previous_count, window_ns]}
+        self._buckets = [{} for _ in range(stripes)]
+        # Format: {(key, window_index): [total, expires_at]}
+        self._usage = {}
+        self._usage_lock = threading.Lock()
+
+    def hit(self, key, max_calls, window_seconds, now_ns=None):
+        if self._sweeper is None:
+            self._start_sweeper()
+
+        window_ns = int(window_seconds * NS_PER_SECOND)
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        window_index, offset_ns = divmod(now_ns, window_ns)
+
+        stripe = hash(key) % self.stripes
+        with self._locks[stripe]:
+            buckets = self._buckets[stripe]
+            entry = buckets.get(key)
+            if entry is None:
+                entry = buckets[key] = [window_index, 0, 0, window_ns]
+            elif entry[0] != window_index:
+                # Roll forward - the old current window becomes previous, unless we skipped one
+                entry[2] = entry[1] if entry[0] == window_index - 1 else 0
+                entry[1] = 0
+                entry[0] = window_index
+
+            # Integer estimate of calls in the sliding window ending now
+            remaining_ns = window_ns - offset_ns
+            weighted = entry[1] * window_ns + entry[2] * remaining_ns
+            if weighted + window_ns > max_calls * window_ns:
+                wait_ns = retry_after_units(entry[1], entry[2], max_calls, window_ns, offset_ns)
+                return False, max(1, -(-wait_ns // NS_PER_SECOND))
+
+            entry[1] += 1
+            return True, 0
+
+    def reserve(self, counters, amount):
+        if self._sweeper is None:
+            self._start_sweeper()
+
+        with self._usage_lock:
+            totals = [self._usage.get((key, index), (0,))[0] for key, index, _, _ in counters]
+            if any(total + amount > limit for total, (_, _, limit, _) in zip(totals, counters)):
+                return False, totals
+            for key, index, _, expires_at in counters:
+                self._usage.setdefault((key, index), [0, expires_at])[0] += amount
+            return True, [total + amount for total in totals]
+
+    def adjust(self, counters, delta):
+        with self._usage_lock:
+            for key, index, _, expires_at in counters:
+                entry = self._usage.setdefault((key, index), [0, expires_at])
+                entry[0] = max(entry[0] + delta, 0)
+
+    def sweep(self, now_ns=None):
+        """Drop keys with no calls in the last two windows, and expired usage counters"""
+        now_ns = time.monotonic_ns() if now_ns is None else now_ns
+        removed = 0
+        for lock, buckets in zip(self._locks, self._buckets):
+            with lock:
+                stale = [key for key, entry in buckets.items() if now_ns // entry[3] - entry[0] >= 2]
+                for key in stale:
+                    del buckets[key]
+                removed += len(stale)
+
+        now = time.time()
+        with self._usage_lock:
+            expired = [key for key, entry in self._usage.items() if entry[1] < now]
+            for key in expired:
+                del self._usage[key]
+        return removed + len(expired)
+
+    def size(self):
+        return sum(len(buckets) for buckets in self._buckets)
+
+
+class RedisRateLimitStore(RateLimitStore):
+    """
+    Counters in Redis (or any Redis-protocol server), shared by every worker
+
+    The whole check-and-increment runs as one Lua script using the server's clock,
+    so it is atomic and immune to skew between app hosts. Keys expire on their own.
+    All keys for a client share a {hash tag}, so this also works on Redis Cluster.
+    """
+
+    SCRIPT = """
+local max_calls = tonumber(ARGV[1])
+local window_ms = tonumber(ARGV[2])
+local t = redis.call('TIME')
+local now_ms = tonumber(t[1]) * 1000 + math.floor(tonumber(t[2]) / 1000)
+local index = math.floor(now_ms / window_ms)
+local offset = now_ms - index * window_ms
+local current_key = KEYS[1] .. ':' .. index
+local current = tonumber(redis.call('GET', current_key) or '0')
+local previous = tonumber(redis.call('GET', KEYS[1] .. ':' .. (index - 1)) or '0')
+if current * window_ms + previous * (window_ms - offset) + window_ms > max_calls * window_ms then
+    local wait_ms = window_ms - offset
+    if previous > 0 and current < max_calls then
+        wait_ms = math.max(window_ms - math.floor((max_calls - current - 1) * window_ms / previous) - offset, 0)
+    elseif current > 0 then
+        wait_ms = wait_ms + math.max(window_ms - math.floor((max_calls - 1) * window_ms / current), 0)
+    end
+    return {0, wait_ms}
+end
+redis.call('INCR', current_key)
+redis.call('PEXPIRE', current_key, window_ms * 2)
+return {1, 0}
+"""
+
+    # KEYS: counters, ARGV: amount, then one limit per key, then one expiry per key
+    RESERVE_SCRIPT = """
+local amount = tonumber(ARGV[1])
+local n = #KEYS
+local totals = {}
+local allowed = 1
+for i = 1, n do
+    totals[i] = tonumber(redis.call('GET', KEYS[i]) or '0')
+    if totals[i] + amount > tonumber(ARGV[i + 1]) then
+        allowed = 0
+    end
+end
+if allowed == 1 then
+    for i = 1, n do
+        totals[i] = redis.call('INCRBY', KEYS[i], amount)
+        redis.call('EXPIREAT', KEYS[i], ARGV[n + i + 1])
+    end
+end
+table.insert(totals, 1, allowed)
+return totals
+"""
+
+    # KEYS: counters, ARGV: delta, then one expiry per key - totals never go below 0
+    ADJUST_SCRIPT = """
+local delta = tonumber(ARGV[1])
+for i = 1, #KEYS do
+    local total = math.max(tonumber(redis.call('GET', KEYS[i]) or '0') + delta, 0)
+    redis.call('SET', KEYS[i], total)
+    redis.call('EXPIREAT', KEYS[i], ARGV[i + 1])
+end
+return 0
+"""
+
+    def __init__(self, url=RATE_LIMIT_REDIS_URL, client=None):
+        if client is None:
+            import redis  # optional dependency, only needed for this backend
+            client = redis.Redis.from_url(url)
+        self.client = client
+        self._script = self.client.register_script(self.SCRIPT)
+        self._reserve_script = self.client.register_script(self.RESERVE_SCRIPT)
+        self._adjust_script = self.client.register_script(self.ADJUST_SCRIPT)
+
+    def hit(self, key, max_calls, window_seconds):
+        window_ms = int(window_seconds * MS_PER_SECOND)
+        allowed, wait_ms = self._script(keys=[f"rl:{{{key}}}"], args=[max_calls, window_ms])
+        if allowed:
+            return True, 0
+        return False, max(1, -(-int(wait_ms) // MS_PER_SECOND))
+
+    def _counter_key(self, key, window_index):
+        # Callers that reserve several counters at once put a {hash tag} in the key
+        return f"rl:{key}:{window_index}"
+
+    def reserve(self, counters, amount):
+        keys = [self._counter_key(key, index) for key, index, _, _ in counters]
+        args = [amount] + [limit for _, _, limit, _ in counters] + [int(expires_at) + 1 for _, _, _, expires_at in counters]
+        allowed, *totals = self._reserve_script(keys=keys, args=args)
+        return bool(allowed), [int(total) for total in totals]
+
+    def adjust(self, counters, delta):
+        keys = [self._counter_key(key, index) for key, index, _, _ in counters]
+        self._adjust_script(keys=keys, args=[delta] + [int(expires_at) + 1 for _, _, _, expires_at in counters])
+
+
+class SQLRateLimitStore(RateLimitStore):
+    """
+    Counters in the rate_limits table (SQLite or Postgres)
+
+    The current window's increment is a single conditional upsert, so concurrent
+    workers can't overshoot the limit. The previous window is closed and only read.
+    Uses the wall clock, which every worker shares.
+    """
+
+    def __init__(self, url=None, sweep_interval=SWEEP_INTERVAL_SECONDS):
+        from database import DATABASE_URL, build_engine
+        from models import RateLimitCounter
+
+        url = url or RATE_LIMIT_DATABASE_URL or DATABASE_URL
+        overrides = {"connect_args": {"check_same_thread": False, "timeout": 30}} if url.startswith("sqlite") else {}
+        self.engine = build_engine(url, **overrides)
+        self.table = RateLimitCounter.__table__
+        self.sweep_interval = sweep_interval
+        self._table_ready = False
+
+        if self.engine.dialect.name == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert
+        self._insert = insert
+
+    def create_table(self):
+        """
+        Create rate_limits if it's missing - the migrations normally own it, this covers a
+        separate RATE_LIMIT_DATABASE_URL. Runs on first use so importing never needs the database.
+        """
+        with _sweeper_lock:
+            if not self._table_ready:
+                self.table.create(self.engine, checkfirst=True)
+                self._table_ready = True
+
+    def _start_sweeper(self):
+        self.create_table()
+        super()._start_sweeper()
+
+    def hit(self, key, max_calls, window_seconds, now=None):
+        from sqlalchemy import select
+
+        if self._sweeper is None:
+            self._start_sweeper()
+
+        table = self.table
+        window_ms = int(window_seconds * MS_PER_SECOND)
+        now_ms = int((time.time() if now is None else now) * MS_PER_SECOND)
+        window_index, offset_ms = divmod(now_ms, window_ms)
+        remaining_ms = window_ms - offset_ms
+
+        with self.engine.begin() as conn:
+            counts = dict(conn.execute(
+                select(table.c.window_index, table.c.count)
+                .where(table.c.key == key, table.c.window_index.in_([window_index - 1, window_index]))
+            ).all())
+            current = counts.get(window_index, 0)
+            previous = counts.get(window_index - 1, 0)
+            previous_weight = previous * remaining_ms
+
+            if current * window_ms + previous_weight + window_ms > max_calls * window_ms:
+                return False, self._retry_after(current, previous, max_calls, window_ms, offset_ms)
+
+            # Re-check the limit inside the upsert in case another worker got there first
+            expires_at = (window_index + 2) * window_ms / MS_PER_SECOND
+            stmt = self._upsert(key, window_index, 1, expires_at).on_conflict_do_update(
+                index_elements=[table.c.key, table.c.window_index],
+                set_={"count": table.c.count + 1},
+                where=(table.c.count * window_ms + previous_weight + window_ms <= max_calls * window_ms)
+            ).returning(table.c.count)
+
+            if conn.execute(stmt).first() is None:
+                return False, self._retry_after(current + 1, previous, max_calls, window_ms, offset_ms)
+            return True, 0
+
+    def _upsert(self, key, window_index, amount, expires_at):
+        return self._insert(self.table).values(
+            key=key,
+            window_index=window_index,
+            count=amount,
+            expires_at=expires_at
+        )
+
+    def reserve(self, counters, amount):
+        from sqlalchemy import select
+
+        if self._sweeper is None:
+            self._start_sweeper()
+
+        table = self.table
+        with self.engine.connect() as conn:
+            # A new row skips the upsert's WHERE, so check that case up front
+            if all(amount <= limit for _, _, limit, _ in counters):
+                with conn.begin() as transaction:
+                    totals = []
+                    for key, window_index, limit, expires_at in counters:
+                        stmt = self._upsert(key, window_index, amount, expires_at).on_conflict_do_update(
+                            index_elements=[table.c.key, table.c.window_index],
+                            set_={"count": table.c.count + amount},
+                            where=(table.c.count + amount <= limit)
+                        ).returning(table.c.count)
+                        row = conn.execute(stmt).first()
+                        if row is None:
+                            transaction.rollback()
+                            break
+                        totals.append(row[0])
+                    else:
+                        return True, totals
+
+            totals = []
+            for key, window_index, _, _ in counters:
+                totals.append(conn.execute(
+                    select(table.c.count).where(table.c.key == key, table.c.window_index == window_index)
+                ).scalar() or 0)
+            conn.rollback()
+            return False, totals
+
+    def adjust(self, counters, delta):
+        from sqlalchemy import case
+
+        table = self.table
+        # Clamped at 0 like the other stores - refunding more than was reserved mustn't grant extra quota
+        adjusted = case((table.c.count + delta < 0, 0), else_=table.c.count + delta)
+        with self.engine.begin() as conn:
+            for key, window_index, _, expires_at in counters:
+                conn.execute(self._upsert(key, window_index, max(delta, 0), expires_at).on_conflict_do_update(
+                    index_elements=[table.c.key, table.c.window_index],
+                    set_={"count": adjusted}
+                ))
+
+    def _retry_after(self, current, previous, max_calls, window_ms, offset_ms):
+        wait_ms = retry_after_units(current, previous, max_calls, window_ms, offset_ms)
+        return max(1, -(-wait_ms // MS_PER_SECOND))
+
+    def sweep(self):
+        with self.engine.begin() as conn:
+            result = conn.execute(self.table.delete().where(self.table.c.expires_at < time.time()))
+            return result.rowcount
+
+
+RATE_LIMIT_BACKENDS = {
+    "memory": InMemoryRateLimitStore,
+    "redis": RedisRateLimitStore,
+    "sql": SQLRateLimitStore,
+}
+
+
+def build_rate_limit_store(backend=RATE_LIMIT_BACKEND):
+    if backend not in RATE_LIMIT_BACKENDS:
+        raise ValueError(f"Unknown rate limit backend: {backend}")
+    return RATE_LIMIT_BACKENDS[backend]()
+
+
+# Created on first use - the redis and sql backends build a client or an engine
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_rate_limit_store():
+    """Return the configured rate limit store (created on first use)"""
+    global _store
+    if _store is None:
+        with _store_lock:
+            if _store is None:
+                _store = build_rate_limit_store()
+    return _store
 
-# In-memory storage for rate limits
-# Format: {ip_address: {endpoint: [(timestamp1), (timestamp2), ...]}}
-rate_limit_store = defaultdict(lambda: defaultdict(list))
-store_lock = threading.Lock()
-
-def clean_old_entries():
-    """Remove entries older than 1 hour to prevent memory bloat"""
-    with store_lock:
-        current_time = datetime.now()
-        for ip in list(rate_limit_store.keys()):
-            for endpoint in list(rate_limit_store[ip].keys()):
-                rate_limit_store[ip][endpoint] = [
-                    ts for ts in rate_limit_store[ip][endpoint]
-                    if current_time - ts < timedelta(hours=1)
-                ]
-                if not rate_limit_store[ip][endpoint]:
-                    del rate_limit_store[ip][endpoint]
-            if not rate_limit_store[ip]:
-                del rate_limit_store[ip]
 
 class RateLimiter:
     """
     Rate limiter as FastAPI dependency
-    
+
     Usage in endpoint:
         @app.post("/signup")
         def signup(request: Request, limiter: None = Depends(RateLimiter(max_calls=5, window_seconds=3600))):
             ...
     """
-    
-    def __init__(self, max_calls: int, window_seconds: int):
+
+    def __init__(self, max_calls: int, window_seconds: int, store=None):
         self.max_calls = max_calls
         self.window_seconds = window_seconds
-    
+        self._store = store
+
+    @property
+    def store(self):
+        return self._store if self._store is not None else get_rate_limit_store()
+
     def __call__(self, request: Request):
         # Get client IP
         client_ip = request.client.host if request.client else "unknown"
         endpoint = request.url.path
-        
-        # Clean old entries periodically
-        if len(rate_limit_store) > 100:
-            clean_old_entries()
-        
-        current_time = datetime.now()
-        window_start = current_time - timedelta(seconds=self.window_seconds)
-        
-        with store_lock:
-            # Get call history for this IP and endpoint
-            call_history = rate_limit_store[client_ip][endpoint]
-            
-            # Remove calls outside the window
-            call_history = [ts for ts in call_history if ts > window_start]
-            rate_limit_store[client_ip][endpoint] = call_history
-            
-            # Check if limit exceeded
-            if len(call_history) >= self.max_calls:
-                raise HTTPException(
-                    status_code=429,
-                    detail=f"Rate limit exceeded. Max {self.max_calls} calls per {self.window_seconds} seconds. Try again later."
-                )
-            
-            # Add current call
-            rate_limit_store[client_ip][endpoint].append(current_time)
-        
+
+        allowed, retry_after = self.store.hit(f"{client_ip}:{endpoint}", self.max_calls, self.window_seconds)
+        if not allowed:
+            raise HTTPException(
+                status_code=429,
+                detail=f"Rate limit exceeded. Max {self.max_calls} calls per {self.window_seconds} seconds. Try again later.",
+                headers={"Retry-After": str(retry_after)}
+            )
+
         return None
 
 # Pre-configured rate limiters for common use cases
 signup_limiter = RateLimiter(max_calls=5, window_seconds=3600)  # 5 per hour
 login_limiter = RateLimiter(max_calls=10, window_seconds=300)   # 10 per 5 min
-job_limiter = RateLimiter(max_calls=20, window_seconds=3600)    # 20 per hour
-candidate_limiter = RateLimiter(max_calls=50, window_seconds=3600)  # 50 per hour
\ No newline at end of file
+# Jobs and candidates are limited per user by LLM usage instead - see quotas.py
@@ -0,0 +1,215 @@
+"""
+Server-side cache of rendered JSON responses for hot read endpoints
+Entries are keyed by (user, route, params) and tagged with the jobs they depend on.
+Writes in the services invalidate a tag by giving it a new generation token - every
+key built with the old token simply stops being read, so nothing has to be scanned,
+and a reader that loaded old rows before the write can't repopulate the new key.
+Routes also put the row version they just read (Job.version) in the key, so a write
+made through another worker - whose generation bump a per-process backend never
+sees - is a miss right away instead of after the TTL.
+
+Backends (RESPONSE_CACHE_BACKEND):
+    memory  per-process TTL + LRU dict - other workers' writes are caught by the version in the key
+    redis   shared by every worker, entries and generations expire via SET EX (let maxmemory-policy do LRU)
+    off     no caching
+"""
+from collections import OrderedDict
+from starlette.concurrency import run_in_threadpool
+import hashlib
+import os
+import threading
+import time
+import uuid
+
+RESPONSE_CACHE_BACKEND = os.getenv("RESPONSE_CACHE_BACKEND", "memory")
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL", "30"))       # seconds
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE", "2000"))     # entries, memory backend
+RESPONSE_CACHE_REDIS_URL = os.getenv("RESPONSE_CACHE_REDIS_URL", "redis://localhost:6379/1")
+RESPONSE_CACHE_GENERATION_TTL = float(os.getenv("RESPONSE_CACHE_GENERATION_TTL", "86400"))  # seconds, outlives every entry
+
+
+def job_tag(job_id):
+    return f"job:{job_id}"
+
+
+class CacheMetrics:
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.invalidations = 0
+
+    def record(self, hit):
+        with self.lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def snapshot(self):
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+                "stores": self.stores,
+                "invalidations": self.invalidations
+            }
+
+
+class InMemoryCacheBackend:
+    """Thread-safe TTL + LRU dict - generation tokens share the same LRU bound"""
+
+    name = "memory"
+    blocking = False
+
+    def __init__(self, max_size=RESPONSE_CACHE_SIZE):
+        self.max_size = max_size
+        self._entries = OrderedDict()   # key -> (expires_at, value)
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl if ttl else None, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def add(self, key, value, ttl=None):
+        """Set key unless it exists, returns the stored value"""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+                self._entries.move_to_end(key)
+                return entry[1]
+        self.set(key, value, ttl)
+        return value
+
+    def size(self):
+        return len(self._entries)
+
+
+class RedisCacheBackend:
+    """Cache entries and generation tokens in Redis, shared across workers"""
+
+    name = "redis"
+    blocking = True
+
+    def __init__(self, url=RESPONSE_CACHE_REDIS_URL, client=None):
+        if client is None:
+            import redis  # optional dependency, only needed for this backend
+            client = redis.Redis.from_url(url)
+        self.client = client
+
+    def get(self, key):
+        return self.client.get(key)
+
+    def set(self, key, value, ttl=None):
+        self.client.set(key, value, ex=max(int(ttl), 1) if ttl else None)
+
+    def add(self, key, value, ttl=None):
+        if self.client.set(key, value, nx=True, ex=max(int(ttl), 1) if ttl else None):
+            return value
+        existing = self.client.get(key)
+        return existing.decode() if existing else value
+
+    def size(self):
+        return self.client.dbsize()
+
+
+class ResponseCache:
+    """Rendered responses plus the ETag they were served with"""
+
+    def __init__(self, backend, ttl_seconds=RESPONSE_CACHE_TTL, generation_ttl=RESPONSE_CACHE_GENERATION_TTL):
+        self.backend = backend
+        self.ttl_seconds = ttl_seconds
+        # An expired generation just gets a fresh token, which only drops entries early
+        self.generation_ttl = max(generation_ttl, ttl_seconds)
+        self.metrics = CacheMetrics()
+
+    async def _call(self, fn, *args):
+        if self.backend is None:
+            return None
+        if self.backend.blocking:
+            return await run_in_threadpool(fn, *args)
+        return fn(*args)
+
+    def _key(self, user_id, route, params, tags, version):
+        # Generations are read before the database is, see the module docstring
+        generations = [self.backend.add(f"gen:{tag}", uuid.uuid4().hex, self.generation_ttl) for tag in tags]
+        raw = "|".join([user_id, route, params, str(version), *map(str, generations)])
+        return "resp:" + hashlib.sha1(raw.encode()).hexdigest()
+
+    async def key(self, user_id, request, tags, version=None):
+        """Cache key for this user, request and version of the data - None when caching is off"""
+        params = "&".join(f"{k}={v}" for k, v in sorted(request.query_params.multi_items()))
+        return await self._call(self._key, user_id, request.url.path, params, tags, version)
+
+    def _get(self, key):
+        value = self.backend.get(key)
+        if value is None:
+            return None
+        etag, _, body = value.partition(b"\n")
+        return etag.decode(), body
+
+    async def get(self, key):
+        """(etag, body) or None"""
+        if key is None:
+            return None
+        hit = await self._call(self._get, key)
+        self.metrics.record(hit is not None)
+        return hit
+
+    async def set(self, key, etag, body):
+        if key is None:
+            return
+        await self._call(self.backend.set, key, etag.encode() + b"\n" + body, self.ttl_seconds)
+        with self.metrics.lock:
+            self.metrics.stores += 1
+
+    def invalidate(self, *tags):
+        """Drop every cached response that depends on these tags"""
+        if self.backend is None:
+            return
+        for tag in tags:
+            self.backend.set(f"gen:{tag}", uuid.uuid4().hex, self.generation_ttl)
+        with self.metrics.lock:
+            self.metrics.invalidations += len(tags)
+
+    async def invalidate_async(self, *tags):
+        await self._call(self.invalidate, *tags)
+
+    def stats(self):
+        return {
+            "backend": self.backend.name if self.backend else "off",
+            "ttl_seconds": self.ttl_seconds,
+            "entries": self.backend.size() if self.backend else 0,
+            **self.metrics.snapshot()
+        }
+
+
+def build_response_cache(backend=RESPONSE_CACHE_BACKEND):
+    if backend == "memory":
+        return ResponseCache(InMemoryCacheBackend())
+    if backend == "redis":
+        return ResponseCache(RedisCacheBackend())
+    if backend == "off":
+        return ResponseCache(None)
+    raise ValueError(f"Unknown response cache backend: {backend}")
+
+
+response_cache = build_response_cache()
@@ -1,9 +1,13 @@
-import PyPDF2
-import docx
 import io
+from telemetry import span
+
+# PyPDF2 and python-docx are imported on first use, they are slow to import
+# and most requests never parse a resume
 
 def extract_text_from_pdf(file_bytes):
     """Extract text from PDF file"""
+    import PyPDF2
+
     try:
         pdf_file = io.BytesIO(file_bytes)
         pdf_reader = PyPDF2.PdfReader(pdf_file)
@@ -18,6 +22,8 @@ def extract_text_from_pdf(file_bytes):
 
 def extract_text_from_docx(file_bytes):
     """Extract text from Word document"""
+    import docx
+
     try:
         doc_file = io.BytesIO(file_bytes)
         doc = docx.Document(doc_file)
@@ -34,9 +40,10 @@ def parse_resume_file(filename, file_bytes):
     """Parse resume based on file type"""
     filename_lower = filename.lower()
     
-    if filename_lower.endswith('.pdf'):
-        return extract_text_from_pdf(file_bytes)
-    elif filename_lower.endswith('.docx') or filename_lower.endswith('.doc'):
-        return extract_text_from_docx(file_bytes)
-    else:
-        return None
\ No newline at end of file
+    with span("parse"):
+        if filename_lower.endswith('.pdf'):
+            return extract_text_from_pdf(file_bytes)
+        elif filename_lower.endswith('.docx') or filename_lower.endswith('.doc'):
+            return extract_text_from_docx(file_bytes)
+        else:
+            return None
\ No newline at end of file
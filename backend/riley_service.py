@@ -1,25 +1,23 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
+from starlette.concurrency import run_in_threadpool
 from models import JobPosting
 from agents import RileyAgent
+from database import release_connection
+from response_cache import response_cache, job_tag
 import uuid
 from datetime import datetime
 
 riley = RileyAgent()
 
-def post_job_with_riley(db: Session, job_id: str, job_title: str, job_description: str, boards: list = None):
-    """Post job using Riley and save posting records"""
-    
-    if boards is None:
-        boards = ['LinkedIn', 'Indeed', 'Dice', 'Stack Overflow']
-    
-    # Riley posts (simulated for now)
-    posting_results = riley.post_job(job_title, job_description, boards)
-    
-    # Save each posting to database
-    saved_postings = []
+DEFAULT_BOARDS = ['LinkedIn', 'Indeed', 'Dice', 'Stack Overflow']
+
+def _postings_from_results(job_id: str, posting_results: list):
+    postings = []
     for result in posting_results:
         if result['status'] == 'posted':
-            posting = JobPosting(
+            postings.append(JobPosting(
                 id=str(uuid.uuid4()),
                 job_id=job_id,
                 board=result['board'],
@@ -27,17 +25,10 @@ def post_job_with_riley(db: Session, job_id: str, job_title: str, job_descriptio
                 views=result['views'],
                 applications=result['applications'],
                 posted_at=datetime.utcnow()
-            )
-            db.add(posting)
-            saved_postings.append(posting)
-    
-    db.commit()
-    return saved_postings
+            ))
+    return postings
 
-def get_job_posting_stats(db: Session, job_id: str):
-    """Get posting performance for a job"""
-    postings = db.query(JobPosting).filter(JobPosting.job_id == job_id).all()
-    
+def _posting_stats(postings: list):
     total_views = sum(p.views for p in postings)
     total_applications = sum(p.applications for p in postings)
     
@@ -54,4 +45,50 @@ def get_job_posting_stats(db: Session, job_id: str):
         ],
         'total_views': total_views,
         'total_applications': total_applications
-    }
\ No newline at end of file
+    }
+
+def post_job_with_riley(db: Session, job_id: str, job_title: str, job_description: str, boards: list = None):
+    """Post job using Riley and save posting records"""
+    
+    if boards is None:
+        boards = DEFAULT_BOARDS
+    
+    # Riley posts (simulated for now)
+    posting_results = riley.post_job(job_title, job_description, boards)
+    
+    # Save each posting to database
+    saved_postings = _postings_from_results(job_id, posting_results)
+    db.add_all(saved_postings)
+    
+    db.commit()
+    response_cache.invalidate(job_tag(job_id))
+    return saved_postings
+
+def get_job_posting_stats(db: Session, job_id: str):
+    """Get posting performance for a job"""
+    postings = db.query(JobPosting).filter(JobPosting.job_id == job_id).all()
+    return _posting_stats(postings)
+
+
+# Async versions for the API routes
+
+async def post_job_with_riley_async(db: AsyncSession, job_id: str, job_title: str, job_description: str, boards: list = None):
+    """Post job using Riley and save posting records"""
+    if boards is None:
+        boards = DEFAULT_BOARDS
+    
+    # Riley's board calls are blocking - run them off the event loop
+    await release_connection(db)
+    posting_results = await run_in_threadpool(riley.post_job, job_title, job_description, boards)
+    
+    saved_postings = _postings_from_results(job_id, posting_results)
+    db.add_all(saved_postings)
+    
+    await db.commit()
+    await response_cache.invalidate_async(job_tag(job_id))
+    return saved_postings
+
+async def get_job_posting_stats_async(db: AsyncSession, job_id: str):
+    """Get posting performance for a job"""
+    postings = (await db.scalars(select(JobPosting).where(JobPosting.job_id == job_id))).all()
+    return _posting_stats(postings)
@@ -0,0 +1,81 @@
+"""
+Keeps the candidate full-text index current from the application
+
+Candidate text is stored compressed (migration 0007), so neither a generated column
+nor a trigger can read it any more. models.py calls these from its flush events with
+the plain text the ORM still has in hand:
+
+    Postgres   candidates.search_vector, a plain tsvector column (GIN indexed)
+    SQLite     candidates_fts, an FTS5 table holding its own copy of the text
+
+Bulk Core inserts and updates skip the ORM events - run `python search_index.py
+rebuild` after writing candidates that way.
+"""
+import sys
+
+from sqlalchemy import text
+
+SEARCH_CONFIG = "english"                                   # Postgres text search configuration
+INDEXED_COLUMNS = ("full_name", "analysis", "resume_text")  # weights A, B, C / FTS5 column order
+
+POSTGRES_UPDATE = text(f"""
+    UPDATE candidates SET search_vector =
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(:full_name, '')), 'A') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(:analysis, '')), 'B') ||
+        setweight(to_tsvector('{SEARCH_CONFIG}', coalesce(:resume_text, '')), 'C')
+    WHERE id = :id
+""")
+
+SQLITE_DELETE = text("DELETE FROM candidates_fts WHERE rowid = (SELECT rowid FROM candidates WHERE id = :id)")
+SQLITE_INSERT = text("""
+    INSERT INTO candidates_fts (rowid, full_name, analysis, resume_text)
+    SELECT rowid, :full_name, :analysis, :resume_text FROM candidates WHERE id = :id
+""")
+
+
+def index_candidate(connection, candidate_id, values, replace=True):
+    """Index (or re-index) one candidate - values maps INDEXED_COLUMNS to plain text"""
+    params = {"id": candidate_id, **{name: values.get(name) for name in INDEXED_COLUMNS}}
+    dialect = connection.dialect.name
+    if dialect == "postgresql":
+        connection.execute(POSTGRES_UPDATE, params)
+    elif dialect == "sqlite":
+        if replace:
+            connection.execute(SQLITE_DELETE, {"id": candidate_id})
+        connection.execute(SQLITE_INSERT, params)
+
+
+def unindex_candidate(connection, candidate_id):
+    """Drop a candidate from the index - call before its row is deleted"""
+    if connection.dialect.name == "sqlite":
+        connection.execute(SQLITE_DELETE, {"id": candidate_id})
+
+
+def rebuild(connection, batch_size=500):
+    """Re-index every candidate, returns how many"""
+    from sqlalchemy import select
+    from models import Candidate
+
+    if connection.dialect.name == "sqlite":
+        connection.execute(text("DELETE FROM candidates_fts"))
+    indexed, last = 0, None
+    while True:
+        stmt = select(Candidate.id, Candidate.full_name, Candidate.analysis, Candidate.resume_text)\
+            .order_by(Candidate.id).limit(batch_size)
+        if last is not None:
+            stmt = stmt.where(Candidate.id > last)
+        rows = connection.execute(stmt).all()
+        if not rows:
+            return indexed
+        for row in rows:
+            index_candidate(connection, row.id, row._mapping, replace=False)
+        indexed += len(rows)
+        last = rows[-1].id
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] != ["rebuild"]:
+        sys.exit("Usage: python search_index.py rebuild")
+    from database import engine
+    with engine.begin() as connection:
+        print(f"Indexed {rebuild(connection)} candidates")
@@ -0,0 +1,132 @@
+"""
+Full-text search across all of a user's candidates
+
+Postgres matches against the candidates.search_vector column (GIN indexed),
+SQLite against the candidates_fts FTS5 table - both kept current by search_index.
+Results are ranked by relevance, paged by a (relevance, id) cursor and come with a
+short snippet of the best matching text, matches wrapped in <mark></mark>.
+Snippets are raw resume text - escape them before rendering as HTML.
+"""
+from types import SimpleNamespace
+import re
+from sqlalchemy import select, func, literal_column, tuple_, table, column
+from sqlalchemy.ext.asyncio import AsyncSession
+from models import Candidate, Job
+from pagination import decode_cursor, split_page
+from search_index import SEARCH_CONFIG
+
+SNIPPET_WORDS = 16
+MARK_START, MARK_END = "<mark>", "</mark>"
+
+# FTS5 bm25 column weights, in table order - mirrors the A/B/C weights used on Postgres
+FTS_WEIGHTS = (10.0, 4.0, 1.0)      # full_name, analysis, resume_text
+
+
+def fts5_query(query: str):
+    """
+    Plain words for FTS5 - every term quoted so user input can't inject FTS syntax,
+    terms are ANDed. None if the query has no words at all.
+    """
+    terms = re.findall(r"\w+", query)
+    return " ".join(f'"{term}"' for term in terms) or None
+
+
+def _stem(term: str):
+    # Close enough to the english stemmer for highlighting: engineering -> engineer
+    return term[:max(4, len(term) - 3)] if len(term) > 4 else term
+
+
+def headline(text: str, query: str, words: int = SNIPPET_WORDS):
+    """
+    The words around the first match in text, matches marked - stands in for ts_headline,
+    which can't read the compressed resume text
+    """
+    terms = [_stem(term) for term in re.findall(r"\w+", query.lower()) if term not in ("or", "and")]
+
+    def matches(token):
+        word = re.sub(r"\W+", "", token.lower())
+        return bool(word) and any(word.startswith(term) for term in terms)
+
+    tokens = (text or "").split()
+    first = next((i for i, token in enumerate(tokens) if matches(token)), 0)
+    start = max(0, first - words // 4)
+    window = tokens[start:start + words]
+    snippet = " ".join(f"{MARK_START}{token}{MARK_END}" if matches(token) else token for token in window)
+    return ("…" if start > 0 else "") + snippet + ("…" if start + words < len(tokens) else "")
+
+
+def _postgres_parts(query: str):
+    tsquery = func.websearch_to_tsquery(SEARCH_CONFIG, query)
+    vector = literal_column("candidates.search_vector")
+    relevance = func.ts_rank_cd(vector, tsquery)
+    # The snippet is built in Python from the page's resume text, see headline()
+    return vector.op("@@")(tsquery), relevance, Candidate.resume_text, None
+
+
+def _sqlite_parts(query: str):
+    fts = table("candidates_fts", column("rowid"))
+    fts_ref = literal_column("candidates_fts")
+    # bm25 is lower-is-better, flip it so both backends sort relevance descending
+    relevance = -func.bm25(fts_ref, *FTS_WEIGHTS)
+    snippet = func.snippet(fts_ref, -1, MARK_START, MARK_END, "…", SNIPPET_WORDS)
+    join = (fts, fts.c.rowid == literal_column("candidates.rowid"))
+    return fts_ref.match(fts5_query(query)), relevance, snippet, join
+
+
+def _search_stmt(dialect: str, user_id: str, query: str, limit: int, cursor: str = None):
+    """
+    Rank the user's matching candidates, take one page, then add job titles and
+    snippets for just that page - only the page's resume text is read and decompressed
+    """
+    if dialect == "postgresql":
+        match, relevance, snippet, fts_join = _postgres_parts(query)
+    elif dialect == "sqlite":
+        match, relevance, snippet, fts_join = _sqlite_parts(query)
+    else:
+        raise NotImplementedError(f"Candidate search isn't supported on {dialect}")
+
+    ranked = select(Candidate.id, relevance.label("relevance"))
+    if fts_join is not None:
+        ranked = ranked.select_from(Candidate).join(*fts_join)
+    ranked = ranked.join(Job, Candidate.job_id == Job.id)\
+        .where(match, Job.user_id == user_id)\
+        .subquery()
+
+    page = select(ranked)
+    if cursor:
+        relevance_after, id_after = decode_cursor(cursor, float, str)
+        page = page.where(tuple_(ranked.c.relevance, ranked.c.id) < tuple_(relevance_after, id_after))
+    page = page.order_by(ranked.c.relevance.desc(), ranked.c.id.desc()).limit(limit + 1).subquery()
+
+    stmt = select(
+        Candidate.id, Candidate.job_id, Job.title.label("job_title"), Candidate.full_name, Candidate.email,
+        Candidate.score, Candidate.recommendation, Candidate.status, Candidate.applied_at,
+        page.c.relevance, snippet.label("snippet")
+    ).select_from(page).join(Candidate, Candidate.id == page.c.id).join(Job, Candidate.job_id == Job.id)
+    if fts_join is not None:
+        # snippet() only works alongside a MATCH on the FTS table
+        stmt = stmt.join(*fts_join).where(match)
+    return stmt.order_by(page.c.relevance.desc(), page.c.id.desc())
+
+
+def _search_cursor_key(row):
+    return row.relevance, row.id
+
+
+async def search_candidates_async(db: AsyncSession, user_id: str, query: str, limit: int, cursor: str = None):
+    """
+    One page of the user's candidates matching query, best match first
+
+    Returns (rows, next_cursor) - next_cursor is None on the last page.
+    Raises ValueError for an invalid cursor, NotImplementedError on a database
+    other than Postgres or SQLite.
+    """
+    dialect = db.bind.dialect.name
+    if dialect == "sqlite" and fts5_query(query) is None:
+        return [], None
+    stmt = _search_stmt(dialect, user_id, query, limit, cursor)
+    rows = (await db.execute(stmt)).all()
+    if dialect == "postgresql":
+        # The snippet column holds the resume text - swap in its headline
+        rows = [SimpleNamespace(**{**row._mapping, "snippet": headline(row.snippet, query)}) for row in rows]
+    return split_page(rows, limit, _search_cursor_key)
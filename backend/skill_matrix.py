@@ -0,0 +1,129 @@
+"""
+Cheap skill-overlap pre-rank - orders unscored candidates before Morgan sees them
+
+A fixed skill vocabulary is matched against resumes (one regex pass each) into a
+candidates x skills 0/1 matrix, and against the job description into a weighted skill
+vector - skills on "required"/"must have" lines, or in bullets under a heading like
+**Required Qualifications**, count double, "nice to have" ones half.
+The weights sum to 1, so ranking every candidate for a job is one matrix-vector product
+and each score is the weighted share of the job's skills the resume mentions, 0-100 -
+the same scale as Morgan's score, which replaces it once the candidate is screened.
+"""
+from collections import Counter
+import math
+import re
+
+import numpy as np
+
+# skill -> spellings, matched case-insensitively as whole words - no spellings that are
+# also everyday English ("rest", "excel", "node"), they would match half the resumes
+SKILLS = {
+    "python": ["python"], "java": ["java"], "javascript": ["javascript", "js", "ecmascript"],
+    "typescript": ["typescript"], "go": ["golang"], "rust": ["rust"], "c++": ["c++", "cpp"],
+    "c#": ["c#", "csharp"], "ruby": ["ruby"], "php": ["php"], "kotlin": ["kotlin"], "swift": ["swift"],
+    "scala": ["scala"], "sql": ["sql"], "bash": ["bash", "shell scripting"],
+    "react": ["react", "react.js", "reactjs"], "vue": ["vue", "vue.js", "vuejs"], "angular": ["angular"],
+    "node.js": ["node.js", "nodejs"], "html": ["html", "html5"], "css": ["css", "css3", "sass", "scss"],
+    "django": ["django"], "flask": ["flask"], "fastapi": ["fastapi"], "spring": ["spring boot", "spring framework"],
+    "rails": ["rails", "ruby on rails"], ".net": [".net", "dotnet", "asp.net"], "graphql": ["graphql"],
+    "rest": ["restful", "rest api", "rest apis"],
+    "postgresql": ["postgres", "postgresql"], "mysql": ["mysql"], "mongodb": ["mongodb", "mongo"],
+    "redis": ["redis"], "elasticsearch": ["elasticsearch", "opensearch"], "kafka": ["kafka"],
+    "rabbitmq": ["rabbitmq"], "snowflake": ["snowflake"], "bigquery": ["bigquery"],
+    "spark": ["spark", "pyspark"], "airflow": ["airflow"], "dbt": ["dbt"], "hadoop": ["hadoop"],
+    "pandas": ["pandas"], "numpy": ["numpy"], "tableau": ["tableau"], "power bi": ["power bi", "powerbi"],
+    "machine learning": ["machine learning", "ml"], "deep learning": ["deep learning"],
+    "pytorch": ["pytorch"], "tensorflow": ["tensorflow"], "scikit-learn": ["scikit-learn", "sklearn"],
+    "nlp": ["nlp", "natural language processing"], "llm": ["llm", "llms", "large language models"],
+    "computer vision": ["computer vision"], "statistics": ["statistics", "statistical"],
+    "aws": ["aws", "amazon web services"], "gcp": ["gcp", "google cloud"], "azure": ["azure"],
+    "docker": ["docker"], "kubernetes": ["kubernetes", "k8s"], "terraform": ["terraform"],
+    "ansible": ["ansible"], "ci/cd": ["ci/cd", "continuous integration", "jenkins", "github actions"],
+    "linux": ["linux"], "git": ["git"], "microservices": ["microservices", "microservice"],
+    "ios": ["ios"], "android": ["android"], "react native": ["react native"], "flutter": ["flutter"],
+    "figma": ["figma"], "ux": ["ux", "user experience"], "ui design": ["ui design", "ui/ux"],
+    "security": ["security", "cybersecurity", "infosec"], "networking": ["networking", "tcp/ip"],
+    "agile": ["agile", "scrum", "kanban"], "project management": ["project management", "pmp"],
+    "product management": ["product management", "product manager"], "jira": ["jira"],
+    "salesforce": ["salesforce"], "seo": ["seo"], "accounting": ["accounting", "gaap"],
+    "excel": ["microsoft excel", "ms excel", "pivot tables", "vlookup"],
+    "sales": ["sales", "b2b sales"], "customer success": ["customer success"],
+    "recruiting": ["recruiting", "talent acquisition"], "leadership": ["leadership", "people management"],
+}
+
+VOCABULARY = list(SKILLS)
+_SKILL_INDEX = {spelling: i for i, skill in enumerate(VOCABULARY) for spelling in SKILLS[skill]}
+# Longest spellings first, so "react native" wins over "react"
+_SKILL_RE = re.compile(
+    r"(?<![\w+#.])(" + "|".join(re.escape(s) for s in sorted(_SKILL_INDEX, key=len, reverse=True)) + r")(?![\w+#])"
+)
+
+# Job description lines that mark skills as more or less important
+REQUIRED_RE = re.compile(r"\b(required|requirements?|must|essential|minimum)\b", re.IGNORECASE)
+OPTIONAL_RE = re.compile(r"\b(nice to have|bonus|preferred|plus|familiarity)\b", re.IGNORECASE)
+# A line on its own that starts a section: "**Nice to Have**", "## Requirements", "Requirements:"
+HEADING_RE = re.compile(r"^\s*(?:#{1,6}\s+.+|\*\*[^*]+\*\*:?|__[^_]+__:?|[A-Z][^.:!?]{0,60}:)\s*$")
+REQUIRED_WEIGHT = 2.0
+OPTIONAL_WEIGHT = 0.5
+
+
+def extract_skills(text: str):
+    """Counter of vocabulary index -> mentions"""
+    return Counter(_SKILL_INDEX[m] for m in _SKILL_RE.findall((text or "").lower()))
+
+
+def candidate_matrix(resume_texts):
+    """candidates x skills matrix, 1.0 where the resume mentions the skill"""
+    matrix = np.zeros((len(resume_texts), len(VOCABULARY)), dtype=np.float32)
+    for row, text in enumerate(resume_texts):
+        matrix[row, list(extract_skills(text))] = 1.0
+    return matrix
+
+
+def _line_weight(line: str, default: float):
+    line = line.replace("_", " ")   # __Requirements__ - \b doesn't see a boundary after _
+    if REQUIRED_RE.search(line):
+        return REQUIRED_WEIGHT
+    if OPTIONAL_RE.search(line):
+        return OPTIONAL_WEIGHT
+    return default
+
+
+def job_skill_vector(job_description: str):
+    """
+    Skill weights for a job, summing to 1 (all zero if no known skill is mentioned).
+    A line's own wording wins over the section it's in - "- Kubernetes is a plus"
+    under **Required Qualifications** still counts half.
+    """
+    importance = np.zeros(len(VOCABULARY), dtype=np.float32)
+    mentions = Counter()
+    section_weight = 1.0
+    for line in (job_description or "").splitlines():
+        if HEADING_RE.match(line):
+            section_weight = _line_weight(line, 1.0)
+        skills = extract_skills(line)
+        if not skills:
+            continue
+        weight = _line_weight(line, section_weight)
+        mentions.update(skills)
+        for i in skills:
+            importance[i] = max(importance[i], weight)
+    for i, count in mentions.items():
+        importance[i] *= 1.0 + math.log(count)
+    total = importance.sum()
+    return importance / total if total else importance
+
+
+def rank_scores(matrix, weights):
+    """Pre-rank score (0-100) for every row of the matrix"""
+    return np.rint(100 * (matrix @ weights)).astype(np.int64)
+
+
+def prerank_score(resume_text: str, job_description: str):
+    return int(rank_scores(candidate_matrix([resume_text]), job_skill_vector(job_description))[0])
+
+
+def priority_order(resume_texts, job_description: str):
+    """Row indices, best pre-rank first - ties keep their original order"""
+    scores = rank_scores(candidate_matrix(resume_texts), job_skill_vector(job_description))
+    return np.argsort(-scores, kind="stable").tolist(), scores.tolist()
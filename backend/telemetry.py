@@ -0,0 +1,170 @@
+"""
+Per-request timing spans and process-wide Prometheus metrics
+
+Hooks in the DB engine, the agents, the resume parser and the password pool call
+record_span(); the API middleware collects the spans of each request into a
+Server-Timing header and feeds the route histograms served at /metrics (scrapes
+send X-Profile-Token, see api.require_admin_token).
+Metrics are per process - scrape every worker (or run one per container).
+"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+import threading
+import time
+
+# Request latency buckets in seconds - LLM-backed routes run into the tens of seconds
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+
+
+class RequestTimings:
+    """Spans recorded while serving one request: name -> [calls, seconds]"""
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.spans = {}
+        self.lock = threading.Lock()   # parsing runs in the threadpool
+
+    def add(self, name, seconds, calls=1):
+        with self.lock:
+            span = self.spans.setdefault(name, [0, 0.0])
+            span[0] += calls
+            span[1] += seconds
+
+    def server_timing(self):
+        """Server-Timing header value - one entry per span plus the total"""
+        with self.lock:
+            parts = [
+                f'{name};dur={seconds * 1000:.1f};desc="{calls} call{"s" if calls != 1 else ""}"'
+                for name, (calls, seconds) in self.spans.items()
+            ]
+        parts.append(f"total;dur={(time.perf_counter() - self.started) * 1000:.1f}")
+        return ", ".join(parts)
+
+
+_current_timings = ContextVar("request_timings", default=None)
+
+
+def start_request():
+    """Begin collecting spans for the current request, returns (timings, reset token)"""
+    timings = RequestTimings()
+    return timings, _current_timings.set(timings)
+
+
+def end_request(token):
+    _current_timings.reset(token)
+
+
+def record_span(name, seconds, calls=1):
+    """Add time spent in a dependency to the current request and the process totals"""
+    timings = _current_timings.get()
+    if timings is not None:
+        timings.add(name, seconds, calls)
+    metrics.record_span(name, seconds, calls)
+
+
+@contextmanager
+def span(name):
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_span(name, time.perf_counter() - start)
+
+
+def record_llm_tokens(input_tokens, output_tokens):
+    metrics.add_counter("llm_tokens", ("input",), input_tokens)
+    metrics.add_counter("llm_tokens", ("output",), output_tokens)
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, value):
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+                break
+        self.count += 1
+        self.total += value
+
+
+def _labels(names, values):
+    escaped = (str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n") for v in values)
+    return "{" + ",".join(f'{n}="{v}"' for n, v in zip(names, escaped)) + "}"
+
+
+class Metrics:
+    """Route latency histograms, in-flight gauge and error/span counters in Prometheus text format"""
+
+    COUNTERS = {
+        # name: (help, label names)
+        "http_errors": ("Requests that ended in a 5xx or an unhandled exception", ("method", "route", "status")),
+        "span_seconds": ("Time spent in each dependency (db, llm, parse, bcrypt)", ("span",)),
+        "span_calls": ("Calls made to each dependency", ("span",)),
+        "llm_tokens": ("Tokens reported by the Anthropic API", ("direction",)),
+    }
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.lock = threading.Lock()
+        self.buckets = buckets
+        self.latency = {}        # (method, route) -> Histogram
+        self.in_flight = 0
+        self.counters = {name: {} for name in self.COUNTERS}
+
+    def request_started(self):
+        with self.lock:
+            self.in_flight += 1
+
+    def request_finished(self, method, route, status, seconds):
+        with self.lock:
+            self.in_flight -= 1
+            histogram = self.latency.get((method, route))
+            if histogram is None:
+                histogram = self.latency[(method, route)] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            if status >= 500:
+                values = self.counters["http_errors"]
+                values[(method, route, str(status))] = values.get((method, route, str(status)), 0) + 1
+
+    def add_counter(self, name, labels, amount=1):
+        with self.lock:
+            values = self.counters[name]
+            values[labels] = values.get(labels, 0) + amount
+
+    def record_span(self, name, seconds, calls=1):
+        with self.lock:
+            for counter, amount in (("span_seconds", seconds), ("span_calls", calls)):
+                values = self.counters[counter]
+                values[(name,)] = values.get((name,), 0) + amount
+
+    def render(self):
+        """Prometheus text exposition format (version 0.0.4)"""
+        lines = []
+        with self.lock:
+            name = "thinkloop_http_request_duration_seconds"
+            lines += [f"# HELP {name} Request latency by route", f"# TYPE {name} histogram"]
+            for (method, route), histogram in sorted(self.latency.items()):
+                cumulative = 0
+                for bound, count in zip(histogram.buckets, histogram.counts):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_labels(('method', 'route', 'le'), (method, route, bound))} {cumulative}")
+                lines.append(f"{name}_bucket{_labels(('method', 'route', 'le'), (method, route, '+Inf'))} {histogram.count}")
+                lines.append(f"{name}_sum{_labels(('method', 'route'), (method, route))} {histogram.total}")
+                lines.append(f"{name}_count{_labels(('method', 'route'), (method, route))} {histogram.count}")
+
+            name = "thinkloop_http_requests_in_flight"
+            lines += [f"# HELP {name} Requests being served right now", f"# TYPE {name} gauge", f"{name} {self.in_flight}"]
+
+            for counter, (help_text, label_names) in self.COUNTERS.items():
+                name = f"thinkloop_{counter}_total"
+                lines += [f"# HELP {name} {help_text}", f"# TYPE {name} counter"]
+                for labels, value in sorted(self.counters[counter].items()):
+                    lines.append(f"{name}{_labels(label_names, labels)} {value}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
@@ -0,0 +1,69 @@
+"""
+Checks the buffered audit log writer - rows land in batches, a full queue drops
+and counts instead of blocking, and rows survive a database outage.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine, func, select
+from models import AuditLog
+from audit_log import AuditWriter
+
+
+def _engine(tmp):
+    engine = create_engine(f"sqlite:///{os.path.join(tmp, 'audit.db')}")
+    AuditLog.__table__.create(engine)
+    return engine
+
+
+def _count(engine):
+    with engine.connect() as connection:
+        return connection.execute(select(func.count()).select_from(AuditLog)).scalar()
+
+
+def test_rows_written_in_batches():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp)
+        writer = AuditWriter(engine, queue_size=1000, batch_size=100, flush_interval=60)
+        for i in range(250):
+            writer.record("login", "user-1", "user", "user-1")
+        writer.shutdown()
+        stats = writer.stats()
+        print(f"Audit stats: {stats}")
+        assert _count(engine) == 250
+        assert stats["written"] == 250 and 3 <= stats["batches"] < 50 and stats["dropped"] == 0
+
+
+def test_full_queue_drops_instead_of_blocking():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp)
+        writer = AuditWriter(engine, queue_size=10, batch_size=1000, flush_interval=60)
+        for i in range(25):
+            writer.record("job_created", "user-1", "job", str(i))
+        writer.shutdown()
+        assert writer.stats()["dropped"] == 15
+        assert _count(engine) == 10
+
+
+def test_rows_kept_while_database_is_down():
+    with tempfile.TemporaryDirectory() as tmp:
+        engine = _engine(tmp)
+        writer = AuditWriter(engine, queue_size=100, batch_size=10, flush_interval=60)
+        writer.engine = create_engine(f"sqlite:///{os.path.join(tmp, 'missing', 'audit.db')}")
+        for i in range(5):
+            writer.record("signup", "user-1", "user", "user-1")
+        assert not writer.flush()
+        assert writer.stats()["failed_flushes"] == 1 and writer.stats()["queued"] == 5
+
+        writer.engine = engine
+        writer.shutdown()
+        assert _count(engine) == 5
+
+
+if __name__ == "__main__":
+    test_rows_written_in_batches()
+    test_full_queue_drops_instead_of_blocking()
+    test_rows_kept_while_database_is_down()
+    print("Audit log writer OK")
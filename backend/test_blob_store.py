@@ -0,0 +1,111 @@
+"""
+Checks the resume blob store - Range parsing, key validation, the download endpoint
+with and without a Range header, and that a failed upload leaves no blob behind.
+"""
+import io
+import os
+import tempfile
+
+import pytest
+
+from api_testing import api_client, run_scenario, signup
+from blob_store import LocalBlobStore, parse_range_header
+
+
+def test_parse_range_header():
+    assert parse_range_header(None, 1000) is None
+    assert parse_range_header("bytes=0-99", 1000) == (0, 99)
+    assert parse_range_header("bytes=900-", 1000) == (900, 999)
+    assert parse_range_header("bytes=900-5000", 1000) == (900, 999)    # end clamped to the file
+    assert parse_range_header("bytes=-100", 1000) == (900, 999)        # suffix: last 100 bytes
+    assert parse_range_header("bytes=-5000", 1000) == (0, 999)
+    assert parse_range_header("bytes=0-1,5-9", 1000) is None           # multi-range: whole file
+    assert parse_range_header("items=0-9", 1000) is None
+
+
+@pytest.mark.parametrize("header", ["bytes=1000-", "bytes=2000-3000", "bytes=-0"])
+def test_parse_range_header_unsatisfiable(header):
+    with pytest.raises(ValueError):
+        parse_range_header(header, 1000)
+
+
+@pytest.mark.parametrize("header", ["bytes=abc-10", "bytes=0-xyz", "bytes=-", "bytes=--5", "bytes=50-10",
+                                    "bytes=+5-10", "bytes=5", "bytes 0-10"])
+def test_parse_range_header_malformed_is_ignored(header):
+    # RFC 9110 14.2 - an invalid Range is ignored, the full file is served
+    assert parse_range_header(header, 1000) is None
+
+
+def test_keys_cannot_leave_the_store():
+    with tempfile.TemporaryDirectory() as tmp:
+        store = LocalBlobStore(os.path.join(tmp, "blobs"))
+        key = store.put(io.BytesIO(b"resume bytes"), ".PDF")
+        assert key.endswith(".pdf") and store.exists(key)
+        assert b"".join(store.iter_range(key, 2, 5)) == b"sume"
+        for bad in ("../../etc/passwd", "..", "ab/../cd", "..\\secrets", ".hidden", ""):
+            with pytest.raises(ValueError):
+                store.exists(bad)
+
+
+def _docx_bytes(text):
+    import docx
+
+    document = docx.Document()
+    document.add_paragraph(text)
+    buffer = io.BytesIO()
+    document.save(buffer)
+    return buffer.getvalue()
+
+
+def _scenario_download():
+    import agents
+
+    with api_client() as (client, headers):
+        job_id = client.post("/jobs", json={"requirements": "Backend engineer"}, headers=headers).json()["job"]["id"]
+        file_bytes = _docx_bytes("Jordan Example - Python and PostgreSQL engineer")
+
+        def upload(email):
+            return client.post(
+                "/candidates/upload", headers=headers,
+                data={"job_id": job_id, "candidate_name": "Jordan Example", "candidate_email": email},
+                files={"resume_file": ("resume.docx", file_bytes)}
+            )
+
+        # Morgan failing must not leave the file behind
+        async def failing_score(self, resume_text, job_description):
+            raise RuntimeError("Claude is down")
+        working_score = agents.MorganAgent.score_resume_async
+        agents.MorganAgent.score_resume_async = failing_score
+        assert upload("failed@example.com").status_code == 500
+        blob_root = os.environ["BLOB_STORE_PATH"]
+        assert not [name for _, _, names in os.walk(blob_root) for name in names]
+
+        agents.MorganAgent.score_resume_async = working_score
+        response = upload("jordan@example.com")
+        assert response.status_code == 200, response.text
+        candidate_id = response.json()["candidate"]["id"]
+        assert client.get(f"/candidates/{candidate_id}", headers=headers).json()["candidate"]["has_resume_file"]
+
+        full = client.get(f"/candidates/{candidate_id}/resume", headers=headers)
+        assert full.status_code == 200 and full.content == file_bytes
+        assert full.headers["accept-ranges"] == "bytes" and full.headers["content-length"] == str(len(file_bytes))
+
+        partial = client.get(f"/candidates/{candidate_id}/resume", headers={**headers, "Range": "bytes=0-3"})
+        assert partial.status_code == 206 and partial.content == file_bytes[:4]
+        assert partial.headers["content-range"] == f"bytes 0-3/{len(file_bytes)}"
+
+        suffix = client.get(f"/candidates/{candidate_id}/resume", headers={**headers, "Range": "bytes=-10"})
+        assert suffix.status_code == 206 and suffix.content == file_bytes[-10:]
+
+        beyond = client.get(f"/candidates/{candidate_id}/resume", headers={**headers, "Range": f"bytes={len(file_bytes)}-"})
+        assert beyond.status_code == 416 and beyond.headers["content-range"] == f"bytes */{len(file_bytes)}"
+
+        malformed = client.get(f"/candidates/{candidate_id}/resume", headers={**headers, "Range": "bytes=abc-10"})
+        assert malformed.status_code == 200 and malformed.content == file_bytes
+
+        stranger = signup(client, "stranger@thinkloop.test")
+        assert client.get(f"/candidates/{candidate_id}/resume", headers=stranger).status_code == 404
+
+
+def test_resume_download():
+    run_scenario(__name__, "_scenario_download")
@@ -0,0 +1,119 @@
+"""
+Checks the embedding index - similar texts rank first, searches stay inside one
+user's rows, appends from several worker processes all land intact, and a rebuild
+by another worker replaces what a reader has mapped even when the new file is bigger.
+Clearing waits for the file lock appends hold, and a reader that finds the files gone
+sees an empty index.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import fcntl
+import multiprocessing
+import os
+import tempfile
+import threading
+
+WORKERS = 4
+ROWS_PER_WORKER = 25
+
+
+def _append(path, worker, rows):
+    from embedding_index import VectorIndex
+
+    index = VectorIndex("candidates", path=path)
+    for i in range(rows):
+        index.add(f"w{worker}-{i}", "job-a", "user-1", f"worker {worker} resume {i} python")
+    return rows
+
+
+def test_similar_text_ranks_first():
+    from embedding_index import VectorIndex, embed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex("candidates", path=tmp)
+        index.add("react", "job-a", "user-1", "Frontend engineer: React, TypeScript, CSS")
+        index.add("spark", "job-a", "user-1", "Data engineer: Spark, Airflow, SQL")
+        index.add("same-job", "job-b", "user-1", "React TypeScript frontend engineer")
+        index.add("other-user", "job-a", "user-2", "React TypeScript frontend engineer")
+
+        matches = index.search(embed("Senior React frontend engineer"), "user-1", exclude_group="job-b", k=5)
+        keys = [key for key, _ in matches]
+        print(f"Matches: {matches}")
+        assert keys[0] == "react"
+        assert "same-job" not in keys and "other-user" not in keys
+        assert index.get("spark") is not None and index.get("missing") is None
+
+
+def test_appends_from_several_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=WORKERS, mp_context=context) as pool:
+            written = sum(pool.map(_append, [tmp] * WORKERS, range(WORKERS), [ROWS_PER_WORKER] * WORKERS))
+
+        from embedding_index import VectorIndex, embed
+        index = VectorIndex("candidates", path=tmp)
+        keys = {key for key, _ in index.search(embed("python resume"), "user-1", k=written)}
+        print(f"Rows written: {written}, rows found: {len(keys)}")
+        assert len(keys) == written
+        assert index._idf().shape == (index.dim,)
+
+
+def test_rebuild_by_another_worker_is_picked_up():
+    from embedding_index import VectorIndex, embed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        reader = VectorIndex("candidates", path=tmp)
+        writer = VectorIndex("candidates", path=tmp)     # stands in for another worker
+        for i in range(3):
+            writer.add(f"old-{i}", "job-a", "user-1", f"python resume {i}")
+        assert {key for key, _ in reader.search(embed("python resume"), "user-1", k=10)} == {"old-0", "old-1", "old-2"}
+
+        # Rebuilt with more rows than before, owned by someone else
+        writer.clear()
+        for i in range(5):
+            writer.add(f"new-{i}", "job-b", "user-2", f"python resume {i}")
+        assert reader.search(embed("python resume"), "user-1", k=10) == []
+        assert {key for key, _ in reader.search(embed("python resume"), "user-2", k=10)} == {f"new-{i}" for i in range(5)}
+        assert reader.get("old-0") is None and reader.get("new-4") is not None
+
+        # Appends after the rebuild still land on top of the new rows
+        writer.add("new-5", "job-b", "user-2", "python resume 5")
+        assert len(reader.search(embed("python resume"), "user-2", k=10)) == 6
+
+
+def test_clear_waits_for_appends():
+    from embedding_index import VectorIndex
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex("candidates", path=tmp)
+        index.add("a", "job-a", "user-1", "python resume")
+        with open(index.lock_path, "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)    # an append in progress in another worker
+            clearing = threading.Thread(target=index.clear)
+            clearing.start()
+            clearing.join(0.2)
+            assert clearing.is_alive() and os.path.exists(index.df_path)
+        clearing.join(5)
+        assert not clearing.is_alive() and not os.path.exists(index.df_path)
+
+
+def test_missing_files_are_an_empty_index():
+    from embedding_index import VectorIndex, embed
+
+    with tempfile.TemporaryDirectory() as tmp:
+        index = VectorIndex("candidates", path=tmp)
+        assert index.search(embed("python"), "user-1") == [] and index._idf() is None
+        index.add("a", "job-a", "user-1", "python resume")
+        assert [key for key, _ in index.search(embed("python"), "user-1")] == ["a"]
+
+        # Cleared by another worker between the refresh and the IDF read
+        os.remove(index.df_path)
+        assert index._idf() is None
+        index._refresh = lambda: 1
+        assert index.search(embed("python"), "user-1") == []
+
+
+if __name__ == "__main__":
+    test_similar_text_ranks_first()
+    test_appends_from_several_workers()
+    test_rebuild_by_another_worker_is_picked_up()
+    print("Embedding index OK")
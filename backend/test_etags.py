@@ -0,0 +1,79 @@
+"""
+Checks conditional GETs - a matching If-None-Match gets an empty 304, and every
+write to a job (a scored candidate, a deferred one, score-pending, posting) moves
+the ETag of every view of it, so the next GET is a 200 with the new data.
+"""
+from api_testing import api_client, run_scenario
+
+
+def _scenario_etags():
+    with api_client() as (client, headers):
+        job_id = client.post("/jobs", json={"requirements": "Backend engineer"}, headers=headers).json()["job"]["id"]
+        candidate = {"job_id": job_id, "resume_text": "Python and PostgreSQL", "candidate_name": "Sam",
+                     "candidate_email": "sam@example.com"}
+        candidate_id = client.post("/candidates", json=candidate, headers=headers).json()["candidate"]["id"]
+        urls = ["/jobs", f"/jobs/{job_id}", f"/jobs/{job_id}/candidates", f"/jobs/{job_id}/stats",
+                f"/candidates/{candidate_id}", "/dashboard"]
+
+        def etags():
+            tags = {}
+            for url in urls:
+                response = client.get(url, headers=headers)
+                assert response.status_code == 200, (url, response.status_code)
+                assert response.headers["cache-control"] == "private, no-cache"
+                tags[url] = response.headers["etag"]
+            return tags
+
+        def assert_not_modified(tags):
+            for url, tag in tags.items():
+                for if_none_match in (tag, f"W/{tag}", f'"other", {tag}'):
+                    response = client.get(url, headers={**headers, "If-None-Match": if_none_match})
+                    assert response.status_code == 304 and response.content == b"", (url, if_none_match)
+                    assert response.headers["etag"] == tag
+
+        def assert_modified(old_tags, what):
+            new_tags = etags()
+            for url, tag in old_tags.items():
+                response = client.get(url, headers={**headers, "If-None-Match": tag})
+                assert response.status_code == 200 and response.headers["etag"] != tag, (what, url)
+            return new_tags
+
+        tags = etags()
+        assert len(set(tags.values())) == len(tags)
+        assert_not_modified(tags)
+        assert client.get(urls[1], headers={**headers, "If-None-Match": '"stale"'}).status_code == 200
+
+        # A scored candidate
+        client.post("/candidates", json={**candidate, "candidate_email": "alex@example.com"}, headers=headers)
+        tags = assert_modified(tags, "scored candidate")
+        assert_not_modified(tags)
+        assert len(client.get(f"/jobs/{job_id}/candidates", headers=headers).json()["candidates"]) == 2
+
+        # A deferred candidate - stored with a provisional score
+        deferred = client.post("/candidates", json={**candidate, "candidate_email": "riley@example.com", "defer_scoring": True},
+                               headers=headers).json()["candidate"]
+        assert deferred["provisional"]
+        tags = assert_modified(tags, "deferred candidate")
+        assert_not_modified(tags)
+
+        # Scoring it changes the candidate list again, and that candidate's own ETag
+        deferred_url = f"/candidates/{deferred['id']}"
+        deferred_tag = client.get(deferred_url, headers=headers).headers["etag"]
+        scored = client.post(f"/jobs/{job_id}/score-pending", headers=headers).json()
+        assert [c["id"] for c in scored["scored"]] == [deferred["id"]] and scored["pending"] == 0
+        tags = assert_modified(tags, "score-pending")
+        response = client.get(deferred_url, headers={**headers, "If-None-Match": deferred_tag})
+        assert response.status_code == 200 and response.json()["candidate"]["status"] == "screened"
+        assert_not_modified(tags)
+
+        # Posting the job moves the stats ETag
+        stats_tag = tags[f"/jobs/{job_id}/stats"]
+        client.post(f"/jobs/{job_id}/post", headers=headers)
+        assert client.get(f"/jobs/{job_id}/stats", headers={**headers, "If-None-Match": stats_tag}).status_code == 200
+
+        # Unknown jobs are still a 404, whatever the client sends
+        assert client.get("/jobs/missing", headers={**headers, "If-None-Match": "*"}).status_code == 404
+
+
+def test_conditional_gets():
+    run_scenario(__name__, "_scenario_etags", BCRYPT_ROUNDS="4")
@@ -0,0 +1,51 @@
+"""
+Checks the monitoring plumbing - query timings stay correct after a failed statement,
+and the health/metrics endpoints refuse callers without the admin token.
+"""
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from sqlalchemy import text
+
+from api_testing import api_client, run_scenario
+from database import build_engine, PoolMetrics
+from telemetry import start_request, end_request
+
+ADMIN_TOKEN = "monitoring-test-token"
+ADMIN_PATHS = ("/health/db", "/health/cache", "/health/passwords", "/health/audit", "/metrics", "/admin/profiles")
+
+
+def test_failed_query_does_not_skew_timings():
+    engine = build_engine("sqlite://", metrics=PoolMetrics())
+    timings, token = start_request()
+    try:
+        with engine.connect() as connection:
+            connection.connection.driver_connection.create_function("sleep_ms", 1, lambda ms: time.sleep(ms / 1000))
+            for _ in range(3):
+                with pytest.raises(Exception):
+                    connection.execute(text("SELECT * FROM missing_table"))
+            before = time.perf_counter()
+            result = connection.execute(text("SELECT sleep_ms(50)"))
+            # Timed from this statement's own start, not one left behind by a failed one
+            assert before <= result.context._query_start <= time.perf_counter()
+    finally:
+        end_request(token)
+    calls, seconds = timings.spans["db"]
+    assert calls == 1 and 0.05 <= seconds < 1
+
+
+def _scenario_admin_endpoints():
+    with api_client() as (client, headers):
+        assert client.get("/health").status_code == 200
+        for path in ADMIN_PATHS:
+            assert client.get(path).status_code == 403, path
+            assert client.get(path, headers=headers).status_code == 403, path
+            assert client.get(path, headers={"X-Profile-Token": "wrong"}).status_code == 403, path
+            assert client.get(path, headers={"X-Profile-Token": ADMIN_TOKEN}).status_code == 200, path
+
+
+def test_admin_endpoints_need_the_token():
+    run_scenario(__name__, "_scenario_admin_endpoints", PROFILE_TOKEN=ADMIN_TOKEN)
@@ -0,0 +1,86 @@
+"""
+Checks the bcrypt pool - a full queue is refused fast (PasswordPoolBusy, 503 with
+Retry-After from the API) and a login with an outdated bcrypt cost rehashes the password.
+"""
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")     # the pool's worker processes read it too
+
+from api_testing import api_client, run_scenario
+from password_hasher import PasswordHasher, PasswordPoolBusy
+
+
+def test_full_queue_is_refused():
+    hasher = PasswordHasher(workers=1, max_queue=0)
+
+    async def burst():
+        return await asyncio.gather(*(hasher.hash("secret") for _ in range(3)), return_exceptions=True)
+
+    try:
+        results = asyncio.run(burst())
+    finally:
+        hasher.shutdown()
+    busy = [r for r in results if isinstance(r, PasswordPoolBusy)]
+    hashed = [r for r in results if isinstance(r, str)]
+    print(f"Pool stats: {hasher.stats()}")
+    assert len(busy) == 2 and len(hashed) == 1 and hashed[0].startswith("$2b$04$")
+    assert hasher.stats()["rejected"] == 2 and hasher.stats()["completed"] == 1 and hasher.stats()["in_flight"] == 0
+
+
+def test_verify_reports_outdated_cost():
+    from passlib.context import CryptContext
+
+    old_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("secret")
+    hasher = PasswordHasher(workers=1, max_queue=1)
+    try:
+        valid, new_hash = asyncio.run(hasher.verify("secret", old_hash))
+        wrong, _ = asyncio.run(hasher.verify("wrong", old_hash))
+    finally:
+        hasher.shutdown()
+    assert valid and new_hash.startswith("$2b$04$") and not wrong
+
+
+def _scenario_busy_pool():
+    from password_hasher import password_hasher
+
+    with api_client() as (client, headers):
+        # Every slot taken - the next login is refused without touching bcrypt
+        password_hasher._pending = password_hasher.workers + password_hasher.max_queue
+        try:
+            response = client.post("/login", json={"email": "owner@thinkloop.test", "password": "testpass123"})
+            assert response.status_code == 503 and response.headers["retry-after"] == "1"
+            assert client.post("/signup", json={"email": "new@thinkloop.test", "password": "pw"}).status_code == 503
+        finally:
+            password_hasher._pending = 0
+        assert client.post("/login", json={"email": "owner@thinkloop.test", "password": "testpass123"}).status_code == 200
+
+
+def _scenario_rehash_on_login():
+    from passlib.context import CryptContext
+    from database import SessionLocal
+    from models import User
+
+    with api_client() as (client, headers):
+        with SessionLocal() as db:
+            user = db.query(User).filter(User.email == "owner@thinkloop.test").one()
+            user.hashed_password = CryptContext(schemes=["bcrypt"], bcrypt__rounds=5).hash("testpass123")
+            db.commit()
+
+        assert client.post("/login", json={"email": "owner@thinkloop.test", "password": "wrong"}).status_code == 401
+        response = client.post("/login", json={"email": "owner@thinkloop.test", "password": "testpass123"})
+        assert response.status_code == 200
+
+        with SessionLocal() as db:
+            stored = db.query(User).filter(User.email == "owner@thinkloop.test").one().hashed_password
+        assert stored.startswith("$2b$04$")
+        assert client.post("/login", json={"email": "owner@thinkloop.test", "password": "testpass123"}).status_code == 200
+
+
+def test_busy_pool_returns_503():
+    run_scenario(__name__, "_scenario_busy_pool", PASSWORD_POOL_WORKERS="1", PASSWORD_POOL_MAX_QUEUE="0", BCRYPT_ROUNDS="4")
+
+
+def test_login_rehashes_outdated_password():
+    run_scenario(__name__, "_scenario_rehash_on_login", BCRYPT_ROUNDS="4")
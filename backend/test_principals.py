@@ -0,0 +1,98 @@
+"""
+Checks the principal cache - TTL and LRU eviction, eviction only once a user change
+is committed, and that auth rejects deactivated users and still accepts legacy
+email-subject tokens.
+"""
+import os
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+from sqlalchemy import create_engine
+from sqlalchemy.orm import Session
+
+from api_testing import api_client, run_scenario
+from models import User
+from principals import Principal, PrincipalCache, principal_cache
+
+
+def _principal(user_id, email=None):
+    return Principal(id=user_id, email=email or f"{user_id}@example.com", full_name=None,
+                     company_name=None, plan="free", is_active=True)
+
+
+def test_entries_expire():
+    cache = PrincipalCache(max_size=10, ttl_seconds=0.05)
+    cache.put("user-1", _principal("user-1"))
+    assert cache.get("user-1").id == "user-1"
+    time.sleep(0.1)
+    assert cache.get("user-1") is None
+
+
+def test_least_recently_used_is_evicted():
+    cache = PrincipalCache(max_size=2, ttl_seconds=60)
+    cache.put("a", _principal("a"))
+    cache.put("b", _principal("b"))
+    assert cache.get("a") is not None        # a is now the most recently used
+    cache.put("c", _principal("c"))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None and cache.get("c") is not None
+
+
+def test_invalidated_on_commit_only():
+    engine = create_engine("sqlite://")
+    User.__table__.create(engine)
+    with Session(engine) as db:
+        user = User(id="user-1", email="old@example.com", hashed_password="x", plan="free", is_active=True)
+        db.add(user)
+        db.commit()
+
+        principal_cache.put(user.id, Principal.from_user(user))
+        principal_cache.put(user.email, Principal.from_user(user))
+
+        user.is_active = False
+        db.flush()
+        assert principal_cache.get("user-1") is not None      # flushed, not committed
+        db.rollback()
+        assert principal_cache.get("user-1") is not None      # rolled back - nothing to evict
+        db.commit()
+        assert principal_cache.get("user-1") is not None      # the rolled-back change isn't replayed
+
+        assert user.email == "old@example.com" and user.is_active
+        user.email = "new@example.com"
+        db.commit()
+        assert principal_cache.get("user-1") is None
+        assert principal_cache.get("old@example.com") is None
+
+
+def _set_active(email, active):
+    from database import SessionLocal
+
+    with SessionLocal() as db:
+        db.query(User).filter(User.email == email).one().is_active = active
+        db.commit()
+
+
+def _scenario_auth():
+    from auth import create_access_token
+
+    with api_client() as (client, headers):
+        legacy = {"Authorization": f"Bearer {create_access_token({'sub': 'owner@thinkloop.test'})}"}
+        assert client.get("/jobs", headers=headers).status_code == 200
+        assert client.get("/jobs", headers=legacy).status_code == 200
+        assert principal_cache.get("owner@thinkloop.test").email == "owner@thinkloop.test"
+
+        _set_active("owner@thinkloop.test", False)
+        for token in (headers, legacy):
+            response = client.get("/jobs", headers=token)
+            assert response.status_code == 401 and response.json()["detail"] == "Account is deactivated"
+
+        _set_active("owner@thinkloop.test", True)
+        assert client.get("/jobs", headers=legacy).status_code == 200
+
+        unknown = {"Authorization": f"Bearer {create_access_token({'sub': 'nobody@thinkloop.test'})}"}
+        assert client.get("/jobs", headers=unknown).status_code == 401
+
+
+def test_auth_rejects_deactivated_and_accepts_legacy_subjects():
+    run_scenario(__name__, "_scenario_auth", BCRYPT_ROUNDS="4")
@@ -0,0 +1,109 @@
+"""
+Checks the per-user LLM quotas on every store - a reservation over the plan is
+refused, settling refunds the unused estimate, a failed request only pays for
+what was billed, refunding more than was reserved never grants extra quota, and a call
+bigger than a whole period is refused as too large (413) instead of retryable.
+"""
+from types import SimpleNamespace
+import asyncio
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+
+from principals import Principal
+from quotas import QuotaExceeded, QuotaManager, QuotaTooLarge, record_usage
+from api_testing import api_client, run_scenario
+from rate_limiter import InMemoryRateLimitStore, SQLRateLimitStore
+
+PLANS = {"free": {"minute": 100, "hour": 1000, "month": 10_000}}
+USER = Principal(id="user-1", email="user@example.com", full_name=None, company_name=None, plan="free", is_active=True)
+
+
+@pytest.fixture(params=["memory", "sql", "redis"])
+def quotas(request):
+    if request.param == "memory":
+        yield QuotaManager(InMemoryRateLimitStore(), PLANS)
+    elif request.param == "sql":
+        with tempfile.TemporaryDirectory() as tmp:
+            store = SQLRateLimitStore(f"sqlite:///{os.path.join(tmp, 'quotas.db')}")
+            yield QuotaManager(store, PLANS)
+            store.engine.dispose()
+    else:
+        fakeredis = pytest.importorskip("fakeredis")
+        from rate_limiter import RedisRateLimitStore
+        yield QuotaManager(RedisRateLimitStore(client=fakeredis.FakeRedis()), PLANS)
+
+
+def test_over_quota_is_refused(quotas):
+    quotas.reserve(USER, 80)
+    with pytest.raises(QuotaExceeded) as refused:
+        quotas.reserve(USER, 30)
+    assert refused.value.period == "minute" and 1 <= refused.value.retry_after <= 60
+    assert refused.value.remaining == {"minute": 20, "hour": 920, "month": 9920}
+    assert quotas.reserve(USER, 20).remaining["minute"] == 0
+
+
+def test_settle_refunds_the_unused_estimate(quotas):
+    reservation = quotas.reserve(USER, 80)
+    quotas.settle(reservation, 20)
+    assert quotas.reserve(USER, 80).remaining == {"minute": 0, "hour": 900, "month": 9900}
+
+
+def test_refund_never_goes_below_zero(quotas):
+    reservation = quotas.reserve(USER, 50)
+    quotas.settle(reservation, -1000)       # a bogus refund far bigger than the reservation
+    assert quotas.reserve(USER, 100).remaining["minute"] == 0
+    with pytest.raises(QuotaExceeded):
+        quotas.reserve(USER, 1)
+
+
+def test_failed_request_pays_only_for_billed_usage(quotas):
+    async def failing_request():
+        async with quotas.metered(USER, 90):
+            record_usage(SimpleNamespace(input_tokens=10, output_tokens=0))
+            raise RuntimeError("Claude is down")
+
+    with pytest.raises(RuntimeError):
+        asyncio.run(failing_request())
+    assert quotas.reserve(USER, 90).remaining["minute"] == 0      # 10 billed + 90
+
+
+def test_calls_without_usage_keep_the_estimate(quotas):
+    async def request():
+        async with quotas.metered(USER, 60) as reservation:
+            return reservation
+
+    assert asyncio.run(request()).remaining["minute"] == 40
+    with pytest.raises(QuotaExceeded):
+        quotas.reserve(USER, 41)
+
+
+def test_remaining_reserves_nothing(quotas):
+    assert quotas.remaining(USER) == {"minute": 100, "hour": 1000, "month": 10_000}
+    quotas.reserve(USER, 70)
+    assert quotas.remaining(USER) == quotas.remaining(USER) == {"minute": 30, "hour": 930, "month": 9930}
+    assert quotas.reserve(USER, 30).remaining["minute"] == 0
+    assert quotas.remaining(USER)["minute"] == 0
+
+
+def test_call_bigger_than_the_plan_is_too_large(quotas):
+    with pytest.raises(QuotaTooLarge) as refused:
+        quotas.reserve(USER, 101)
+    assert refused.value.period == "minute" and refused.value.limit == 100 and refused.value.estimate == 101
+    assert not isinstance(refused.value, QuotaExceeded)
+    assert quotas.reserve(USER, 100).remaining["minute"] == 0      # nothing was held for it
+
+
+def _scenario_job_bigger_than_the_plan():
+    with api_client() as (client, headers):
+        response = client.post("/jobs", json={"requirements": "Backend engineer"}, headers=headers)
+        assert response.status_code == 413 and "retry-after" not in response.headers
+        assert "minute LLM quota of 1000" in response.json()["detail"]
+
+
+def test_job_bigger_than_the_plan_returns_413():
+    run_scenario(__name__, "_scenario_job_bigger_than_the_plan", BCRYPT_ROUNDS="4",
+                 QUOTA_PLANS='{"free": {"minute": 1000, "hour": 10000, "month": 100000}}')
@@ -0,0 +1,41 @@
+"""
+Checks that a shared rate limit backend holds its limit across worker processes
+Several processes hammer one key through a SQLite-backed store at the same time -
+together they must get exactly max_calls through, no more and no fewer.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import tempfile
+
+WORKERS = 4
+CALLS_PER_WORKER = 50
+MAX_CALLS = 30
+WINDOW_SECONDS = 10**9     # no window boundary falls inside the run, so exactly MAX_CALLS get through
+
+
+def _hammer(url, key, calls):
+    from rate_limiter import SQLRateLimitStore
+
+    store = SQLRateLimitStore(url)
+    return sum(1 for _ in range(calls) if store.hit(key, MAX_CALLS, WINDOW_SECONDS)[0])
+
+
+def test_sql_backend_limit_holds_across_workers():
+    with tempfile.TemporaryDirectory() as tmp:
+        url = f"sqlite:///{os.path.join(tmp, 'rate_limits.db')}"
+        # Create the table up front so the workers don't race on DDL
+        from rate_limiter import SQLRateLimitStore
+        SQLRateLimitStore(url).create_table()
+
+        context = multiprocessing.get_context("spawn")
+        with ProcessPoolExecutor(max_workers=WORKERS, mp_context=context) as pool:
+            allowed = list(pool.map(_hammer, [url] * WORKERS, ["127.0.0.1:/signup"] * WORKERS, [CALLS_PER_WORKER] * WORKERS))
+
+    print(f"Allowed per worker: {allowed} (total {sum(allowed)}, limit {MAX_CALLS})")
+    assert sum(allowed) == MAX_CALLS
+
+
+if __name__ == "__main__":
+    test_sql_backend_limit_holds_across_workers()
+    print("Rate limit held across workers")
@@ -0,0 +1,85 @@
+"""
+Checks the sliding-window rate limiter - Retry-After is exactly long enough (a
+client that waits it out gets through, one that comes back a second early doesn't),
+and the Redis store's scripts hold the limit and reserve all or nothing.
+"""
+import os
+import tempfile
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+
+from rate_limiter import InMemoryRateLimitStore, SQLRateLimitStore, NS_PER_SECOND
+
+WINDOW_SECONDS = 60
+# (max_calls, calls in the previous window, seconds into the current window)
+CASES = [(5, 0, 0), (5, 0, 30), (5, 5, 10), (5, 3, 50), (10, 10, 0), (10, 4, 59), (1, 0, 0), (1, 1, 45)]
+
+
+def _check_retry_after(hit, max_calls, previous_calls, offset):
+    """hit(now_seconds) -> (allowed, retry_after) against a fresh key"""
+    start = 10_000 * WINDOW_SECONDS     # a window boundary
+    for i in range(previous_calls):
+        assert hit(start - WINDOW_SECONDS + i * 0.001)[0]
+    now = start + offset
+    while hit(now)[0]:
+        pass
+    allowed, retry_after = hit(now)
+    assert not allowed and retry_after >= 1
+    if retry_after > 1:
+        assert not hit(now + retry_after - 1)[0], "Retry-After is longer than needed"
+    assert hit(now + retry_after)[0], "Retry-After is too short"
+    return retry_after
+
+
+@pytest.mark.parametrize("max_calls, previous_calls, offset", CASES)
+def test_in_memory_retry_after_is_exact(max_calls, previous_calls, offset):
+    store = InMemoryRateLimitStore()
+    key = f"client:{max_calls}:{previous_calls}:{offset}"
+    hit = lambda now: store.hit(key, max_calls, WINDOW_SECONDS, now_ns=int(now * NS_PER_SECOND))
+    retry_after = _check_retry_after(hit, max_calls, previous_calls, offset)
+    print(f"max={max_calls} previous={previous_calls} offset={offset}s: Retry-After {retry_after}s")
+
+
+def test_full_window_waits_into_the_next():
+    # 5 calls right at the start of a window: the next one only fits once those
+    # 5 have decayed to 4 in the following window - 12s past its start
+    store = InMemoryRateLimitStore()
+    hit = lambda now: store.hit("client", 5, WINDOW_SECONDS, now_ns=int(now * NS_PER_SECOND))
+    assert _check_retry_after(hit, 5, 0, 0) == WINDOW_SECONDS + 12
+
+
+@pytest.mark.parametrize("max_calls, previous_calls, offset", CASES)
+def test_sql_retry_after_is_exact(max_calls, previous_calls, offset):
+    with tempfile.TemporaryDirectory() as tmp:
+        store = SQLRateLimitStore(f"sqlite:///{os.path.join(tmp, 'rate_limits.db')}")
+        hit = lambda now: store.hit("client", max_calls, WINDOW_SECONDS, now=now)
+        _check_retry_after(hit, max_calls, previous_calls, offset)
+        store.engine.dispose()
+
+
+def _redis_store():
+    fakeredis = pytest.importorskip("fakeredis")    # runs the Lua scripts in-process
+    from rate_limiter import RedisRateLimitStore
+
+    return RedisRateLimitStore(client=fakeredis.FakeRedis())
+
+
+def test_redis_hit_holds_the_limit():
+    store = _redis_store()
+    results = [store.hit("127.0.0.1:/signup", 5, 3600) for _ in range(8)]
+    assert [allowed for allowed, _ in results] == [True] * 5 + [False] * 3
+    assert all(1 <= retry_after <= 2 * 3600 for _, retry_after in results[5:])
+    assert store.hit("127.0.0.2:/signup", 5, 3600) == (True, 0)     # other clients unaffected
+    assert store.client.ttl(next(iter(store.client.scan_iter("rl:{127.0.0.1:/signup}:*")))) > 0
+
+
+def test_redis_reserve_is_all_or_nothing():
+    store = _redis_store()
+    counters = [("quota:{u1}:minute", 1, 100, 2e9), ("quota:{u1}:hour", 1, 150, 2e9)]
+    assert store.reserve(counters, 80) == (True, [80, 80])
+    assert store.reserve(counters, 30) == (False, [80, 80])         # minute would overflow - hour untouched too
+    store.adjust(counters, -60)
+    assert store.reserve(counters, 30) == (True, [50, 50])
+    assert store.client.ttl("rl:quota:{u1}:minute:1") > 0
@@ -0,0 +1,122 @@
+"""
+Checks read replica routing - after a write the same user reads from the primary,
+whichever token they use, until READ_STICKINESS_SECONDS pass; then reads go to the replica.
+The write is recorded before its handler runs, and with the redis store every worker
+sees it.
+"""
+import asyncio
+import os
+import tempfile
+import time
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+
+from api_testing import api_client, run_scenario, signup
+from database import InMemoryWriterStore, ReplicaRouter
+
+STICKINESS_SECONDS = 1.0
+
+
+def test_sticky_entries_expire():
+    writers = InMemoryWriterStore()
+    writers.mark("user-1", 0.05)
+    assert writers.is_recent("user-1") and not writers.is_recent("user-2")
+    time.sleep(0.1)
+    assert not writers.is_recent("user-1")
+    for i in range(5000):
+        writers.mark(f"user-{i}", 0.05)
+    time.sleep(0.1)
+    writers.mark("user-last", 0.05)
+    assert list(writers._writers) == ["user-last"]
+
+
+def test_redis_stickiness_is_shared_between_workers():
+    fakeredis = pytest.importorskip("fakeredis")
+    from database import RedisWriterStore
+
+    server = fakeredis.FakeServer()     # one Redis, two worker processes
+    with tempfile.TemporaryDirectory() as tmp:
+        replica_url = f"sqlite:///{os.path.join(tmp, 'replica.db')}"
+        worker_a, worker_b = (
+            ReplicaRouter([replica_url], stickiness_seconds=0.2,
+                          writers=RedisWriterStore(client=fakeredis.FakeRedis(server=server)))
+            for _ in range(2)
+        )
+
+        async def scenario():
+            await worker_a.mark_write("user-1")
+            assert await worker_b.is_sticky("user-1") and not await worker_b.is_sticky("user-2")
+            await asyncio.sleep(0.3)
+            assert not await worker_b.is_sticky("user-1")
+
+        asyncio.run(scenario())
+
+
+def test_unreachable_store_reads_the_primary():
+    class BrokenStore(InMemoryWriterStore):
+        def is_recent(self, user_id):
+            raise ConnectionError("redis is down")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        router = ReplicaRouter([f"sqlite:///{os.path.join(tmp, 'replica.db')}"], writers=BrokenStore())
+        assert asyncio.run(router.is_sticky("user-1"))
+
+
+def _scenario_read_your_writes():
+    from database import build_engine, run_migrations, replica_router
+
+    # The replica has the schema but never receives the primary's rows
+    run_migrations(build_engine(os.environ["DATABASE_REPLICA_URLS"]))
+    with api_client() as (client, headers):
+        job_count = lambda h: len(client.get("/jobs", headers=h).json()["jobs"])
+
+        assert job_count(headers) == 0
+        assert client.post("/jobs", json={"requirements": "Backend engineer"}, headers=headers).status_code == 200
+        assert job_count(headers) == 1                  # primary - sees its own write
+
+        # Same user, another session: still sticky, and no token is kept in memory
+        login = client.post("/login", json={"email": "owner@thinkloop.test", "password": "testpass123"})
+        other_token = {"Authorization": f"Bearer {login.json()['token']}"}
+        assert job_count(other_token) == 1
+        assert list(replica_router.writers._writers) == [login.json()["user"]["id"]]
+
+        # Another user never wrote - their reads go to the replica
+        stranger = signup(client, "stranger@thinkloop.test")
+        assert job_count(stranger) == 0
+
+        time.sleep(STICKINESS_SECONDS + 0.2)
+        assert job_count(headers) == 0                  # replica - the write never reached it
+
+
+def _scenario_write_is_recorded_first():
+    import api
+    from database import replica_router
+
+    @api.app.post("/_probe")
+    async def probe(user = api.Depends(api.get_current_user)):
+        # Still inside the write's handler - no response has gone out yet
+        return {"sticky": replica_router.writers.is_recent(user.id)}
+
+    with api_client() as (client, headers):
+        assert client.post("/_probe", headers=headers).json() == {"sticky": True}
+
+
+def test_write_is_recorded_before_the_response():
+    with tempfile.TemporaryDirectory() as tmp:
+        run_scenario(
+            __name__, "_scenario_write_is_recorded_first",
+            DATABASE_REPLICA_URLS=f"sqlite:///{os.path.join(tmp, 'replica.db')}",
+            BCRYPT_ROUNDS="4"
+        )
+
+
+def test_get_after_write_reads_the_primary():
+    with tempfile.TemporaryDirectory() as tmp:
+        run_scenario(
+            __name__, "_scenario_read_your_writes",
+            DATABASE_REPLICA_URLS=f"sqlite:///{os.path.join(tmp, 'replica.db')}",
+            READ_STICKINESS_SECONDS=str(STICKINESS_SECONDS),
+            BCRYPT_ROUNDS="4"
+        )
@@ -0,0 +1,147 @@
+"""
+Checks the response cache - a repeated read is a hit, a write to a job gives its tag
+a new generation so every key built on the old one misses (other jobs keep theirs),
+a write through another worker misses on the job's version, and the Redis generation
+keys expire like the entries do.
+"""
+from types import SimpleNamespace
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+from starlette.datastructures import QueryParams
+
+from api_testing import api_client, run_scenario
+from response_cache import InMemoryCacheBackend, ResponseCache, job_tag
+
+
+def _request(path, query=""):
+    return SimpleNamespace(url=SimpleNamespace(path=path), query_params=QueryParams(query))
+
+
+@pytest.fixture(params=["memory", "redis"])
+def cache(request):
+    if request.param == "memory":
+        return ResponseCache(InMemoryCacheBackend(max_size=100), ttl_seconds=30, generation_ttl=300)
+    fakeredis = pytest.importorskip("fakeredis")
+    from response_cache import RedisCacheBackend
+    return ResponseCache(RedisCacheBackend(client=fakeredis.FakeRedis()), ttl_seconds=30, generation_ttl=300)
+
+
+def test_hit_until_the_job_is_written(cache):
+    async def scenario():
+        request = _request("/jobs/j1/candidates", "status=new&limit=10")
+        key = await cache.key("u1", request, [job_tag("j1")])
+        assert await cache.get(key) is None
+        await cache.set(key, '"etag-1"', b'{"candidates": []}')
+
+        # Same user, route and params (in any order) - same key
+        same = await cache.key("u1", _request("/jobs/j1/candidates", "limit=10&status=new"), [job_tag("j1")])
+        assert same == key and await cache.get(same) == ('"etag-1"', b'{"candidates": []}')
+        assert await cache.key("u2", request, [job_tag("j1")]) != key
+
+        await cache.invalidate_async(job_tag("j1"))
+        fresh = await cache.key("u1", request, [job_tag("j1")])
+        assert fresh != key and await cache.get(fresh) is None
+        assert await cache.key("u1", request, [job_tag("j1")], 2) != fresh
+
+    asyncio.run(scenario())
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2 and stats["stores"] == 1 and stats["invalidations"] == 1
+
+
+def test_invalidation_only_bumps_that_job(cache):
+    async def scenario():
+        keys = {}
+        for job_id in ("j1", "j2"):
+            keys[job_id] = await cache.key("u1", _request(f"/jobs/{job_id}"), [job_tag(job_id)])
+            await cache.set(keys[job_id], f'"{job_id}"', b"{}")
+        generation = cache.backend.get("gen:job:j2")
+
+        cache.invalidate(job_tag("j1"))
+        assert await cache.key("u1", _request("/jobs/j1"), [job_tag("j1")]) != keys["j1"]
+        assert await cache.key("u1", _request("/jobs/j2"), [job_tag("j2")]) == keys["j2"]
+        assert await cache.get(keys["j2"]) == ('"j2"', b"{}")
+        assert cache.backend.get("gen:job:j2") == generation
+
+    asyncio.run(scenario())
+
+
+def test_redis_generation_keys_expire():
+    fakeredis = pytest.importorskip("fakeredis")
+    from response_cache import RedisCacheBackend
+
+    cache = ResponseCache(RedisCacheBackend(client=fakeredis.FakeRedis()), ttl_seconds=30, generation_ttl=300)
+    key = asyncio.run(cache.key("u1", _request("/jobs/j1"), [job_tag("j1")]))
+    asyncio.run(cache.set(key, '"etag"', b"{}"))
+    assert 0 < cache.backend.client.ttl("gen:job:j1") <= 300
+    assert 0 < cache.backend.client.ttl(key) <= 30
+    cache.invalidate(job_tag("j1"))
+    assert 0 < cache.backend.client.ttl("gen:job:j1") <= 300
+
+
+def test_memory_generation_expiry_starts_a_new_generation():
+    backend = InMemoryCacheBackend(max_size=100)
+    assert backend.add("gen:job:j1", "first", ttl=0.01) == "first"
+    assert backend.add("gen:job:j1", "second", ttl=0.01) == "first"
+    asyncio.run(asyncio.sleep(0.02))
+    assert backend.add("gen:job:j1", "third", ttl=0.01) == "third"
+
+
+def _scenario_cached_reads():
+    admin = {"X-Profile-Token": "test-token"}
+
+    with api_client() as (client, headers):
+        job_id = client.post("/jobs", json={"requirements": "Backend engineer"}, headers=headers).json()["job"]["id"]
+        candidate = {"job_id": job_id, "resume_text": "Python and PostgreSQL", "candidate_name": "Sam",
+                     "candidate_email": "sam@example.com"}
+        client.post("/candidates", json=candidate, headers=headers)
+        url = f"/jobs/{job_id}/candidates"
+
+        first = client.get(url, headers=headers)
+        before = client.get("/health/cache", headers=admin).json()
+        second = client.get(url, headers=headers)
+        after = client.get("/health/cache", headers=admin).json()
+        assert after["hits"] == before["hits"] + 1 and after["misses"] == before["misses"]
+        assert second.content == first.content and second.headers["etag"] == first.headers["etag"]
+
+        # A new candidate is a write to the job - the next read misses and sees it
+        client.post("/candidates", json={**candidate, "candidate_email": "alex@example.com"}, headers=headers)
+        third = client.get(url, headers=headers)
+        written = client.get("/health/cache", headers=admin).json()
+        assert written["misses"] == after["misses"] + 1 and written["invalidations"] > after["invalidations"]
+        assert len(third.json()["candidates"]) == 2 and third.headers["etag"] != first.headers["etag"]
+
+
+def _scenario_other_worker_writes():
+    from database import SessionLocal
+    from models import Job
+    from sqlalchemy import update
+
+    with api_client() as (client, headers):
+        job_id = client.post("/jobs", json={"requirements": "Backend engineer"}, headers=headers).json()["job"]["id"]
+        urls = [f"/jobs/{job_id}", f"/jobs/{job_id}/candidates", f"/jobs/{job_id}/stats"]
+        etags = {url: client.get(url, headers=headers).headers["etag"] for url in urls}
+        first = client.get(f"/jobs/{job_id}", headers=headers)
+        assert first.headers["etag"] == etags[urls[0]]
+
+        # Another worker's write - this process's cache never hears about it, only the version moves
+        with SessionLocal() as db:
+            db.execute(update(Job).where(Job.id == job_id).values(title="Renamed", version=Job.version + 1))
+            db.commit()
+
+        second = client.get(f"/jobs/{job_id}", headers=headers)
+        assert second.json()["job"]["title"] == "Renamed" and second.headers["etag"] != first.headers["etag"]
+        for url in urls[1:]:
+            assert client.get(url, headers=headers).headers["etag"] != etags[url]
+
+
+def test_other_workers_writes_miss_on_the_version():
+    run_scenario(__name__, "_scenario_other_worker_writes", BCRYPT_ROUNDS="4", RESPONSE_CACHE_BACKEND="memory")
+
+
+def test_cached_reads_are_invalidated_by_writes():
+    run_scenario(__name__, "_scenario_cached_reads", BCRYPT_ROUNDS="4", PROFILE_TOKEN="test-token",
+                 RESPONSE_CACHE_BACKEND="memory")
@@ -0,0 +1,240 @@
+"""
+Checks POST /jobs/{id}/score-pending - deferred candidates are scored best pre-rank
+first, overlapping requests never score (or bill) a candidate twice, a request only
+writes results for candidates it still holds, and candidates it gives up on go back
+to the queue. A batch shrinks to what the user's quota has room for, and until a
+candidate is scored its provisional pre-rank stays out of the dashboard.
+"""
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+
+from api_testing import api_client, run_scenario
+
+RESUMES = {
+    "kim@example.com": "Kubernetes operator",
+    "lee@example.com": "Python and PostgreSQL, some Kubernetes",
+    "fox@example.com": "Frontend, React",
+    "ray@example.com": "PostgreSQL DBA",
+}
+
+
+def _setup(client, headers):
+    job_id = client.post("/jobs", json={"requirements": "Backend engineer"}, headers=headers).json()["job"]["id"]
+    ids = {}
+    for email, resume in RESUMES.items():
+        response = client.post("/candidates", headers=headers, json={
+            "job_id": job_id, "resume_text": resume, "candidate_name": email.split("@")[0].title(),
+            "candidate_email": email, "defer_scoring": True
+        })
+        assert response.status_code == 200 and response.json()["candidate"]["provisional"]
+        ids[email] = response.json()["candidate"]["id"]
+    return job_id, ids
+
+
+def _counting_morgan(delay=0.0, fail=()):
+    """Stub Morgan that counts calls per resume, optionally slow or failing"""
+    import agents
+
+    calls = Counter()
+
+    async def score_resume_async(self, resume_text, job_description):
+        calls[resume_text] += 1
+        await asyncio.sleep(delay)
+        if resume_text in fail:
+            raise RuntimeError("Morgan is down")
+        return {"score": 80, "analysis": "SCORE: 80\n\nRECOMMENDATION:\nGOOD MATCH", "candidate_id": "stub"}
+
+    agents.MorganAgent.score_resume_async = score_resume_async
+    return calls
+
+
+def _statuses(client, headers, job_id):
+    candidates = client.get(f"/jobs/{job_id}/candidates", headers=headers).json()["candidates"]
+    return {c["email"]: c["status"] for c in candidates}
+
+
+def _scenario_best_first():
+    with api_client() as (client, headers):
+        job_id, ids = _setup(client, headers)
+        calls = _counting_morgan()
+
+        first = client.post(f"/jobs/{job_id}/score-pending", params={"limit": 2}, headers=headers)
+        assert first.status_code == 200
+        assert [c["id"] for c in first.json()["scored"]] == [ids["lee@example.com"], ids["ray@example.com"]]
+        assert first.json()["pending"] == 2
+        assert all(c["status"] == "screened" and c["score"] == 80 for c in first.json()["scored"])
+
+        rest = client.post(f"/jobs/{job_id}/score-pending", headers=headers).json()
+        assert [c["id"] for c in rest["scored"]] == [ids["kim@example.com"], ids["fox@example.com"]]
+        assert rest["pending"] == 0
+        assert client.post(f"/jobs/{job_id}/score-pending", headers=headers).json() == {"scored": [], "pending": 0}
+        assert set(calls.values()) == {1} and len(calls) == 4
+
+
+def _scenario_overlapping_requests():
+    with api_client() as (client, headers):
+        job_id, ids = _setup(client, headers)
+        calls = _counting_morgan(delay=0.3)
+
+        def score_pending(_):
+            return client.post(f"/jobs/{job_id}/score-pending", headers=headers)
+
+        with ThreadPoolExecutor(max_workers=3) as pool:
+            responses = list(pool.map(score_pending, range(3)))
+        assert all(r.status_code == 200 for r in responses)
+        scored = [c["id"] for r in responses for c in r.json()["scored"]]
+        assert sorted(scored) == sorted(ids.values())
+        assert set(calls.values()) == {1} and len(calls) == len(RESUMES)
+        assert set(_statuses(client, headers, job_id).values()) == {"screened"}
+
+
+def _scenario_claims():
+    from database import AsyncSessionLocal
+    from models import Candidate, Job
+    from sqlalchemy import select, update
+    import candidate_service
+
+    with api_client() as (client, headers):
+        job_id, ids = _setup(client, headers)
+        calls = _counting_morgan()
+
+        async def race():
+            async with AsyncSessionLocal() as first, AsyncSessionLocal() as second:
+                job_a = await first.get(Job, job_id)
+                job_b = await second.get(Job, job_id)
+                # Both read the queue before either claims
+                queue_a = [c for c, _ in await candidate_service.get_scoring_queue_async(first, job_a)]
+                queue_b = [c for c, _ in await candidate_service.get_scoring_queue_async(second, job_b)]
+                assert len(queue_a) == len(queue_b) == len(RESUMES)
+                claim_a, batch_a = await candidate_service.claim_candidates_async(first, job_a, queue_a[:3])
+                claim_b, batch_b = await candidate_service.claim_candidates_async(second, job_b, queue_b)
+                assert len(batch_a) == 3 and [c.id for c in batch_b] == [queue_b[3].id]
+
+                # b's claim looks abandoned and is retaken - b's results must not land
+                retaken_at = candidate_service.datetime.utcnow() - candidate_service.timedelta(
+                    seconds=candidate_service.SCORING_CLAIM_TIMEOUT + 1)
+                await first.execute(update(Candidate).where(Candidate.scoring_claim == claim_b)
+                                    .values(scoring_claimed_at=retaken_at))
+                await first.commit()
+                claim_c, batch_c = await candidate_service.claim_candidates_async(first, job_a, [queue_a[3]])
+                assert [c.id for c in batch_c] == [queue_a[3].id]
+
+                assert await candidate_service.score_pending_candidates_async(second, job_b, claim_b, batch_b) == []
+                scored = await candidate_service.score_pending_candidates_async(first, job_a, claim_a, batch_a)
+                assert len(scored) == 3
+                scored = await candidate_service.score_pending_candidates_async(first, job_a, claim_c, batch_c)
+                assert len(scored) == 1
+
+            async with AsyncSessionLocal() as db:
+                rows = (await db.execute(select(Candidate.status, Candidate.scoring_claim)
+                                         .where(Candidate.job_id == job_id))).all()
+                assert set(rows) == {("screened", None)}
+
+        asyncio.run(race())
+        assert sum(calls.values()) == 5     # the lost claim's call is wasted, but its result never lands
+
+
+def _scenario_failures_go_back_to_the_queue():
+    with api_client() as (client, headers):
+        job_id, ids = _setup(client, headers)
+
+        # Morgan fails on one candidate - it's pending again, the others are scored
+        _counting_morgan(fail={RESUMES["ray@example.com"]})
+        result = client.post(f"/jobs/{job_id}/score-pending", headers=headers).json()
+        assert len(result["scored"]) == 3 and result["pending"] == 1
+        statuses = _statuses(client, headers, job_id)
+        assert statuses.pop("ray@example.com") == "new" and set(statuses.values()) == {"screened"}
+
+        _counting_morgan()
+        result = client.post(f"/jobs/{job_id}/score-pending", headers=headers).json()
+        assert [c["id"] for c in result["scored"]] == [ids["ray@example.com"]] and result["pending"] == 0
+
+
+def _scenario_batch_fits_the_quota():
+    from types import SimpleNamespace
+    import time
+    import quotas
+    from candidate_service import estimate_candidate_tokens
+
+    # The middle of one minute window for the whole scenario
+    now = time.time() // 60 * 60 + 30
+    quotas.time = SimpleNamespace(time=lambda: now)
+
+    with api_client() as (client, headers):
+        job_id = client.post("/jobs", json={"requirements": "Backend engineer"}, headers=headers).json()["job"]["id"]
+        resumes = [f"Python developer number {i:02d}" for i in range(12)]
+        for i, resume in enumerate(resumes):
+            client.post("/candidates", headers=headers, json={
+                "job_id": job_id, "resume_text": resume, "candidate_name": f"Dev {i}",
+                "candidate_email": f"dev{i}@example.com", "defer_scoring": True
+            })
+        description = client.get(f"/jobs/{job_id}", headers=headers).json()["job"]["job_description"]
+        estimate = estimate_candidate_tokens(resumes[0], description)
+        minute = quotas.PLAN_QUOTAS["free"]["minute"]
+        assert 10 * estimate > minute     # the default batch of 10 never fits the free plan
+
+        # A batch that fits what's left of the minute, not a 429 for the whole default batch
+        calls = _counting_morgan()
+        first = client.post(f"/jobs/{job_id}/score-pending", headers=headers)
+        assert first.status_code == 200, first.text
+        scored = len(first.json()["scored"])
+        left = int(first.headers["x-quota-remaining-minute"])
+        assert 0 < scored < 10 and first.json()["pending"] == 12 - scored
+        assert left < estimate and sum(calls.values()) == scored
+
+        # Nothing fits now - a 429 to retry after, and the claim goes back to the queue
+        second = client.post(f"/jobs/{job_id}/score-pending", headers=headers)
+        assert second.status_code == 429 and int(second.headers["retry-after"]) <= 30
+        assert sum(calls.values()) == scored
+        statuses = client.get(f"/jobs/{job_id}/candidates", headers=headers).json()["candidates"]
+        assert sorted(c["status"] for c in statuses) == ["new"] * (12 - scored) + ["screened"] * scored
+
+
+def _scenario_dashboard_leaves_out_provisional_scores():
+    from database import async_engine
+    from sqlalchemy import event
+
+    with api_client() as (client, headers):
+        job_id, ids = _setup(client, headers)
+        statements = []
+        event.listen(async_engine.sync_engine, "before_cursor_execute",
+                     lambda conn, cursor, statement, *args: statements.append(statement))
+
+        # lee's pre-rank is 100, but nothing has been scored yet
+        dashboard = client.get("/dashboard", headers=headers).json()
+        assert [s for s in statements if "jobs" in s and "users" not in s] == [statements[-1]]
+        assert dashboard["totals"]["candidates"] == 4 and dashboard["totals"]["scored"] == 0
+        assert dashboard["totals"]["avg_score"] is None and dashboard["top_candidates"] == []
+        assert dashboard["jobs"][0]["recommendations"] == {"PENDING": 4}
+
+        _counting_morgan()
+        client.post(f"/jobs/{job_id}/score-pending", params={"limit": 1}, headers=headers)
+        dashboard = client.get("/dashboard", headers=headers).json()
+        assert dashboard["totals"]["scored"] == 1 and dashboard["totals"]["avg_score"] == 80
+        assert [c["id"] for c in dashboard["top_candidates"]] == [ids["lee@example.com"]]
+        assert dashboard["jobs"][0]["recommendations"]["PENDING"] == 3
+
+
+def test_scores_best_pre_rank_first():
+    run_scenario(__name__, "_scenario_best_first", BCRYPT_ROUNDS="4")
+
+
+def test_overlapping_requests_score_each_candidate_once():
+    run_scenario(__name__, "_scenario_overlapping_requests", BCRYPT_ROUNDS="4")
+
+
+def test_results_only_land_for_held_claims():
+    run_scenario(__name__, "_scenario_claims", BCRYPT_ROUNDS="4")
+
+
+def test_failures_go_back_to_the_queue():
+    run_scenario(__name__, "_scenario_failures_go_back_to_the_queue", BCRYPT_ROUNDS="4")
+
+
+def test_batch_shrinks_to_fit_the_quota():
+    run_scenario(__name__, "_scenario_batch_fits_the_quota", BCRYPT_ROUNDS="4")
+
+
+def test_dashboard_leaves_out_provisional_scores():
+    run_scenario(__name__, "_scenario_dashboard_leaves_out_provisional_scores", BCRYPT_ROUNDS="4")
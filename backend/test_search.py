@@ -0,0 +1,115 @@
+"""
+Checks candidate search on SQLite FTS5 - user input can't reach FTS syntax, a name
+match outranks a resume mention, cursors page through every match exactly once, and
+another user's candidates never show up.
+"""
+from types import SimpleNamespace
+import asyncio
+import os
+
+os.environ.setdefault("DATABASE_URL", "sqlite://")
+
+import pytest
+
+from api_testing import api_client, run_scenario, signup
+from search_service import fts5_query, search_candidates_async
+
+
+@pytest.mark.parametrize("query, expected", [
+    ("python", '"python"'),
+    ("Python PostgreSQL", '"Python" "PostgreSQL"'),
+    ('python OR "kafka" NEAR(x)', '"python" "OR" "kafka" "NEAR" "x"'),
+    ("c++ / go-lang*", '"c" "go" "lang"'),
+    ("résumé", '"résumé"'),
+    ("  ", None),
+    ("*:^()", None),
+])
+def test_fts5_query_quotes_every_term(query, expected):
+    assert fts5_query(query) == expected
+
+
+def test_unsupported_database_is_refused():
+    db = SimpleNamespace(bind=SimpleNamespace(dialect=SimpleNamespace(name="mysql")))
+    with pytest.raises(NotImplementedError, match="mysql"):
+        asyncio.run(search_candidates_async(db, "user-1", "python", 10))
+
+
+def _add_candidate(client, headers, job_id, name, resume):
+    response = client.post("/candidates", headers=headers, json={
+        "job_id": job_id, "resume_text": resume, "candidate_name": name,
+        "candidate_email": f"{name.lower().replace(' ', '.')}@example.com"
+    })
+    assert response.status_code == 200, response.text
+    return response.json()["candidate"]["id"]
+
+
+def _scenario_search():
+    with api_client() as (client, headers):
+        job_id = client.post("/jobs", json={"requirements": "Backend engineer"}, headers=headers).json()["job"]["id"]
+        kafka_name = _add_candidate(client, headers, job_id, "Kafka Jones", "Java developer, ten years of Spring")
+        kafka_once = _add_candidate(client, headers, job_id, "Sam Lee", "Python developer who has used Kafka")
+        kafka_more = _add_candidate(client, headers, job_id, "Alex Kim", "Kafka streams, Kafka connect and Kafka ops")
+        _add_candidate(client, headers, job_id, "Riley Fox", "Frontend developer, React and CSS")
+
+        # Someone else's job with a candidate that matches just as well
+        other = signup(client, "other@thinkloop.test")
+        other_job = client.post("/jobs", json={"requirements": "Data engineer"}, headers=other).json()["job"]["id"]
+        other_id = _add_candidate(client, other, other_job, "Kafka Smith", "Kafka, Kafka and more Kafka")
+
+        def search(q, auth=headers, **params):
+            response = client.get("/candidates/search", params={"q": q, **params}, headers=auth)
+            assert response.status_code == 200, response.text
+            return response.json()
+
+        # Ranking - the name is weighted highest, then how often the resume says it
+        results = search("kafka")
+        ids = [c["id"] for c in results["candidates"]]
+        assert ids == [kafka_name, kafka_more, kafka_once] and results["next_cursor"] is None
+        relevance = [c["relevance"] for c in results["candidates"]]
+        assert relevance == sorted(relevance, reverse=True)
+        assert all(c["job_id"] == job_id and c["job_title"] for c in results["candidates"])
+        assert "<mark>Kafka</mark>" in results["candidates"][2]["snippet"]
+
+        # Terms are ANDed, and FTS syntax in the query is just words
+        assert [c["id"] for c in search("python kafka")["candidates"]] == [kafka_once]
+        assert search('kafka" OR "react')["candidates"] == []
+        assert search("***")["candidates"] == []
+
+        # Two pages, every match exactly once, in the same order as one big page
+        first = search("developer", limit=2)
+        assert len(first["candidates"]) == 2 and first["next_cursor"]
+        second = search("developer", limit=2, cursor=first["next_cursor"])
+        assert len(second["candidates"]) == 1 and second["next_cursor"] is None
+        paged = [c["id"] for c in first["candidates"] + second["candidates"]]
+        assert paged == [c["id"] for c in search("developer", limit=10)["candidates"]]
+        assert len(set(paged)) == 3
+
+        # Each user only ever sees their own candidates
+        assert other_id not in ids
+        assert [c["id"] for c in search("kafka", auth=other)["candidates"]] == [other_id]
+        assert search("react", auth=other)["candidates"] == []
+
+        bad_cursor = client.get("/candidates/search", params={"q": "kafka", "cursor": "nope"}, headers=headers)
+        assert bad_cursor.status_code == 400
+
+
+def test_search_ranks_pages_and_scopes_to_the_user():
+    run_scenario(__name__, "_scenario_search", BCRYPT_ROUNDS="4")
+
+
+def _scenario_unsupported_database():
+    import api
+
+    async def unsupported(db, *args):
+        db = SimpleNamespace(bind=SimpleNamespace(dialect=SimpleNamespace(name="mysql")))
+        return await search_candidates_async(db, *args)
+
+    api.search_candidates_async = unsupported
+    with api_client() as (client, headers):
+        response = client.get("/candidates/search", params={"q": "kafka"}, headers=headers)
+        assert response.status_code == 501
+        assert response.json()["detail"] == "Candidate search isn't supported on mysql"
+
+
+def test_unsupported_database_returns_501():
+    run_scenario(__name__, "_scenario_unsupported_database", BCRYPT_ROUNDS="4")
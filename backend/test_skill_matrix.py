@@ -0,0 +1,60 @@
+"""
+Checks the skill pre-rank - skills in a Required section outweigh the ones under
+Nice to Have, a line's own wording beats its section, and candidates come out in
+the order of the job's weighted skills.
+"""
+import numpy as np
+
+from api_testing import JOB_DESCRIPTION
+from skill_matrix import VOCABULARY, job_skill_vector, prerank_score, priority_order, REQUIRED_WEIGHT, OPTIONAL_WEIGHT
+
+
+def _weights(job_description):
+    vector = job_skill_vector(job_description)
+    return {VOCABULARY[i]: float(vector[i]) for i in np.flatnonzero(vector)}
+
+
+def test_section_headings_weight_their_bullets():
+    weights = _weights(JOB_DESCRIPTION)
+    assert set(weights) == {"python", "postgresql", "kubernetes"}
+    assert abs(sum(weights.values()) - 1) < 1e-6
+    assert weights["python"] == weights["postgresql"]
+    assert abs(weights["python"] / weights["kubernetes"] - REQUIRED_WEIGHT / OPTIONAL_WEIGHT) < 1e-4
+
+
+def test_heading_styles():
+    for required, optional in [("## Requirements", "## Bonus Points"), ("Must have:", "Preferred:"),
+                               ("__Minimum Qualifications__", "**Nice to Have:**")]:
+        weights = _weights(f"{required}\n- Python\n\n{optional}\n- Docker\n")
+        assert weights["python"] == 4 * weights["docker"], (required, optional)
+
+
+def test_neutral_heading_ends_the_section():
+    weights = _weights("**Required Qualifications**\n- Python\n\n**Responsibilities**\n- Build Docker images\n")
+    assert weights["python"] == 2 * weights["docker"]
+
+
+def test_line_wording_beats_the_section():
+    description = "**Required Qualifications**\n- Python\n- Kubernetes is a plus\n\n**Nice to Have**\n- Must know SQL\n"
+    weights = _weights(description)
+    assert weights["python"] == weights["sql"] == 4 * weights["kubernetes"]
+
+
+def test_no_known_skills():
+    assert not job_skill_vector("**Required Qualifications**\n- Patience\n").any()
+    assert prerank_score("Python developer", "") == 0
+
+
+def test_priority_order():
+    resumes = [
+        "Kubernetes operator",                      # nice to have only
+        "Python and PostgreSQL, some Kubernetes",   # everything
+        "Frontend, React",                          # nothing
+        "PostgreSQL DBA",                           # one required
+        "Python developer",                         # one required, uploaded later
+    ]
+    order, scores = priority_order(resumes, JOB_DESCRIPTION)
+    assert order == [1, 3, 4, 0, 2]
+    assert scores[1] == 100 and scores[2] == 0 and scores[3] == scores[4] > scores[0] > 0
+    assert prerank_score(resumes[3], JOB_DESCRIPTION) == scores[3]
+    assert priority_order([], JOB_DESCRIPTION) == ([], [])
@@ -0,0 +1,68 @@
+"""
+Cold start budget - importing the API and starting it must stay fast and must not
+need the database. Each measurement runs in a fresh interpreter; the interpreter's
+own start-up time is subtracted and the median of a few runs is compared to the budget.
+
+Override the budgets with IMPORT_BUDGET_SECONDS / STARTUP_BUDGET_SECONDS on slow machines.
+"""
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+IMPORT_BUDGET_SECONDS = float(os.getenv("IMPORT_BUDGET_SECONDS", "2.0"))
+STARTUP_BUDGET_SECONDS = float(os.getenv("STARTUP_BUDGET_SECONDS", "3.0"))
+RUNS = 3
+
+BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+
+# Heavy libraries that only some requests need - none of them should load at import
+LAZY_MODULES = ("anthropic", "PyPDF2", "docx", "alembic")
+
+# A database that can't be reached - startup has to succeed anyway
+UNREACHABLE_DATABASE_URL = "sqlite:////nonexistent-dir/thinkloop.db"
+
+STARTUP_SCRIPT = """
+from fastapi.testclient import TestClient
+import api
+with TestClient(api.app) as client:
+    assert client.get("/health").status_code == 200
+"""
+
+
+def _run(code):
+    env = {**os.environ, "DATABASE_URL": UNREACHABLE_DATABASE_URL, "MIGRATE_ON_STARTUP": "false"}
+    env.pop("ASYNC_DATABASE_URL", None)
+    start = time.perf_counter()
+    subprocess.run([sys.executable, "-c", code], cwd=BACKEND_DIR, env=env, check=True)
+    return time.perf_counter() - start
+
+
+def _median_seconds(code):
+    baseline = statistics.median(_run("pass") for _ in range(RUNS))
+    return statistics.median(_run(code) for _ in range(RUNS)) - baseline
+
+
+def test_import_skips_heavy_modules():
+    check = f"import sys, api; loaded = [m for m in {LAZY_MODULES!r} if m in sys.modules]; assert not loaded, loaded"
+    _run(check)
+
+
+def test_import_time_budget():
+    seconds = _median_seconds("import api")
+    print(f"import api: {seconds:.3f}s (budget {IMPORT_BUDGET_SECONDS}s)")
+    assert seconds <= IMPORT_BUDGET_SECONDS
+
+
+def test_startup_time_budget_without_database():
+    seconds = _median_seconds(STARTUP_SCRIPT)
+    print(f"import + startup + first request: {seconds:.3f}s (budget {STARTUP_BUDGET_SECONDS}s)")
+    assert seconds <= STARTUP_BUDGET_SECONDS
+
+
+if __name__ == "__main__":
+    test_import_skips_heavy_modules()
+    test_import_time_budget()
+    test_startup_time_budget_without_database()
+    print("Cold start within budget")
@@ -1,8 +1,22 @@
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 from models import User
 from auth import hash_password, verify_password
+from password_hasher import password_hasher
+from audit_log import audit_log
 import uuid
 
+def _new_user(email: str, hashed_password: str, full_name: str = None, company_name: str = None):
+    return User(
+        id=str(uuid.uuid4()),
+        email=email,
+        hashed_password=hashed_password,
+        full_name=full_name,
+        company_name=company_name,
+        plan="free"
+    )
+
 def create_user(db: Session, email: str, password: str, full_name: str = None, company_name: str = None):
     """Create new user"""
     # Check if user exists
@@ -11,18 +25,12 @@ def create_user(db: Session, email: str, password: str, full_name: str = None, c
         return None, "Email already registered"
     
     # Create user
-    user = User(
-        id=str(uuid.uuid4()),
-        email=email,
-        hashed_password=hash_password(password),
-        full_name=full_name,
-        company_name=company_name,
-        plan="free"
-    )
+    user = _new_user(email, hash_password(password), full_name, company_name)
     
     db.add(user)
     db.commit()
     db.refresh(user)
+    audit_log.record("signup", user.id, "user", user.id)
     
     return user, None
 
@@ -35,8 +43,55 @@ def authenticate_user(db: Session, email: str, password: str):
     if not verify_password(password, user.hashed_password):
         return None
     
+    audit_log.record("login", user.id, "user", user.id)
     return user
 
 def get_user_by_email(db: Session, email: str):
     """Get user by email"""
-    return db.query(User).filter(User.email == email).first()
\ No newline at end of file
+    return db.query(User).filter(User.email == email).first()
+
+
+# Async versions for the API routes - bcrypt runs in the dedicated password
+# pool, which raises PasswordPoolBusy when it is saturated
+
+async def create_user_async(db: AsyncSession, email: str, password: str, full_name: str = None, company_name: str = None):
+    """Create new user"""
+    existing = await get_user_by_email_async(db, email)
+    if existing:
+        return None, "Email already registered"
+    
+    hashed = await password_hasher.hash(password)
+    user = _new_user(email, hashed, full_name, company_name)
+    
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    audit_log.record("signup", user.id, "user", user.id)
+    
+    return user, None
+
+async def authenticate_user_async(db: AsyncSession, email: str, password: str):
+    """Login user"""
+    user = await get_user_by_email_async(db, email)
+    if not user:
+        return None
+    
+    valid, new_hash = await password_hasher.verify(password, user.hashed_password)
+    if not valid:
+        return None
+    
+    # Transparent rehash when the configured bcrypt cost changed
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+    
+    audit_log.record("login", user.id, "user", user.id)
+    return user
+
+async def get_user_by_email_async(db: AsyncSession, email: str):
+    """Get user by email"""
+    return (await db.execute(select(User).where(User.email == email))).scalars().first()
+
+async def get_user_by_id_async(db: AsyncSession, user_id: str):
+    """Get user by id"""
+    return await db.get(User, user_id)